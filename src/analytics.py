@@ -0,0 +1,400 @@
+# satELA/src/analytics.py
+#
+# Practice statistics over the attempt history, computed with NumPy.
+#
+# Question metadata is turned into categorical columns (an integer code per
+# question for each of domain, skill and difficulty) and the attempt history into
+# parallel arrays (user code, question position, correct, timestamp, seconds
+# taken). Every breakdown is then a handful of bincount/unique calls over those
+# arrays instead of a Python loop over attempt and question dicts, so the same
+# code serves one student's journal and a progress database with millions of
+# attempts across users.
+#
+#   python src/analytics.py                       # single-user journal
+#   python src/analytics.py --user alice          # one user in user_data/progress.db
+#   python src/analytics.py --all-users
+#   python src/analytics.py --benchmark 1000000   # synthetic history, vectorized vs. loop
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.question_index import INDEXED_FIELDS
+
+SINGLE_USER_NAME = "(single user)"
+SECONDS_PER_DAY = 86400
+
+class QuestionTable:
+    """
+    Question metadata as categorical columns.
+
+    `codes[field][i]` is the index into `categories[field]` of question i's value,
+    for each of INDEXED_FIELDS.
+    """
+
+    def __init__(self, questions):
+        self.ids = [question['id'] for question in questions]
+        self.position_of = {question_id: position for position, question_id in enumerate(self.ids)}
+        self.categories = {}
+        self.codes = {}
+        for field in INDEXED_FIELDS:
+            values = np.array([question[field] for question in questions], dtype=str)
+            categories, codes = np.unique(values, return_inverse=True)
+            self.categories[field] = categories.tolist()
+            self.codes[field] = codes.astype(np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+class AttemptTable:
+    """
+    Attempt history as parallel arrays, one entry per attempt on a question that
+    is in the question bank.
+
+    Attributes:
+        users (list): User names; `user_codes` index into it.
+        question_positions (ndarray): Position of the question in the QuestionTable.
+        correct (ndarray): bool.
+        answered_at (ndarray): Unix timestamps.
+        elapsed (ndarray): Seconds taken, NaN where not recorded.
+    """
+
+    def __init__(self, users, user_codes, question_positions, correct, answered_at, elapsed):
+        known = question_positions >= 0 # Attempts on questions no longer in the bank are left out
+        self.users = users
+        self.user_codes = user_codes[known]
+        self.question_positions = question_positions[known]
+        self.correct = correct[known]
+        self.answered_at = answered_at[known]
+        self.elapsed = elapsed[known]
+        self.timed = ~np.isnan(self.elapsed)
+        self._time_order = None
+
+    def __len__(self):
+        return len(self.correct)
+
+    def time_order(self):
+        """Indices of the attempts with a recorded time, fastest first (computed once)."""
+        if self._time_order is None:
+            timed_indices = np.flatnonzero(self.timed)
+            self._time_order = timed_indices[np.argsort(self.elapsed[timed_indices], kind='stable')]
+        return self._time_order
+
+    @classmethod
+    def from_columns(cls, question_table, user_ids, question_ids, correct, answered_at, elapsed, user_names=None):
+        """
+        Builds the table from column sequences. `user_ids` may be names or numeric
+        IDs; `user_names` maps numeric IDs to names.
+        """
+        position_of = question_table.position_of
+        question_positions = np.fromiter((position_of.get(question_id, -1) for question_id in question_ids),
+                                         dtype=np.int32, count=len(question_ids))
+        unique_users, user_codes = np.unique(np.asarray(user_ids), return_inverse=True)
+        users = [user_names.get(user_id, str(user_id)) if user_names else str(user_id)
+                 for user_id in unique_users.tolist()]
+        return cls(users, user_codes.astype(np.int32), question_positions,
+                   np.asarray(correct, dtype=bool), np.asarray(answered_at, dtype=np.float64),
+                   np.asarray(elapsed, dtype=np.float64))
+
+    @classmethod
+    def from_records(cls, question_table, records, user=SINGLE_USER_NAME):
+        """Builds the table from attempt dicts as yielded by src.user_progress.iter_attempts."""
+        records = list(records)
+        return cls.from_columns(question_table,
+                                [record.get("user", user) for record in records],
+                                [str(record["id"]) for record in records],
+                                [record["correct"] for record in records],
+                                [record.get("ts") or 0.0 for record in records],
+                                [record.get("elapsed") for record in records])
+
+    @classmethod
+    def from_progress_db(cls, question_table, progress_db, user=None, batch_size=100000):
+        """Loads one user's attempts (or everyone's, if user is None) from a ProgressDatabase."""
+        columns = [[], [], [], [], []]
+        for rows in progress_db.iter_attempt_rows(user, batch_size):
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+        return cls.from_columns(question_table, *columns, user_names=progress_db.user_names())
+
+# --- Group-bys ---
+
+# Above this many (group, question) cells, distinct pairs are counted by sorting
+# instead of with a presence table
+MAX_PRESENCE_CELLS = 1 << 26
+
+def _group_medians(codes, num_groups, attempts):
+    # Median time within each group. The timed attempts are sorted by time once per
+    # table; a stable sort of their group codes then leaves each group's run in time
+    # order, and the median is the middle of the run. Codes that fit in 16 bits are
+    # radix-sorted.
+    medians = np.full(num_groups, np.nan)
+    time_order = attempts.time_order()
+    if not len(time_order):
+        return medians
+    code_dtype = np.int16 if num_groups <= np.iinfo(np.int16).max else np.int64
+    codes_by_time = codes[time_order].astype(code_dtype)
+    sorted_values = attempts.elapsed[time_order][np.argsort(codes_by_time, kind='stable')]
+    counts = np.bincount(codes_by_time, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+def _distinct_per_group(codes, num_groups, positions, num_questions):
+    # Number of distinct questions attempted in each group
+    if num_groups * num_questions <= MAX_PRESENCE_CELLS:
+        present = np.zeros(num_groups * num_questions, dtype=bool)
+        present[codes.astype(np.int64) * num_questions + positions] = True
+        return present.reshape(num_groups, num_questions).sum(axis=1)
+    pairs = np.unique(codes.astype(np.int64) * num_questions + positions)
+    return np.bincount(pairs // num_questions, minlength=num_groups)
+
+def group_stats(codes, num_groups, attempts, questions_attempted, questions_per_group):
+    """
+    Per-group attempt statistics for attempts labelled with `codes`.
+
+    Args:
+        questions_attempted (ndarray): Distinct questions attempted in each group.
+        questions_per_group (ndarray): Number of bank questions in each group, for coverage.
+
+    Returns:
+        dict: Arrays of length num_groups: attempts, correct, accuracy, mean_seconds,
+        median_seconds, questions_attempted, coverage.
+    """
+    attempt_counts = np.bincount(codes, minlength=num_groups)
+    correct_counts = np.bincount(codes, weights=attempts.correct, minlength=num_groups)
+    timed = attempts.timed
+    timed_counts = np.bincount(codes[timed], minlength=num_groups)
+    time_sums = np.bincount(codes[timed], weights=attempts.elapsed[timed], minlength=num_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            "attempts": attempt_counts,
+            "correct": correct_counts.astype(np.int64),
+            "accuracy": np.where(attempt_counts > 0, correct_counts / attempt_counts, np.nan),
+            "mean_seconds": np.where(timed_counts > 0, time_sums / timed_counts, np.nan),
+            "median_seconds": _group_medians(codes, num_groups, attempts),
+            "questions_attempted": questions_attempted,
+            "coverage": np.where(questions_per_group > 0, questions_attempted / questions_per_group, np.nan),
+        }
+
+def _rows(labels, stats, key_name):
+    # Turns the arrays of group_stats into one dict per group that has attempts
+    rows = []
+    for i, label in enumerate(labels):
+        if not stats["attempts"][i]:
+            continue
+        row = {key_name: label}
+        for name, values in stats.items():
+            value = values[i].item()
+            row[name] = None if value != value else value # NaN -> None
+        rows.append(row)
+    return rows
+
+def breakdown(attempts, questions, field):
+    """
+    Accuracy, time per question and coverage for each value of a question field
+    ("domain", "skill", "difficulty"), or for each user with field="user".
+
+    Returns:
+        list: One dict per value that has attempts.
+    """
+    if field == "user":
+        num_users = len(attempts.users)
+        questions_attempted = _distinct_per_group(attempts.user_codes, num_users, attempts.question_positions,
+                                                  len(questions))
+        stats = group_stats(attempts.user_codes, num_users, attempts, questions_attempted,
+                            np.full(num_users, len(questions)))
+        return _rows(attempts.users, stats, "user")
+    categories = questions.categories[field]
+    question_codes = questions.codes[field]
+    # Every question has one value per field, so coverage needs no per-attempt pairs
+    attempted_questions = np.bincount(attempts.question_positions, minlength=len(questions)) > 0
+    questions_attempted = np.bincount(question_codes, weights=attempted_questions,
+                                      minlength=len(categories)).astype(np.int64)
+    stats = group_stats(question_codes[attempts.question_positions], len(categories), attempts, questions_attempted,
+                        np.bincount(question_codes, minlength=len(categories)))
+    return _rows(categories, stats, field)
+
+def daily_progress(attempts):
+    """
+    Attempts, accuracy and newly attempted questions per calendar day (UTC).
+
+    Returns:
+        list: One dict per day with attempts, oldest first.
+    """
+    if not len(attempts):
+        return []
+    day_numbers = np.floor_divide(attempts.answered_at, SECONDS_PER_DAY).astype(np.int64)
+    first_day = int(day_numbers.min())
+    day_codes = day_numbers - first_day
+    num_days = int(day_codes.max()) + 1
+    attempt_counts = np.bincount(day_codes, minlength=num_days)
+    correct_counts = np.bincount(day_codes, weights=attempts.correct, minlength=num_days)
+    # A question is new on the day of the user's first attempt at it: the earliest
+    # day among the attempts on each (user, question) pair
+    pair_keys = attempts.user_codes.astype(np.int64) * (int(attempts.question_positions.max()) + 1) \
+        + attempts.question_positions
+    order = np.lexsort((day_codes, pair_keys))
+    sorted_keys = pair_keys[order]
+    first_of_pair = np.ones(len(sorted_keys), dtype=bool)
+    first_of_pair[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    new_counts = np.bincount(day_codes[order][first_of_pair], minlength=num_days)
+    return [{"day": str(np.datetime64(first_day + day, 'D')), "attempts": int(attempt_counts[day]),
+             "accuracy": correct_counts[day] / attempt_counts[day], "new_questions": int(new_counts[day])}
+            for day in np.flatnonzero(attempt_counts).tolist()]
+
+def summarize(attempts, questions):
+    """All breakdowns of the report, as JSON-serializable data."""
+    timed = attempts.elapsed[attempts.timed]
+    summary = {
+        "overall": {
+            "attempts": len(attempts),
+            "correct": int(attempts.correct.sum()),
+            "accuracy": float(attempts.correct.mean()) if len(attempts) else None,
+            "mean_seconds": float(timed.mean()) if len(timed) else None,
+            "median_seconds": float(np.median(timed)) if len(timed) else None,
+            "questions_attempted": int(np.count_nonzero(np.bincount(attempts.question_positions,
+                                                                    minlength=len(questions)))),
+            "questions_total": len(questions),
+        },
+    }
+    for field in INDEXED_FIELDS:
+        summary[field] = breakdown(attempts, questions, field)
+    summary["days"] = daily_progress(attempts)
+    if len(attempts.users) > 1:
+        summary["user"] = breakdown(attempts, questions, "user")
+    return summary
+
+# --- Loading and reports ---
+
+def load_attempt_table(questions, user=None, all_users=False):
+    """
+    Loads the attempt history for `questions` (a question list or QuestionStore):
+    the single-user journal by default, one user's or every user's attempts from
+    the progress database otherwise.
+
+    Returns:
+        tuple: (AttemptTable, QuestionTable)
+    """
+    from src.user_progress import get_progress_db, iter_attempts
+    question_table = QuestionTable(questions)
+    if user is None and not all_users:
+        return AttemptTable.from_records(question_table, iter_attempts()), question_table
+    return AttemptTable.from_progress_db(question_table, get_progress_db(), None if all_users else user), question_table
+
+def _format_percent(value):
+    return f"{value * 100:5.1f}%" if value is not None else "    -"
+
+def _format_seconds(value):
+    return f"{value:6.1f}s" if value is not None else "      -"
+
+def print_report(summary, max_rows=15):
+    overall = summary["overall"]
+    print("\n--- Practice Statistics ---")
+    if not overall["attempts"]:
+        print("No answered questions yet.")
+        return
+    print(f"Attempts: {overall['attempts']}, correct: {overall['correct']} ({_format_percent(overall['accuracy']).strip()})")
+    print(f"Questions attempted: {overall['questions_attempted']} of {overall['questions_total']}")
+    if overall["mean_seconds"] is not None:
+        print(f"Time per question: mean {overall['mean_seconds']:.1f}s, median {overall['median_seconds']:.1f}s")
+
+    for field in INDEXED_FIELDS + ("user",):
+        rows = summary.get(field)
+        if not rows:
+            continue
+        if field == "skill":
+            rows = sorted(rows, key=lambda row: row["accuracy"]) # Weakest skills first
+        print(f"\nBy {field}:{'  (weakest first)' if field == 'skill' else ''}")
+        print(f"  {'':<40} {'attempts':>8} {'accuracy':>8} {'median':>8} {'covered':>8}")
+        for row in rows[:max_rows]:
+            print(f"  {str(row[field])[:40]:<40} {row['attempts']:>8} {_format_percent(row['accuracy']):>8}"
+                  f" {_format_seconds(row['median_seconds']):>8} {_format_percent(row['coverage']):>8}")
+        if len(rows) > max_rows:
+            print(f"  ... {len(rows) - max_rows} more")
+
+    days = summary["days"]
+    if days:
+        print("\nRecent days:")
+        for row in days[-7:]:
+            print(f"  {row['day']}  {row['attempts']:>6} attempts  {_format_percent(row['accuracy'])}"
+                  f"  {row['new_questions']:>5} new questions")
+
+# --- Benchmark ---
+
+def make_synthetic_history(questions, num_attempts, num_users, seed=0):
+    """Random attempt columns over `questions`: (user IDs, question IDs, correct, timestamps, seconds)."""
+    rng = np.random.default_rng(seed)
+    question_ids = np.array([question['id'] for question in questions])
+    start = time.time() - 90 * 86400
+    return (rng.integers(0, num_users, num_attempts).tolist(),
+            question_ids[rng.integers(0, len(question_ids), num_attempts)].tolist(),
+            (rng.random(num_attempts) < 0.65).tolist(),
+            np.sort(rng.uniform(start, start + 90 * 86400, num_attempts)).tolist(),
+            rng.gamma(2.0, 30.0, num_attempts).tolist())
+
+def _loop_skill_accuracy(questions, question_ids, correct):
+    # The dict-walking version the vectorized group-by replaces
+    skill_of = {question['id']: question['skill'] for question in questions}
+    totals = {}
+    for question_id, is_correct in zip(question_ids, correct):
+        skill = skill_of.get(question_id)
+        if skill is None:
+            continue
+        counts = totals.setdefault(skill, [0, 0])
+        counts[0] += 1
+        counts[1] += is_correct
+    return {skill: right / total for skill, (total, right) in totals.items()}
+
+def run_benchmark(questions, sizes, num_users=1000):
+    for size in sizes:
+        columns = make_synthetic_history(questions, size, num_users)
+        start = time.perf_counter()
+        question_table = QuestionTable(questions)
+        attempts = AttemptTable.from_columns(question_table, *columns)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = summarize(attempts, question_table)
+        summary_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = {row["skill"]: row["accuracy"] for row in breakdown(attempts, question_table, "skill")}
+        vectorized_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        looped = _loop_skill_accuracy(questions, columns[1], columns[2])
+        loop_seconds = time.perf_counter() - start
+        assert all(abs(vectorized[skill] - accuracy) < 1e-9 for skill, accuracy in looped.items())
+
+        print(f"{size:>10} attempts: load {load_seconds * 1000:8.1f} ms, full summary {summary_seconds * 1000:8.1f} ms"
+              f" ({len(summary.get('user', []))} users), accuracy by skill {vectorized_seconds * 1000:7.1f} ms"
+              f" vs. {loop_seconds * 1000:8.1f} ms looping over dicts")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Accuracy, timing and progress statistics over the attempt history.")
+    arg_parser.add_argument('--user', help="Student name in the progress database (default: the single-user journal).")
+    arg_parser.add_argument('--all-users', action='store_true', help="Statistics over every user in the progress database.")
+    arg_parser.add_argument('--benchmark', metavar='SIZES', type=lambda value: [int(size) for size in value.split(',')],
+                            help="Time the group-bys on synthetic histories of these sizes, e.g. 100000,1000000.")
+    args = arg_parser.parse_args()
+
+    from src.main import ensure_questions_parsed
+    all_questions = ensure_questions_parsed()
+    if not all_questions:
+        print("No questions available.")
+        sys.exit(1)
+    if args.benchmark:
+        run_benchmark(all_questions, args.benchmark)
+    else:
+        attempt_table, question_table = load_attempt_table(all_questions, args.user, args.all_users)
+        print_report(summarize(attempt_table, question_table))
@@ -0,0 +1,159 @@
+# satELA/src/api_load_test.py
+#
+# Load test for src/api_server.py. Each simulated student opens a keep-alive
+# connection, draws a session, fetches every question and submits an answer.
+#
+#   python src/api_load_test.py --sessions 300 --questions 10
+#       starts a server in-process (progress goes to a temporary database)
+#   python src/api_load_test.py --url http://127.0.0.1:8000 --sessions 300
+#       runs against an already running server
+#   python src/api_load_test.py --rounds 3
+#       each student takes three sessions in a row; from the second one on the
+#       server hands out pre-built session bundles
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client for JSON requests."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value.strip())
+        response_body = await self.reader.readexactly(length) if length else b''
+        return status, json.loads(response_body) if response_body else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+async def run_student(host, port, user, questions_per_session, latencies, errors, rounds=1):
+    connection = HttpConnection(host, port)
+    await connection.open()
+    try:
+        async def timed(kind, method, path, payload=None):
+            start = time.perf_counter()
+            status, data = await connection.request(method, path, payload)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(f"{kind}: {status} {data}")
+            return data
+
+        for _ in range(rounds):
+            session = await timed("create_session", "POST", "/sessions", {"user": user, "count": questions_per_session})
+            if not session:
+                return
+            for question_id in session.get("question_ids", []):
+                await timed("get_question", "GET", f"/questions/{question_id}")
+                await timed("submit_answer", "POST", f"/sessions/{session['session_id']}/answers",
+                            {"question_id": question_id, "answer": random.choice("ABCD")})
+    finally:
+        await connection.close()
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def print_report(latencies, errors, total_time):
+    total_requests = sum(len(values) for values in latencies.values())
+    print(f"\n--- Load Test Summary ---")
+    print(f"{total_requests} requests in {total_time:.2f} seconds ({total_requests / total_time:.0f} requests/second).")
+    for kind, values in sorted(latencies.items()):
+        values.sort()
+        print(f"  {kind:<15} n={len(values):<6} p50={percentile(values, 0.50) * 1000:7.2f} ms"
+              f"  p95={percentile(values, 0.95) * 1000:7.2f} ms  p99={percentile(values, 0.99) * 1000:7.2f} ms"
+              f"  max={values[-1] * 1000:7.2f} ms")
+    print(f"Errors: {len(errors)}")
+    for error in errors[:10]:
+        print(f"  {error}")
+
+async def print_bundle_stats(host, port):
+    connection = HttpConnection(host, port)
+    try:
+        await connection.open()
+        status, health = await connection.request("GET", "/health")
+    except (OSError, ValueError):
+        return
+    finally:
+        await connection.close()
+    bundles = (health or {}).get("bundles") if status == 200 else None
+    if bundles:
+        print(f"Session bundles: {bundles['hits']} served pre-built, {bundles['misses']} built on demand, "
+              f"{bundles['discarded']} discarded, {bundles['ready']} ready.")
+
+async def run_load_test(url, sessions, questions_per_session, rounds=1):
+    server = api = None
+    if url is None:
+        # In-process server on a free port; progress goes to a throwaway database
+        from src.api_server import start_server, stop_server
+        from src.user_progress import use_progress_db
+        use_progress_db(os.path.join(tempfile.mkdtemp(prefix='satela_load_'), 'progress.db'))
+        server, api = await start_server('127.0.0.1', 0)
+        host, port = server.sockets[0].getsockname()[:2]
+    else:
+        parsed_url = urlparse(url)
+        host, port = parsed_url.hostname, parsed_url.port or 80
+
+    latencies = {}
+    errors = []
+    print(f"Running {sessions} concurrent students, {rounds} sessions of {questions_per_session} questions each, "
+          f"against {host}:{port}...")
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*(run_student(host, port, f"load_test_user_{i}", questions_per_session, latencies,
+                                                 errors, rounds)
+                                     for i in range(sessions)), return_exceptions=True)
+    total_time = time.perf_counter() - start_time
+    errors.extend(f"session failed: {result!r}" for result in results if isinstance(result, Exception))
+    print_report(latencies, errors, total_time)
+    await print_bundle_stats(host, port)
+
+    if server is not None:
+        await stop_server(server, api)
+    return not errors
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Load test the SAT ELA question API.")
+    arg_parser.add_argument('--url', help="Base URL of a running server (default: start one in-process).")
+    arg_parser.add_argument('--sessions', type=int, default=300, help="Concurrent student sessions.")
+    arg_parser.add_argument('--questions', type=int, default=10, help="Questions per session.")
+    arg_parser.add_argument('--rounds', type=int, default=1, help="Sessions each student takes one after another.")
+    args = arg_parser.parse_args()
+    succeeded = asyncio.run(run_load_test(args.url, args.sessions, args.questions, args.rounds))
+    sys.exit(0 if succeeded else 1)
@@ -0,0 +1,349 @@
+# satELA/src/api_server.py
+#
+# Asyncio HTTP API that serves practice sessions to a frontend.
+#
+#   GET  /health                       -> {"status": "ok", "questions": 928}
+#   POST /sessions                     {"user": "alice", "count": 10, "domain"?, "skill"?, "difficulty"?}
+#                                      -> {"session_id": ..., "question_ids": [...], "questions": [...]}
+#   GET  /sessions/<session_id>        -> session progress
+#   GET  /questions/<question_id>      -> question without its answer or explanation
+#   POST /sessions/<session_id>/answers {"question_id": ..., "answer": "B"}
+#                                      -> {"correct": true, "correct_answer": "B"}
+#                                         (409 if the question was already answered)
+#
+# The question bank is loaded once at startup; progress goes through
+# src.user_progress (the per-user SQLite backend). Sessions come pre-built and
+# pre-rendered from src.session_bundles, so starting one is a queue lookup.
+# Sessions idle for longer than the session TTL expire (404 afterwards); a
+# background task sweeps them out, and the oldest are dropped beyond MAX_SESSIONS.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.main import ensure_questions_parsed
+from src.near_duplicates import cluster_lookup, load_near_duplicate_clusters
+from src.question_index import INDEXED_FIELDS, QuestionIndex
+from src.session_bundles import SessionBundlePool
+from src.user_progress import load_uncompleted_question_ids, record_attempt, register_question_ids
+
+MAX_REQUEST_BODY = 64 * 1024
+MAX_SESSION_SIZE = 100
+MAX_SESSIONS = 100000
+SESSION_TTL = 2 * 60 * 60 # Seconds without an answer before a session expires
+SESSION_SWEEP_INTERVAL = 60
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Fields sent to the client when a question is shown
+PUBLIC_QUESTION_FIELDS = ("id", "domain", "skill", "difficulty", "question_text", "choices")
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class QuestionCache:
+    """
+    In-memory hot cache over the question bank.
+
+    Questions are loaded once; the public JSON body of a question is rendered the
+    first time it is requested and reused for every later request.
+    """
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.index = QuestionIndex(questions)
+        self.by_id = {question['id']: question for question in questions}
+        self.cluster_of = cluster_lookup(load_near_duplicate_clusters(questions))
+        self._public_bodies = {}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def get(self, question_id):
+        return self.by_id.get(question_id)
+
+    def public_body(self, question_id):
+        body = self._public_bodies.get(question_id)
+        if body is None:
+            question = self.by_id.get(question_id)
+            if question is None:
+                return None
+            public_question = {field: question[field] for field in PUBLIC_QUESTION_FIELDS}
+            body = json.dumps(public_question, ensure_ascii=False).encode('utf-8')
+            self._public_bodies[question_id] = body
+        return body
+
+class Session:
+    def __init__(self, user, question_ids, correct_answers):
+        self.session_id = uuid.uuid4().hex
+        self.user = user
+        self.question_ids = question_ids
+        self.correct_answers = correct_answers
+        self.answers = {}
+        self.last_activity = time.time()
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "user": self.user,
+            "question_ids": self.question_ids,
+            "answered": len(self.answers),
+            "correct": sum(1 for correct in self.answers.values() if correct),
+            "remaining": len(self.question_ids) - len(self.answers),
+        }
+
+class QuestionApi:
+    """Request handlers; blocking progress-store calls run in the default thread pool."""
+
+    def __init__(self, question_cache, session_ttl=SESSION_TTL, max_sessions=MAX_SESSIONS):
+        self.question_cache = question_cache
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict() # session_id -> Session, least recently active first
+        register_question_ids(question_cache.by_id)
+        self.bundles = SessionBundlePool(question_cache.index, question_cache.cluster_of,
+                                         question_cache.public_body, load_uncompleted_question_ids)
+        self.sweep_task = None
+
+    def start_sweeping(self, interval=SESSION_SWEEP_INTERVAL):
+        """Starts a task on the running loop that drops expired sessions every `interval` seconds."""
+        async def sweep():
+            while True:
+                await asyncio.sleep(interval)
+                self.expire_sessions()
+        self.sweep_task = asyncio.create_task(sweep())
+
+    async def close(self):
+        """Stops the sweep task and the bundle builders."""
+        if self.sweep_task is not None:
+            self.sweep_task.cancel()
+            try:
+                await self.sweep_task
+            except asyncio.CancelledError:
+                pass
+            self.sweep_task = None
+        self.bundles.close()
+
+    async def _run_blocking(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: function(*args, **kwargs))
+
+    async def handle(self, method, path, body):
+        parts = [part for part in path.split('?', 1)[0].split('/') if part]
+        if parts == ["health"]:
+            self._require_method(method, "GET")
+            return 200, {"status": "ok", "questions": len(self.question_cache), "bundles": self.bundles.stats()}
+        if parts == ["sessions"]:
+            self._require_method(method, "POST")
+            return await self.create_session(self._parse_json(body))
+        if len(parts) == 2 and parts[0] == "sessions":
+            self._require_method(method, "GET")
+            return 200, self._get_session(parts[1]).to_dict()
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "answers":
+            self._require_method(method, "POST")
+            return await self.submit_answer(parts[1], self._parse_json(body))
+        if len(parts) == 2 and parts[0] == "questions":
+            self._require_method(method, "GET")
+            question_body = self.question_cache.public_body(parts[1])
+            if question_body is None:
+                raise ApiError(404, f"Unknown question '{parts[1]}'.")
+            return 200, question_body
+        raise ApiError(404, f"No route for {path}.")
+
+    def _require_method(self, method, expected):
+        if method != expected:
+            raise ApiError(405, f"Use {expected} for this endpoint.")
+
+    def _parse_json(self, body):
+        try:
+            data = json.loads(body.decode('utf-8') or '{}')
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ApiError(400, "Request body must be JSON.")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        return data
+
+    def _get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None and time.time() - session.last_activity > self.session_ttl:
+            del self.sessions[session_id] # Expired, the sweep just has not reached it yet
+            session = None
+        if session is None:
+            raise ApiError(404, f"Unknown or expired session '{session_id}'.")
+        return session
+
+    def expire_sessions(self, now=None):
+        """Drops the sessions idle for longer than the TTL; returns how many were dropped."""
+        cutoff = (now if now is not None else time.time()) - self.session_ttl
+        expired = 0
+        # Sessions are kept in order of last activity, so the expired ones are at the front
+        while self.sessions and next(iter(self.sessions.values())).last_activity < cutoff:
+            self.sessions.popitem(last=False)
+            expired += 1
+        return expired
+
+    async def create_session(self, data):
+        user = data.get("user")
+        if not isinstance(user, str) or not user.strip():
+            raise ApiError(400, "'user' is required.")
+        count = data.get("count", 10)
+        if not isinstance(count, int) or not 1 <= count <= MAX_SESSION_SIZE:
+            raise ApiError(400, f"'count' must be an integer between 1 and {MAX_SESSION_SIZE}.")
+        index = self.question_cache.index
+        filters = {}
+        for field in INDEXED_FIELDS:
+            if data.get(field) is not None:
+                filters[field] = index.resolve_value(field, str(data[field]))
+                if filters[field] is None:
+                    raise ApiError(400, f"Unknown {field} '{data[field]}'.")
+
+        bundle = self.bundles.take(user, count, filters)
+        if bundle is None:
+            # First request for this combination: build it now, later ones are pre-built
+            bundle = await self._run_blocking(self.bundles.build, user, count, filters)
+            self.bundles.served(user, count, filters, bundle)
+        session = Session(user, bundle.question_ids, bundle.answers)
+        self.sessions[session.session_id] = session
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return 201, bundle.response_body(session.session_id)
+
+    async def submit_answer(self, session_id, data):
+        session = self._get_session(session_id)
+        question_id = data.get("question_id")
+        answer = str(data.get("answer", "")).strip().upper()
+        if question_id not in session.question_ids:
+            raise ApiError(400, "'question_id' is not part of this session.")
+        if answer not in ('A', 'B', 'C', 'D'):
+            raise ApiError(400, "'answer' must be one of A, B, C, D.")
+        if question_id in session.answers:
+            raise ApiError(409, f"Question '{question_id}' has already been answered in this session.")
+
+        correct_answer = session.correct_answers[question_id]
+        correct = answer == correct_answer
+        now = time.time()
+        elapsed = now - session.last_activity
+        session.last_activity = now
+        self.sessions.move_to_end(session_id)
+        session.answers[question_id] = correct # Set before the await so a concurrent repeat gets 409
+        await self._run_blocking(record_attempt, question_id, answer, correct, elapsed, user=session.user)
+        self.bundles.mark_answered(session.user, question_id)
+        return 200, {"correct": correct, "correct_answer": correct_answer,
+                     "remaining": len(session.question_ids) - len(session.answers)}
+
+async def _read_request(reader):
+    # Returns (method, path, headers, body), or None when the client closed the connection
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ApiError(400, "Malformed request line.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', '0') or 0)
+    except ValueError:
+        raise ApiError(400, "Invalid Content-Length header.")
+    if length > MAX_REQUEST_BODY:
+        raise ApiError(413, "Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, headers, body
+
+def _encode_response(status, payload, keep_alive):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+def make_connection_handler(api):
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    status, payload = await api.handle(method, path, body)
+                except ApiError as e:
+                    status, payload = e.status, {"error": e.message}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    print(f"Error handling request: {e}")
+                    status, payload = 500, {"error": "Internal server error."}
+                writer.write(_encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle_connection
+
+async def start_server(host, port, questions=None, session_ttl=SESSION_TTL):
+    """
+    Loads the question bank (once) and starts listening. Expired sessions are swept
+    out in the background until stop_server is called.
+
+    Returns:
+        tuple: (asyncio server, QuestionApi).
+    """
+    if questions is None:
+        questions = ensure_questions_parsed()
+    api = QuestionApi(QuestionCache(questions), session_ttl=session_ttl)
+    server = await asyncio.start_server(make_connection_handler(api), host, port, backlog=1024)
+    api.start_sweeping(min(SESSION_SWEEP_INTERVAL, session_ttl))
+    return server, api
+
+async def stop_server(server, api):
+    """Stops listening, then stops the session sweep and the bundle builders."""
+    server.close()
+    await server.wait_closed()
+    await api.close()
+
+async def serve(host, port, session_ttl=SESSION_TTL):
+    server, api = await start_server(host, port, session_ttl=session_ttl)
+    addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving SAT ELA questions on {addresses}")
+    try:
+        await server.serve_forever()
+    finally:
+        await stop_server(server, api)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve SAT ELA practice sessions over HTTP.")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8000)
+    arg_parser.add_argument('--session-ttl', type=float, default=SESSION_TTL,
+                            help=f"Seconds a session may go without an answer before it expires (default {SESSION_TTL}).")
+    args = arg_parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.session_ttl))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
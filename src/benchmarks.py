@@ -0,0 +1,236 @@
+# satELA/src/benchmarks.py
+#
+# Offline benchmark suite for the parsing and loading pipeline. Runs against the
+# committed debug text (extracted_full_text_for_debugging.txt) and question bank
+# (data/processed_questions/ela_questions.json), so no PDF is needed.
+#
+#   python src/benchmarks.py                      # 1x, 10x and 100x corpora
+#   python src/benchmarks.py --scales 1 10 --repeats 9
+#   python src/benchmarks.py --compare data/benchmarks/<earlier run>.json
+#
+# Each stage is timed on its own over several runs (median and percentiles), then
+# run once more under tracemalloc for its peak memory. Larger corpora are built by
+# repeating the 1x corpus with rewritten question IDs. Results are written as JSON
+# so runs from different commits can be compared.
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.question_index import QuestionIndex
+from src.question_io import iter_questions_json, iter_questions_ndjson, write_questions_json, write_questions_ndjson
+from src.question_parser import QUESTION_ID_PATTERN, PARSER_ENGINES, clean_text, get_block_parser, split_question_blocks
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEATS = 5
+SESSION_SIZE = 10
+SELECTIONS_PER_RUN = 100
+
+def get_debug_text_file_path():
+    return os.path.join(project_root_dir, 'extracted_full_text_for_debugging.txt')
+
+def get_questions_file_path():
+    return os.path.join(project_root_dir, 'data', 'processed_questions', 'ela_questions.json')
+
+def get_benchmark_results_dir():
+    return os.path.join(project_root_dir, 'data', 'benchmarks')
+
+# --- Corpora ---
+
+def scale_text(text, scale):
+    """Repeats the document `scale` times, giving each copy its own question IDs."""
+    if scale == 1:
+        return text
+    return ''.join(QUESTION_ID_PATTERN.sub(lambda match: f"Question ID {match.group(2)}{copy:04x}", text)
+                   for copy in range(scale))
+
+def scale_questions(questions, scale):
+    if scale == 1:
+        return questions
+    return [dict(question, id=f"{question['id']}{copy:04x}") for copy in range(scale) for question in questions]
+
+# --- Measurement ---
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def measure(name, scale, function, runs, ops=1, track_memory=True):
+    """
+    Times `function` over `runs` calls, then runs it once under tracemalloc.
+
+    Args:
+        ops (int): Units of work per call (KB of text, blocks, questions, selections),
+            used to report the median time per unit.
+
+    Returns:
+        dict: One result row.
+    """
+    function() # Warm-up: compiled regexes, caches and lazy imports
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    peak_kib = None
+    if track_memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    median_ms = percentile(timings, 0.5)
+    return {
+        "name": name,
+        "scale": scale,
+        "runs": runs,
+        "ops": ops,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(median_ms, 3),
+        "p90_ms": round(percentile(timings, 0.9), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "max_ms": round(timings[-1], 3),
+        "median_us_per_op": round(median_ms * 1000 / ops, 3) if ops else None,
+        "peak_kib": round(peak_kib, 1) if peak_kib is not None else None,
+    }
+
+def print_result(result):
+    memory = f"{result['peak_kib']:10.0f} KiB" if result['peak_kib'] is not None else " " * 14
+    print(f"  {result['name']:<22} {result['scale']:>4}x  median {result['median_ms']:10.2f} ms"
+          f"  p95 {result['p95_ms']:10.2f} ms  {result['median_us_per_op']:10.2f} us/op  peak {memory}")
+
+def run_benchmarks(raw_text, questions, scales, repeats, engines, track_memory=True):
+    results = []
+    for scale in scales:
+        runs = max(1, round(repeats / scale ** 0.5)) # Fewer runs for the big corpora
+        text = scale_text(raw_text, scale)
+        scaled_questions = scale_questions(questions, scale)
+        print(f"\n--- {scale}x corpus: {len(text) / 1e6:.1f} MB of text, {len(scaled_questions)} questions, {runs} runs ---")
+
+        def record(name, function, ops=1):
+            result = measure(name, scale, function, runs, ops, track_memory)
+            print_result(result)
+            results.append(result)
+
+        record("clean_text", lambda: clean_text(text), ops=len(text) // 1000 or 1)
+        cleaned_text = clean_text(text)
+        record("split_question_blocks", lambda: split_question_blocks(cleaned_text), ops=len(cleaned_text) // 1000 or 1)
+        raw_question_blocks = split_question_blocks(cleaned_text)
+
+        for engine in engines:
+            parse_block = get_block_parser(engine)
+            record(f"parse_blocks[{engine}]",
+                   lambda: [parse_block(question_id, content) for question_id, content in raw_question_blocks],
+                   ops=len(raw_question_blocks))
+
+        json_text = json.dumps(scaled_questions, indent=2, ensure_ascii=False)
+        record("json_dump", lambda: json.dumps(scaled_questions, indent=2, ensure_ascii=False),
+               ops=len(scaled_questions))
+        record("write_questions_json", lambda: write_questions_json(iter(scaled_questions), _NullWriter()),
+               ops=len(scaled_questions))
+        record("json_load", lambda: json.loads(json_text), ops=len(scaled_questions))
+        record("json_stream_load", lambda: list(iter_questions_json(io.StringIO(json_text))), ops=len(scaled_questions))
+        record("write_questions_ndjson", lambda: write_questions_ndjson(iter(scaled_questions), _NullWriter()),
+               ops=len(scaled_questions))
+        ndjson_text = io.StringIO()
+        write_questions_ndjson(scaled_questions, ndjson_text)
+        ndjson_text = ndjson_text.getvalue()
+        record("ndjson_load", lambda: list(iter_questions_ndjson(io.StringIO(ndjson_text))), ops=len(scaled_questions))
+
+        record("index_build", lambda: QuestionIndex(scaled_questions), ops=len(scaled_questions))
+        question_index = QuestionIndex(scaled_questions)
+        rng = random.Random(0)
+        completed_ids = {question['id'] for question in rng.sample(scaled_questions, len(scaled_questions) // 4)}
+        difficulty = next(iter(question_index.values("difficulty")), None)
+
+        def select_sessions():
+            for i in range(SELECTIONS_PER_RUN):
+                # Alternate between an unfiltered and a filtered session, both skipping completed questions
+                question_index.sample(SESSION_SIZE, difficulty=difficulty if i % 2 else None,
+                                      exclude_ids=completed_ids, rng=rng)
+        record("select_session", select_sessions, ops=SELECTIONS_PER_RUN)
+    return results
+
+class _NullWriter:
+    # File-like sink so write_questions_json is timed without disk I/O
+    def write(self, text):
+        return len(text)
+
+# --- Reports ---
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(results, output_path):
+    report = {
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+def compare_results(results, baseline_path):
+    """Prints each benchmark's median next to the same benchmark in an earlier run."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    baseline_medians = {(row["name"], row["scale"]): row["median_ms"] for row in baseline["results"]}
+    print(f"\n--- Compared with {baseline.get('commit') or baseline_path} ({baseline.get('timestamp')}) ---")
+    for result in results:
+        before = baseline_medians.get((result["name"], result["scale"]))
+        if not before:
+            continue
+        ratio = result["median_ms"] / before
+        print(f"  {result['name']:<22} {result['scale']:>4}x  {before:10.2f} ms -> {result['median_ms']:10.2f} ms"
+              f"  ({ratio:5.2f}x{' slower' if ratio > 1.1 else ' faster' if ratio < 0.9 else ''})")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark cleaning, splitting, parsing, JSON I/O and session selection.")
+    arg_parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                            help="Corpus sizes as multiples of the real question bank (default: 1 10 100).")
+    arg_parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                            help="Timed runs at 1x; larger corpora use proportionally fewer.")
+    arg_parser.add_argument('--engines', nargs='+', choices=sorted(PARSER_ENGINES), default=sorted(PARSER_ENGINES),
+                            help="Block parser engines to benchmark.")
+    arg_parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory runs.")
+    arg_parser.add_argument('--output', help="Results file (default: data/benchmarks/<timestamp>.json).")
+    arg_parser.add_argument('--compare', metavar='RESULTS_JSON', help="Earlier results file to compare against.")
+    args = arg_parser.parse_args()
+
+    with open(get_debug_text_file_path(), 'r', encoding='utf-8') as f:
+        raw_text = f.read()
+    with open(get_questions_file_path(), 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+
+    results = run_benchmarks(raw_text, questions, args.scales, args.repeats, args.engines,
+                             track_memory=not args.no_memory)
+    output_path = args.output or os.path.join(get_benchmark_results_dir(), time.strftime("%Y%m%d-%H%M%S") + '.json')
+    write_results(results, output_path)
+    if args.compare:
+        compare_results(results, args.compare)
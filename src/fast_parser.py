@@ -0,0 +1,211 @@
+# satELA/src/fast_parser.py
+#
+# Single-pass question block parser. Produces the same result as
+# question_parser.parse_question_block, but compiles every pattern once at import
+# time and walks each block's section markers a single time instead of running
+# several searches/splits over it.
+
+import re
+
+from src.instrumentation import span
+
+# Prompts that end the question text; they are stripped from question_text.
+ELA_PROMPTS_RAW = [
+    r'Which choice most logically completes the text\??',
+    r'Which quotation from .*? most effectively illustrates the claim\??',
+    r'Which choice best states the main idea of the text\??',
+    r'Which choice best describes data from the graph that support .*? conclusion\??',
+    r'Which choice most effectively uses data from the graph to complete the .*?\??',
+    r'Which finding, if true, would most directly support .*? claim\??',
+    r'Which statement, if true, would most strongly support the claim in the underlined sentence\??',
+    r'According to the text, .*?\??',
+    r'Based on the text, .*?\??',
+    r'Which choice best describes the function of the underlined (portion|sentence) in the text as a whole\??',
+    r'Which choice best describes a difference in how the authors of Text 1 and Text 2 view .*?\??',
+    r'Which choice best describes a similarity in how the authors of Text 1 and Text 2 view .*?\??',
+    r'Based on the texts, how would the author of Text 2 most likely respond to the (underlined claim|assertion|assessment) .*?\??',
+    r'Which question does the text most directly attempt to answer\??',
+    r'What does the text most strongly suggest about .*?\??',
+    r'Which choice best describes the overall structure of the text\??',
+    r'Which choice completes the text with the most logical and precise word or phrase\??',
+    r'As used in the text, what does the word ‚Äú.*?‚Äù most nearly mean\??',
+    r'Which choice completes the text so that it conforms to the conventions of Standard English\??',
+    r'Which choice best describes data from the graph that (support|illustrate) .*? conclusion\??',
+    r'Which choice most effectively uses relevant information from the notes to accomplish this goal\??',
+    r'Which choice most effectively uses relevant information from the notes to (introduce|emphasize) .*?\??',
+    r'Which choice completes the text with the most logical transition\??',
+    r'Which choice best describes data from the table that support .*? conclusion\??',
+    r'Which choice best states the main idea of the passage\??',
+    r'Which choice provides the best evidence for the answer to the previous question\??',
+    r'Which choice offers an accurate interpretation of the data in the graph\??',
+    r'Which choice best describes the primary purpose of the text\??',
+    r'Which choice most strongly supports the claim that .*?\??',
+    r'Which choice provides the best evidence for the answer to the previous question\??', # Appears frequently
+    r'Which choice most effectively uses information from the notes to accomplish this goal\??',
+    r'The primary purpose of the text is to', # Common phrase ending a question
+    r'Which choice completes the text with the most logical and precise word or phrase\?',
+]
+
+METADATA_PATTERN = re.compile(
+    r'Assessment\s*\n([^\n]+)\s*\n+'  # Assessment (Group 1)
+    r'Test\s*\n([^\n]+)\s*\n+'       # Test (Group 2)
+    r'Domain\s*\n([^\n]+(?:(?:\s*and\s*|\s*)\n[^\n]+)?)\s*\n+' # Domain (Group 3)
+    r'Skill\s*\n([^\n]+)\s*\n+'      # Skill (Group 4)
+    r'Difficulty\s*\n([^\n]+)\s*\n+',   # Difficulty (Group 5)
+    re.DOTALL
+)
+
+# Same as r'^ID:...' with re.MULTILINE, but starting with the literal "ID:" lets the regex
+# engine jump between occurrences of it; the lookbehind then checks for a line start.
+ID_ANSWER_LINE_PATTERN = re.compile(r'ID:(?<![^\n]ID:)\s*[0-9a-fA-F]{8,}\s*Answer\s*\n*')
+
+# Choice markers ("A." .. "D.", group 2 set) and the "Correct Answer:" marker (group 2 unset)
+# in one pattern. Starting every alternative with the [A-D] class lets the regex engine
+# skip ahead to candidate characters instead of trying each alternative at every position.
+SECTION_MARKER_PATTERN = re.compile(r'([A-D])(?:(\.)\s*|(?<=C)orrect Answer:)')
+
+ANSWER_RATIONALE_PATTERN = re.compile(
+    r'Correct Answer:\s*([A-D])\s*\n+' # Group 1: Correct Answer letter
+    r'(?:Rationale\s*\n+(.*?))?' # Optional Group 2: Explanation
+    r'(?:\s*Question Difficulty:\s*(Hard|Medium|Easy))?', # Optional Group 3: Final Difficulty
+    re.DOTALL
+)
+
+# Matches a prompt running from a line start to the end of the question text.
+PROMPT_TAIL_PATTERN = re.compile(r'(?:' + '|'.join(ELA_PROMPTS_RAW) + r')\s*', re.DOTALL | re.IGNORECASE)
+
+_REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+def _literal_prefix(pattern):
+    # The leading part of a prompt pattern that contains no regex syntax
+    for i, char in enumerate(pattern):
+        if char in _REGEX_METACHARACTERS:
+            return pattern[:i]
+    return pattern
+
+def _build_prompt_trie(patterns):
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in _literal_prefix(pattern).lower():
+            node = node.setdefault(char, {})
+        node[None] = True # A complete literal prefix ends here
+    return trie
+
+def _trie_to_regex(node):
+    # Turns the trie into a regex in which shared prefixes appear only once, e.g.
+    # "which (?:choice (?:most|best)|question)", so a candidate line is accepted or
+    # rejected in a single left-to-right walk without backtracking over alternatives.
+    if None in node:
+        return '' # Any completed prefix is enough to make the line a candidate
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items())]
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+PROMPT_PREFIX_TRIE = _build_prompt_trie(ELA_PROMPTS_RAW)
+
+# Candidate prompt starts: a line (the whitespace before it contains a newline) that
+# begins with the literal prefix of at least one prompt.
+PROMPT_LINE_START_PATTERN = re.compile(r'\n\s*(?=' + _trie_to_regex(PROMPT_PREFIX_TRIE) + ')', re.IGNORECASE)
+
+def strip_trailing_prompt(question_text_raw):
+    """
+    Removes a known question prompt (and everything after it) from the end of the
+    question text.
+
+    Only lines starting with a prompt's literal prefix are checked against the full
+    prompt patterns, so the text is not re-scanned by every alternative at every
+    newline.
+    """
+    for line_start in PROMPT_LINE_START_PATTERN.finditer(question_text_raw):
+        if PROMPT_TAIL_PATTERN.fullmatch(question_text_raw, line_start.end()):
+            return question_text_raw[:line_start.start()].strip()
+    return question_text_raw
+
+def _append_choice_text(choices, choice_key, text):
+    text = text.strip()
+    if text:
+        choices[choice_key] += (" " if choices[choice_key] else "") + text
+
+def parse_question_block_fast(question_id, raw_block_content):
+    """
+    Parses the content that follows one "Question ID <id>" marker.
+
+    Drop-in replacement for question_parser.parse_question_block: returns the same
+    dict for every block.
+    """
+    assessment = "N/A"
+    test = "N/A"
+    domain = "N/A"
+    skill = "N/A"
+    difficulty = "N/A"
+    choices = {"A": "", "B": "", "C": "", "D": ""}
+    correct_answer_choice = "N/A"
+    explanation = ""
+
+    content = raw_block_content
+    with span("block.metadata"):
+        meta_match = METADATA_PATTERN.match(content)
+        if meta_match:
+            assessment = meta_match.group(1).strip()
+            test = meta_match.group(2).strip()
+            domain = meta_match.group(3).replace('\n', ' ').strip()
+            skill = meta_match.group(4).strip()
+            difficulty = meta_match.group(5).strip()
+            content = content[meta_match.end():].strip()
+
+        content = ID_ANSWER_LINE_PATTERN.sub('', content, 1).strip()
+
+    # One pass over the section markers: the first marker of any kind ends the
+    # question text, choices begin at the first choice marker, and the first
+    # "Correct Answer:" after that starts the answer/rationale section.
+    with span("block.choices"):
+        question_text_end = len(content)
+        first_marker_seen = False
+        current_choice_key = None
+        choice_text_start = 0
+        answer_section_start = None
+        for marker in SECTION_MARKER_PATTERN.finditer(content):
+            if not first_marker_seen:
+                question_text_end = marker.start()
+                first_marker_seen = True
+            choice_letter = marker.group(1) if marker.group(2) else None
+            if current_choice_key is None:
+                if choice_letter is None:
+                    continue # "Correct Answer:" before any choice is ignored
+            else:
+                _append_choice_text(choices, current_choice_key, content[choice_text_start:marker.start()])
+            if choice_letter is None:
+                answer_section_start = marker.start()
+                break
+            current_choice_key = choice_letter
+            choice_text_start = marker.end()
+        else:
+            if current_choice_key is not None:
+                _append_choice_text(choices, current_choice_key, content[choice_text_start:])
+
+    with span("block.prompt_strip"):
+        question_text = strip_trailing_prompt(content[:question_text_end].strip())
+
+    if answer_section_start is not None:
+        with span("block.rationale"):
+            ar_match = ANSWER_RATIONALE_PATTERN.search(content, answer_section_start)
+            if ar_match:
+                correct_answer_choice = ar_match.group(1)
+                explanation = (ar_match.group(2) or '').strip()
+                if ar_match.group(3): # If difficulty found at end of rationale
+                    difficulty = ar_match.group(3)
+
+    return {
+        "id": question_id,
+        "assessment": assessment,
+        "test": test,
+        "domain": domain,
+        "skill": skill,
+        "difficulty": difficulty,
+        "question_text": question_text,
+        "choices": choices,
+        "correct_answer": correct_answer_choice,
+        "explanation": explanation
+    }
@@ -0,0 +1,212 @@
+# satELA/src/instrumentation.py
+#
+# Opt-in instrumentation for the parse pipeline: named spans with duration
+# histograms, plus counters. Disabled by default; a disabled span() returns a shared
+# no-op context manager, so instrumented code pays one function call per span.
+#
+# Span names are dotted stage paths ("block.choices" is part of "block"). The
+# nesting comes from the name rather than a runtime call stack, because the
+# streaming pipeline's generators interleave their stages.
+#
+#   instrumentation.enable()
+#   with instrumentation.span("clean"):
+#       ...
+#   instrumentation.count("questions.skipped")
+#   instrumentation.write_profile("parse_profile.json")   # or .folded for flamegraph tools
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+_enabled = False
+_spans = {}    # name -> {"count", "total_ns", "min_ns", "max_ns", "histogram": {bucket: count}}
+_counters = {}
+
+# Histogram bucket b holds durations in [2**(b-1), 2**b) microseconds; bucket 0 is under 1 us.
+def _bucket_upper_bound_us(bucket):
+    return 1 << bucket if bucket else 1
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record_duration(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    _spans.clear()
+    _counters.clear()
+
+def span(name):
+    """Context manager timing one execution of the named stage (a no-op when disabled)."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+def record_duration(name, duration_ns):
+    """Adds an externally measured duration to the named stage."""
+    if not _enabled:
+        return
+    stats = _spans.get(name)
+    if stats is None:
+        stats = _spans[name] = {"count": 0, "total_ns": 0, "min_ns": duration_ns, "max_ns": duration_ns,
+                                "histogram": {}}
+    stats["count"] += 1
+    stats["total_ns"] += duration_ns
+    if duration_ns < stats["min_ns"]:
+        stats["min_ns"] = duration_ns
+    if duration_ns > stats["max_ns"]:
+        stats["max_ns"] = duration_ns
+    bucket = (duration_ns // 1000).bit_length()
+    histogram = stats["histogram"]
+    histogram[bucket] = histogram.get(bucket, 0) + 1
+
+def count(name, amount=1):
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+# --- Collecting across processes ---
+
+def snapshot():
+    """Returns a picklable copy of the raw measurements (e.g. to send from a worker process)."""
+    return {
+        "spans": {name: dict(stats, histogram=dict(stats["histogram"])) for name, stats in _spans.items()},
+        "counters": dict(_counters),
+    }
+
+def merge(other_snapshot):
+    """Adds measurements taken elsewhere (see snapshot) to this process's totals."""
+    if not _enabled or not other_snapshot:
+        return
+    for name, other in other_snapshot["spans"].items():
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = dict(other, histogram=dict(other["histogram"]))
+            continue
+        stats["count"] += other["count"]
+        stats["total_ns"] += other["total_ns"]
+        stats["min_ns"] = min(stats["min_ns"], other["min_ns"])
+        stats["max_ns"] = max(stats["max_ns"], other["max_ns"])
+        for bucket, bucket_count in other["histogram"].items():
+            stats["histogram"][bucket] = stats["histogram"].get(bucket, 0) + bucket_count
+    for name, amount in other_snapshot["counters"].items():
+        _counters[name] = _counters.get(name, 0) + amount
+
+# --- Reports ---
+
+def _histogram_percentile_us(histogram, total_count, fraction):
+    # Upper bound of the bucket holding the requested rank
+    wanted = fraction * total_count
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= wanted:
+            return _bucket_upper_bound_us(bucket)
+    return 0
+
+def _self_time_ns(name):
+    # Total time minus the time of the direct child stages ("name.child")
+    prefix = name + '.'
+    children_ns = sum(stats["total_ns"] for child, stats in _spans.items()
+                      if child.startswith(prefix) and '.' not in child[len(prefix):])
+    return max(0, _spans[name]["total_ns"] - children_ns)
+
+def report():
+    """Returns the measurements as a JSON-serializable dict with summary statistics per span."""
+    spans = {}
+    for name in sorted(_spans):
+        stats = _spans[name]
+        spans[name] = {
+            "count": stats["count"],
+            "total_ms": round(stats["total_ns"] / 1e6, 3),
+            "self_ms": round(_self_time_ns(name) / 1e6, 3),
+            "mean_us": round(stats["total_ns"] / stats["count"] / 1000, 3),
+            "min_us": round(stats["min_ns"] / 1000, 3),
+            "max_us": round(stats["max_ns"] / 1000, 3),
+            "p50_us_upper": _histogram_percentile_us(stats["histogram"], stats["count"], 0.50),
+            "p95_us_upper": _histogram_percentile_us(stats["histogram"], stats["count"], 0.95),
+            "p99_us_upper": _histogram_percentile_us(stats["histogram"], stats["count"], 0.99),
+            "histogram_us": {f"<{_bucket_upper_bound_us(bucket)}": bucket_count
+                             for bucket, bucket_count in sorted(stats["histogram"].items())},
+        }
+    return {"spans": spans, "counters": dict(sorted(_counters.items()))}
+
+def collapsed_stacks():
+    """
+    Returns the spans in collapsed-stack format ("stage;substage <self microseconds>"
+    per line), as read by flamegraph.pl, speedscope and inferno.
+    """
+    lines = []
+    for name in sorted(_spans):
+        self_us = _self_time_ns(name) // 1000
+        if self_us:
+            lines.append(f"{name.replace('.', ';')} {self_us}")
+    return '\n'.join(lines) + '\n'
+
+def write_profile(path):
+    """Writes the measurements to `path`: collapsed stacks for .folded/.txt files, JSON otherwise."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith(('.folded', '.txt')):
+            f.write(collapsed_stacks())
+        else:
+            json.dump(report(), f, indent=2)
+    print(f"Instrumentation profile written to {path}")
+
+def print_summary():
+    data = report()
+    if not data["spans"] and not data["counters"]:
+        return
+    print("\n--- Instrumentation Summary ---")
+    for name, stats in data["spans"].items():
+        print(f"  {name:<22} n={stats['count']:<7} total {stats['total_ms']:10.2f} ms  self {stats['self_ms']:10.2f} ms"
+              f"  mean {stats['mean_us']:9.2f} us  p95 <{stats['p95_us_upper']} us  max {stats['max_us']:.0f} us")
+    for name, amount in data["counters"].items():
+        print(f"  {name:<22} {amount}")
+
+@contextmanager
+def cprofiled(path):
+    """Runs the body under cProfile and dumps the stats to `path` (no-op if path is None)."""
+    if path is None:
+        yield
+        return
+    import cProfile # Only needed when profiling
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"cProfile stats written to {path} (view with `python -m pstats` or snakeviz)")
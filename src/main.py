@@ -1,7 +1,8 @@
 import os
-import json
-import random
+import struct
 import sys 
+import time
+import argparse
 
 current_file_dir = os.path.dirname(os.path.abspath(__file__))
 project_root_dir = os.path.dirname(current_file_dir) 
@@ -9,26 +10,79 @@ project_root_dir = os.path.dirname(current_file_dir)
 if project_root_dir not in sys.path:
     sys.path.insert(0, project_root_dir)
 
-from src.pdf_scraper import extract_text_from_pdf 
-from src.question_parser import parse_ela_questions 
-from src.user_progress import load_completed_questions, save_completed_questions 
+from src import instrumentation
+from src.question_io import load_questions, write_questions
+from src.question_store import QuestionStore, get_question_store_file_path, write_question_store
+from src.question_index import QuestionIndex
+from src.search_index import SearchIndex, refresh_search_index
+from src.near_duplicates import (cluster_lookup, load_near_duplicate_clusters, refresh_near_duplicates,
+                                 sample_distinct_questions)
+from src.review_scheduler import ReviewScheduler
+from src.user_progress import (iter_attempts, load_completed_questions, load_uncompleted_question_ids, record_attempt,
+                               register_question_ids, save_completed_questions)
 
 
+# Supported exports of the question bank; question_parser.py --output picks one
+PROCESSED_QUESTIONS_FILE_NAMES = ('ela_questions.json', 'ela_questions.ndjson', 'ela_questions.ndjson.gz',
+                                  'ela_questions.ndjson.zst')
+
 def get_ela_questions_file_path():
+    # The most recently written export, or ela_questions.json if there is none yet
     current_dir = os.path.dirname(os.path.abspath(__file__)) # Ensure absolute path
-    file_path = os.path.join(current_dir, '..', 'data', 'processed_questions', 'ela_questions.json')
-    return os.path.abspath(file_path)
+    processed_dir = os.path.abspath(os.path.join(current_dir, '..', 'data', 'processed_questions'))
+    existing_paths = [os.path.join(processed_dir, file_name) for file_name in PROCESSED_QUESTIONS_FILE_NAMES
+                      if os.path.exists(os.path.join(processed_dir, file_name))]
+    if not existing_paths:
+        return os.path.join(processed_dir, PROCESSED_QUESTIONS_FILE_NAMES[0])
+    return max(existing_paths, key=os.path.getmtime)
+
+def question_store_is_current(store_path, processed_questions_path):
+    # The binary store is derived from the JSON export; rebuild it if the JSON is newer
+    if not os.path.exists(store_path):
+        return False
+    if not os.path.exists(processed_questions_path):
+        return True
+    return os.path.getmtime(store_path) >= os.path.getmtime(processed_questions_path)
+
+def refresh_question_store(all_questions, store_path):
+    try:
+        write_question_store(all_questions, store_path)
+    except (IOError, ValueError) as e:
+        print(f"Warning: Could not write the binary question store to {store_path}: {e}")
 
-def ensure_questions_parsed():
+def open_question_store(store_path):
+    # None if the store was written in an older format or is damaged (e.g. truncated);
+    # it is then rebuilt from the export
+    try:
+        return QuestionStore(store_path)
+    except (ValueError, struct.error, OSError) as e:
+        print(f"Warning: cannot use the question store {store_path} ({e}). Rebuilding it.")
+        return None
+
+def ensure_questions_parsed(reparse=False):
     processed_questions_path = get_ela_questions_file_path()
-    
-    if os.path.exists(processed_questions_path):
+    store_path = get_question_store_file_path()
+    stored_questions = None
+    if not reparse and question_store_is_current(store_path, processed_questions_path):
+        stored_questions = open_question_store(store_path)
+
+    if stored_questions is not None:
+        # Only the index is decoded here; question text is read when a question is shown
+        print("Loading pre-parsed questions...")
+        all_questions = stored_questions
+        print(f"Loaded {len(all_questions)} questions.")
+    elif os.path.exists(processed_questions_path) and not reparse:
         print("Loading pre-parsed questions...")
-        with open(processed_questions_path, 'r', encoding='utf-8') as f:
-            all_questions = json.load(f)
+        all_questions = load_questions(processed_questions_path)
         print(f"Loaded {len(all_questions)} questions.")
+        # The export is newer than the store (e.g. written by question_parser.py)
+        refresh_question_store(all_questions, store_path)
+        refresh_search_index(all_questions)
     else:
-        print("Pre-parsed questions not found. Starting PDF scraping and parsing...")
+        if reparse:
+            print("Re-parsing questions from the PDF...")
+        else:
+            print("Pre-parsed questions not found. Starting PDF scraping and parsing...")
         current_dir = os.path.dirname(os.path.abspath(__file__)) # Ensure absolute path
         pdf_file_path = os.path.join(current_dir, '..', 'data', 'raw_pdfs', 'SAT Suite Question Bank ELA - Results.pdf')
         pdf_file_path = os.path.abspath(pdf_file_path)
@@ -37,74 +91,197 @@ def ensure_questions_parsed():
             print(f"Error: Raw PDF not found at {pdf_file_path}. Please place 'SAT Suite Question Bank ELA - Results.pdf' in the raw_pdfs folder.")
             return []
 
-        full_text = extract_text_from_pdf(pdf_file_path)
-        if not full_text:
-            print("Failed to extract text from PDF. Cannot parse questions.")
+        # The extraction and parsing stack (pdfminer above all) is only imported for a
+        # cold parse, so a warm start never pays for it.
+        from src.pdf_scraper import iter_text_from_pdf
+        from src.question_parser import PARSER_VERSION, iter_ela_questions
+        from src.parse_cache import ParseCache
+
+        text_chunks = iter_text_from_pdf(pdf_file_path, workers=os.cpu_count())
+
+        def keep(questions):
+            for question in questions:
+                all_questions.append(question)
+                yield question
+
+        # Stream questions to disk as they are parsed; write_questions only replaces
+        # the processed questions file once parsing has finished.
+        all_questions = []
+        # Blocks whose text is unchanged since the last parse come from the cache
+        parse_cache = ParseCache(PARSER_VERSION)
+        try:
+            write_questions(keep(iter_ela_questions(text_chunks, workers=os.cpu_count(), cache=parse_cache)),
+                            processed_questions_path)
+        except Exception as e:
+            print(f"Failed to extract or parse the questions from the PDF: {e}")
+            if os.path.exists(processed_questions_path):
+                print(f"{processed_questions_path} was left unchanged.")
+            return []
+
+        if not all_questions:
+            print("Failed to extract or parse any questions from the PDF.")
             return []
 
-        all_questions = parse_ela_questions(full_text)
-        
-        os.makedirs(os.path.dirname(processed_questions_path), exist_ok=True)
-        with open(processed_questions_path, 'w', encoding='utf-8') as f:
-            json.dump(all_questions, f, indent=2, ensure_ascii=False)
         print(f"Parsed {len(all_questions)} questions and saved to {processed_questions_path}")
+        refresh_question_store(all_questions, store_path)
+        # Only questions whose text changed are re-indexed
+        refresh_search_index(all_questions)
+        refresh_near_duplicates(all_questions)
 
     return all_questions
 
-def run_ela_test():
+def search_questions(query, limit=10):
+    """Prints the questions that best match `query` (BM25 over question text and rationales)."""
     all_questions = ensure_questions_parsed()
     if not all_questions:
-        print("No questions available to run the test.")
-        return
+        print("No questions available to search.")
+        return []
+    # The index is updated whenever the bank is (re-)loaded from an export, so here it
+    # is only built if it has never been saved
+    search_index = SearchIndex.load()
+    if not len(search_index):
+        search_index = refresh_search_index(all_questions)
+    questions_by_id = {question['id']: question for question in all_questions}
 
-    completed_question_ids = set(load_completed_questions())
-    
-    available_questions = [q for q in all_questions if q['id'] not in completed_question_ids]
+    start_time = time.perf_counter()
+    results = search_index.search(query, limit)
+    search_time = time.perf_counter() - start_time
+
+    print(f"\n{len(results)} results for '{query}' ({search_time * 1000:.2f} ms):")
+    for rank, (question_id, score) in enumerate(results, start=1):
+        question = questions_by_id[question_id]
+        snippet = ' '.join(question['question_text'].split())[:100]
+        print(f"{rank:>3}. [{question_id}] {question['skill']} ({question['difficulty']}) score {score:.2f}")
+        print(f"     {snippet}...")
+    return results
+
+def load_review_scheduler(all_questions, user=None):
+    # Saved review state is brought up to date with the attempts recorded since it was
+    # saved (e.g. through the API); the first time it is rebuilt from the whole history
+    questions_by_id = {question['id']: question for question in all_questions}
+    history = ((attempt, questions_by_id[attempt['id']])
+               for attempt in iter_attempts(user=user) if attempt['id'] in questions_by_id)
+    return ReviewScheduler.load(user, history=history)
 
-    if not available_questions:
-        print("Congratulations! You have completed all available questions.")
+def show_stats(user=None, all_users=False):
+    """Prints accuracy, timing and coverage by domain, skill, difficulty and day."""
+    all_questions = ensure_questions_parsed()
+    if not all_questions:
+        print("No questions available.")
         return
+    from src import analytics # NumPy is only loaded for the report
+    attempt_table, question_table = analytics.load_attempt_table(all_questions, user, all_users)
+    analytics.print_report(analytics.summarize(attempt_table, question_table))
 
-    print(f"\nWelcome to the SAT ELA Test Practice!")
-    print(f"You have {len(available_questions)} uncompleted questions available.")
+def ask_question(question, number, total):
+    """Shows one question and reads the answer; returns (answer, seconds taken)."""
+    question_start_time = time.time()
+    print(f"\nQuestion {number} of {total} (ID: {question['id']})")
+    print(f"Domain: {question['domain']} | Skill: {question['skill']} | Difficulty: {question['difficulty']}")
+    print("\n" + question['question_text'])
+    for choice_key, choice_text in question['choices'].items():
+        print(f"{choice_key}. {choice_text}")
+    
+    user_answer = input("Your answer (A, B, C, D): ").strip().upper()
+    
+    while user_answer not in ['A', 'B', 'C', 'D']:
+        print("Invalid choice. Please enter A, B, C, or D.")
+        user_answer = input("Your answer (A, B, C, D): ").strip().upper()
+    elapsed_seconds = time.time() - question_start_time
+        
+    print(f"\nYour answer: {user_answer}")
+    print(f"Correct answer: {question['correct_answer']}")
+    
+    if user_answer == question['correct_answer']:
+        print("Result: Correct!")
+    else:
+        print("Result: Incorrect.")
+    return user_answer, elapsed_seconds
 
+def prompt_for_count(available_count, prompt):
     while True:
         try:
-            num_questions_str = input(f"How many questions do you want for this ELA test (1-{len(available_questions)})? ")
-            num_questions = int(num_questions_str)
-            if 1 <= num_questions <= len(available_questions):
-                break
-            else:
-                print(f"Please enter a number between 1 and {len(available_questions)}.")
+            count = int(input(f"{prompt} (1-{available_count})? "))
+            if 1 <= count <= available_count:
+                return count
+            print(f"Please enter a number between 1 and {available_count}.")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-    random.shuffle(available_questions)
-    session_questions = available_questions[:num_questions]
+def prompt_for_filter(question_index, field):
+    # Lets the user pick one value of an indexed field, or press Enter for any
+    values = list(question_index.values(field).items())
+    if len(values) <= 1:
+        return None
+    print(f"\nFilter by {field}:")
+    for i, (value, count) in enumerate(values, start=1):
+        print(f"  {i}. {value} ({count} questions)")
+    while True:
+        choice = input(f"Choose a {field} (1-{len(values)}), or press Enter for any: ").strip()
+        if not choice:
+            return None
+        if choice.isdigit() and 1 <= int(choice) <= len(values):
+            return values[int(choice) - 1][0]
+        print(f"Please enter a number between 1 and {len(values)}.")
+
+def run_ela_test(reparse=False, domain=None, skill=None, difficulty=None, choose_filters=False, user=None):
+    with instrumentation.span("load"):
+        all_questions = ensure_questions_parsed(reparse=reparse)
+    if not all_questions:
+        print("No questions available to run the test.")
+        return
+
+    question_index = QuestionIndex(all_questions)
+    filters = {"domain": domain, "skill": skill, "difficulty": difficulty}
+    for field, value in filters.items():
+        if value is not None:
+            resolved_value = question_index.resolve_value(field, value)
+            if resolved_value is None:
+                print(f"Unknown {field} '{value}'. Available: {', '.join(question_index.values(field))}")
+                return
+            filters[field] = resolved_value
+        elif choose_filters:
+            filters[field] = prompt_for_filter(question_index, field)
+
+    completed_question_ids = set()
+    uncompleted_question_ids = None
+    if user is None:
+        completed_question_ids = set(load_completed_questions())
+    else:
+        # The progress database works out which questions of the bank are left (an indexed anti-join)
+        register_question_ids(question_index.positions_by_id)
+        uncompleted_question_ids = load_uncompleted_question_ids(user)
+    within = None if uncompleted_question_ids is None else question_index.bitmap_for_ids(uncompleted_question_ids)
+
+    available_count = question_index.count(exclude_ids=completed_question_ids, within=within, **filters)
+
+    if not available_count:
+        if any(value is not None for value in filters.values()):
+            print("There are no uncompleted questions matching the selected filters.")
+        else:
+            print("Congratulations! You have completed all available questions.")
+        return
+
+    print(f"\nWelcome to the SAT ELA Test Practice!")
+    print(f"You have {available_count} uncompleted questions available.")
+
+    num_questions = prompt_for_count(available_count, "How many questions do you want for this ELA test")
+
+    # Never serve two near-identical passages in the same session
+    cluster_of = cluster_lookup(load_near_duplicate_clusters(all_questions))
+    session_questions = sample_distinct_questions(question_index, num_questions, cluster_of,
+                                                  exclude_ids=completed_question_ids, within=within, **filters)
     
     newly_completed_ids = []
+    review_scheduler = load_review_scheduler(all_questions, user)
     
     print("\n--- Starting Test ---")
     for i, question in enumerate(session_questions):
-        print(f"\nQuestion {i + 1} of {len(session_questions)} (ID: {question['id']})")
-        print(f"Domain: {question['domain']} | Skill: {question['skill']} | Difficulty: {question['difficulty']}")
-        print("\n" + question['question_text'])
-        for choice_key, choice_text in question['choices'].items():
-            print(f"{choice_key}. {choice_text}")
-        
-        user_answer = input("Your answer (A, B, C, D): ").strip().upper()
-        
-        while user_answer not in ['A', 'B', 'C', 'D']:
-            print("Invalid choice. Please enter A, B, C, or D.")
-            user_answer = input("Your answer (A, B, C, D): ").strip().upper()
-            
-        print(f"\nYour answer: {user_answer}")
-        print(f"Correct answer: {question['correct_answer']}")
-        
-        if user_answer == question['correct_answer']:
-            print("Result: Correct!")
-        else:
-            print("Result: Incorrect.")
+        user_answer, elapsed_seconds = ask_question(question, i + 1, len(session_questions))
+        correct = user_answer == question['correct_answer']
+        # Journal the attempt right away so a crash later in the session loses nothing
+        answered_at = record_attempt(question['id'], user_answer, correct, elapsed_seconds, user=user)
+        review_scheduler.record_answer(question, correct, elapsed_seconds, now=answered_at)
         
         # Removed explanation display
         # print("\nExplanation:")
@@ -115,13 +292,106 @@ def run_ela_test():
         if i < len(session_questions) - 1:
             input("\nPress Enter to continue to the next question...")
 
-    updated_completed_ids = list(completed_question_ids.union(set(newly_completed_ids)))
-    save_completed_questions(updated_completed_ids)
+    if user is None:
+        updated_completed_ids = list(completed_question_ids.union(set(newly_completed_ids)))
+        save_completed_questions(updated_completed_ids)
+        completed_count = len(updated_completed_ids)
+    else:
+        # record_attempt has already marked each answered question completed in the database
+        completed_count = question_index.size - question_index.count(within=within) + len(set(newly_completed_ids))
+    review_scheduler.save()
     
     print("\n--- Test Complete ---")
     print("Your progress has been saved.")
     print(f"You completed {len(newly_completed_ids)} questions in this session.")
-    print(f"Total questions completed: {len(updated_completed_ids)}.")
+    print(f"Total questions completed: {completed_count}.")
+    print("Run with --stats for your accuracy and time per question by domain, skill and difficulty.")
+
+def run_review_session(user=None):
+    """Spaced-repetition session: due reviews first, then new questions from the weakest skills."""
+    with instrumentation.span("load"):
+        all_questions = ensure_questions_parsed()
+    if not all_questions:
+        print("No questions available to review.")
+        return
+
+    question_index = QuestionIndex(all_questions)
+    review_scheduler = load_review_scheduler(all_questions, user)
+    due_count = review_scheduler.due_count()
+    new_count = question_index.count(exclude_ids=set(review_scheduler.states))
+    if not due_count and not new_count:
+        print("Nothing is due for review and there are no new questions left.")
+        return
+
+    print(f"\nWelcome to SAT ELA Review!")
+    print(f"{due_count} questions are due for review; {new_count} questions are new.")
+    weakest_skills = review_scheduler.weakest_skills(question_index.values("skill"))[:3]
+    print("Weakest skills: " + ", ".join(f"{skill} ({review_scheduler.skill_rating(skill):.0f})" for skill in weakest_skills))
+
+    num_questions = prompt_for_count(due_count + new_count, "How many questions do you want to review")
+    session = review_scheduler.select_session(question_index, num_questions)
+
+    print("\n--- Starting Review ---")
+    correct_count = 0
+    for i, (question, kind) in enumerate(session):
+        if kind == "review":
+            print(f"\n(Review: answered {review_scheduler.states[question['id']].attempts} times before)")
+        user_answer, elapsed_seconds = ask_question(question, i + 1, len(session))
+        correct = user_answer == question['correct_answer']
+        correct_count += correct
+        answered_at = record_attempt(question['id'], user_answer, correct, elapsed_seconds, user=user)
+        review_scheduler.record_answer(question, correct, elapsed_seconds, now=answered_at)
+        review_scheduler.save() # Saved after every answer so quitting midway keeps the schedule
+
+        if i < len(session) - 1:
+            input("\nPress Enter to continue to the next question...")
+
+    print("\n--- Review Complete ---")
+    print(f"You answered {correct_count} of {len(session)} questions correctly.")
+    print(f"{review_scheduler.due_count()} questions are due now; the rest are scheduled for later.")
 
 if __name__ == "__main__":
-    run_ela_test()
+    arg_parser = argparse.ArgumentParser(description="SAT ELA practice test.")
+    arg_parser.add_argument('--reparse', action='store_true',
+                            help="Re-extract and re-parse the question bank PDF (unchanged blocks come from the parse cache).")
+    arg_parser.add_argument('--user',
+                            help="Student name; progress is kept per user in user_data/progress.db. "
+                                 "Without it, the single-user progress files are used.")
+    arg_parser.add_argument('--domain', help="Only draw questions from this domain.")
+    arg_parser.add_argument('--skill', help="Only draw questions testing this skill.")
+    arg_parser.add_argument('--difficulty', help="Only draw questions of this difficulty (e.g. Easy, Medium, Hard).")
+    arg_parser.add_argument('--choose-filters', action='store_true',
+                            help="Interactively choose domain, skill and difficulty filters before the test.")
+    arg_parser.add_argument('--review', action='store_true',
+                            help="Spaced-repetition review: questions answered wrong come back, new questions "
+                                 "are drawn from your weakest skills.")
+    arg_parser.add_argument('--search', metavar='QUERY',
+                            help="Search question text and rationales instead of running a test.")
+    arg_parser.add_argument('--limit', type=int, default=10, help="Maximum number of search results.")
+    arg_parser.add_argument('--stats', action='store_true',
+                            help="Show accuracy, time per question and progress by domain, skill, difficulty "
+                                 "and day for --user (or the single-user history) instead of running a test.")
+    arg_parser.add_argument('--all-users', action='store_true',
+                            help="With --stats, report over every user in user_data/progress.db.")
+    arg_parser.add_argument('--profile', metavar='PATH',
+                            help="Record loading/parsing stage timings and write them to PATH on exit (JSON, "
+                                 "or collapsed stacks for flamegraph tools if PATH ends in .folded).")
+    arg_parser.add_argument('--cprofile', metavar='PATH', help="Run under cProfile and dump the stats to PATH on exit.")
+    args = arg_parser.parse_args()
+    if args.profile:
+        instrumentation.enable()
+    try:
+        with instrumentation.cprofiled(args.cprofile):
+            if args.stats:
+                show_stats(user=args.user, all_users=args.all_users)
+            elif args.search:
+                search_questions(args.search, args.limit)
+            elif args.review:
+                run_review_session(user=args.user)
+            else:
+                run_ela_test(reparse=args.reparse, domain=args.domain, skill=args.skill,
+                             difficulty=args.difficulty, choose_filters=args.choose_filters, user=args.user)
+    finally:
+        if args.profile:
+            instrumentation.print_summary()
+            instrumentation.write_profile(args.profile)
@@ -0,0 +1,331 @@
+# satELA/src/near_duplicates.py
+#
+# Near-duplicate detection for question passages with MinHash and LSH.
+#
+# Each question_text is reduced to its set of word 3-gram shingles and summarized
+# by a MinHash signature computed with one-permutation hashing: every shingle is
+# hashed once and the hash picks both a bin and the value competing for that bin's
+# minimum. Empty bins are filled by densification (copying a pseudo-randomly chosen
+# non-empty bin), so a signature costs O(shingles) rather than O(shingles * bins).
+# Signatures are split into bands; items sharing a band are candidates, candidates
+# whose estimated Jaccard similarity reaches the threshold are merged with
+# union-find. Everything is linear in the number of items, up to bucket sizes.
+#
+#   python src/near_duplicates.py                      # cluster the parsed question bank
+#   python src/near_duplicates.py --benchmark 10000 100000
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import zlib
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.question_store import bank_fingerprint
+
+# Signature length (bins); a power of two. Passages have 100-200 shingles, so 64 bins
+# leave few empty bins to densify while estimating similarity to about +-0.05.
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16      # 16 bands of 4 rows: pairs above ~0.5 similarity become candidates
+DEFAULT_THRESHOLD = 0.8 # Estimated Jaccard similarity at which two items are near-duplicates
+SHINGLE_SIZE = 3 # Words per shingle
+# Texts with fewer shingles than this are too short to call near-duplicates
+MIN_SHINGLES = 8
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+# Metadata header ("Assessment ... ID: <hex>") left at the start of question_text by
+# some PDF layouts; identical across questions, so it is not part of the passage.
+METADATA_HEADER_PATTERN = re.compile(r'\A.*?\bID:\s*[0-9a-fA-F]{8,}\s*', re.DOTALL)
+_MASK64 = (1 << 64) - 1
+_GOLDEN64 = 0x9E3779B97F4A7C15
+
+def get_near_duplicates_file_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(current_dir, '..', 'data', 'processed_questions', 'near_duplicates.json')
+    return os.path.abspath(file_path)
+
+def _mix64(x):
+    # splitmix64 finalizer: spreads every input bit over the whole 64-bit output
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+_word_hashes = {}
+
+def shingle_hashes(text):
+    """64-bit hashes of the word 3-grams of `text` (stable across runs)."""
+    words = WORD_PATTERN.findall(text.lower())
+    word_hashes = list(map(_word_hashes.get, words))
+    if None in word_hashes: # Words seen for the first time
+        for position, word in enumerate(words):
+            if word_hashes[position] is None:
+                word_hash = _word_hashes.get(word)
+                if word_hash is None:
+                    word_hash = _word_hashes[word] = _mix64(zlib.crc32(word.encode('utf-8')))
+                word_hashes[position] = word_hash
+    if len(word_hashes) < SHINGLE_SIZE:
+        return {_mix64(sum(word_hashes) + len(word_hashes))} if word_hashes else set()
+    # hash() of a tuple of ints is computed in C and, unlike str hashing, is not
+    # randomized per process, so shingle hashes are stable across runs.
+    return {hash(shingle) & _MASK64 for shingle in zip(word_hashes, word_hashes[1:], word_hashes[2:])}
+
+def passage_text(question):
+    """The part of a question's text that is compared for near-duplicates."""
+    return METADATA_HEADER_PATTERN.sub('', question['question_text'], 1)
+
+def _densification_order(num_perm):
+    # For each bin, the fixed sequence of bins to borrow from when it is empty; the
+    # same for every item, so borrowed values stay comparable between signatures.
+    rng = random.Random(num_perm)
+    return [[candidate for candidate in rng.sample(range(num_perm), num_perm) if candidate != bin_index]
+            for bin_index in range(num_perm)]
+
+_densification_orders = {}
+
+def minhash_signature(hashes, num_perm=DEFAULT_NUM_PERM):
+    """One-permutation MinHash signature of a set of 64-bit shingle hashes (None if empty)."""
+    if not hashes:
+        return None
+    bin_bits = num_perm.bit_length() - 1
+    bin_mask = num_perm - 1
+    signature = [None] * num_perm
+    # The low bits of a hash pick its bin and the rest is its value, so within a bin a
+    # smaller hash means a smaller value: writing in descending order leaves each bin's minimum.
+    for shingle_hash in sorted(hashes, reverse=True):
+        signature[shingle_hash & bin_mask] = shingle_hash >> bin_bits
+    if None in signature:
+        order = _densification_orders.get(num_perm)
+        if order is None:
+            order = _densification_orders[num_perm] = _densification_order(num_perm)
+        filled = list(signature)
+        for bin_index, value in enumerate(filled):
+            if value is None:
+                donor = next(candidate for candidate in order[bin_index] if signature[candidate] is not None)
+                # Offset by the bin so borrowed values do not collide with the donor's own bin
+                filled[bin_index] = (signature[donor] + bin_index * _GOLDEN64) & _MASK64
+        signature = filled
+    return signature
+
+def estimated_similarity(signature_a, signature_b):
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+class NearDuplicateDetector:
+    """
+    Streaming MinHash/LSH clustering: add() items one at a time, then read clusters().
+
+    Each new item is compared with every item in the LSH buckets it lands in, except
+    items already in its cluster; union-find takes care of transitivity.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, threshold=DEFAULT_THRESHOLD):
+        if num_perm & (num_perm - 1) or num_perm % bands:
+            raise ValueError("num_perm must be a power of two and a multiple of bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.item_ids = []
+        self.signatures = []
+        self._buckets = [{} for _ in range(bands)] # band -> {band values: [items]}
+        self._parents = []
+        self.comparisons = 0
+
+    def _find(self, item):
+        root = item
+        while self._parents[root] != root:
+            root = self._parents[root]
+        while self._parents[item] != root: # Path compression
+            self._parents[item], item = root, self._parents[item]
+        return root
+
+    def _union(self, item_a, item_b):
+        root_a, root_b = self._find(item_a), self._find(item_b)
+        if root_a != root_b:
+            self._parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    def add(self, item_id, text):
+        hashes = shingle_hashes(text)
+        signature = minhash_signature(hashes, self.num_perm) if len(hashes) >= MIN_SHINGLES else None
+        item = len(self.item_ids)
+        self.item_ids.append(item_id)
+        self.signatures.append(signature)
+        self._parents.append(item)
+        if signature is None:
+            return # Too short to compare
+        checked = set()
+        rows = self.rows
+        for band, buckets in enumerate(self._buckets):
+            key = tuple(signature[band * rows:(band + 1) * rows])
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [item]
+                continue
+            for member in bucket:
+                if member in checked:
+                    continue
+                checked.add(member)
+                if self._find(member) == self._find(item):
+                    continue # Already merged through another member
+                self.comparisons += 1
+                if estimated_similarity(signature, self.signatures[member]) >= self.threshold:
+                    self._union(item, member)
+            bucket.append(item)
+
+    def clusters(self):
+        """Groups of two or more near-duplicate item IDs, each in insertion order."""
+        groups = {}
+        for item in range(len(self.item_ids)):
+            groups.setdefault(self._find(item), []).append(self.item_ids[item])
+        return [group for group in groups.values() if len(group) > 1]
+
+def find_near_duplicate_clusters(questions, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, threshold=DEFAULT_THRESHOLD):
+    """Clusters questions whose question_text is nearly identical."""
+    detector = NearDuplicateDetector(num_perm, bands, threshold)
+    for question in questions:
+        detector.add(question['id'], passage_text(question))
+    return detector.clusters()
+
+# --- Persistence and session selection ---
+
+def refresh_near_duplicates(questions, path=None):
+    """Clusters the question bank and saves the clusters; returns them."""
+    path = path or get_near_duplicates_file_path()
+    start_time = time.time()
+    clusters = find_near_duplicate_clusters(questions)
+    report = {
+        "fingerprint": bank_fingerprint(questions),
+        "num_perm": DEFAULT_NUM_PERM,
+        "bands": DEFAULT_BANDS,
+        "threshold": DEFAULT_THRESHOLD,
+        "clusters": clusters,
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        os.replace(temp_path, path)
+    except IOError as e:
+        print(f"Warning: Could not save near-duplicate clusters to {path}: {e}")
+    duplicate_count = sum(len(cluster) for cluster in clusters)
+    print(f"Found {len(clusters)} near-duplicate clusters covering {duplicate_count} questions "
+          f"in {time.time() - start_time:.2f} seconds.")
+    return clusters
+
+def load_near_duplicate_clusters(questions, path=None):
+    """
+    Returns the saved clusters for this question bank, recomputing them if missing
+    or stale. For a QuestionStore the staleness check uses the fingerprint in the
+    store header, so no question text is decoded.
+    """
+    path = path or get_near_duplicates_file_path()
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            if report.get("fingerprint") == bank_fingerprint(questions) and report.get("threshold") == DEFAULT_THRESHOLD:
+                return report["clusters"]
+        except (json.JSONDecodeError, IOError, AttributeError) as e:
+            print(f"Error loading near-duplicate clusters from {path}: {e}. Recomputing them.")
+    return refresh_near_duplicates(questions, path)
+
+def cluster_lookup(clusters):
+    """Maps each clustered question ID to its cluster number."""
+    return {question_id: cluster_number for cluster_number, cluster in enumerate(clusters) for question_id in cluster}
+
+def sample_distinct_questions(question_index, n, cluster_of, exclude_ids=None, rng=random, **filters):
+    """
+    QuestionIndex.sample() that never returns two questions from the same
+    near-duplicate cluster.
+
+    Args:
+        question_index (QuestionIndex): Index to draw from.
+        cluster_of (dict): Question ID -> cluster number (see cluster_lookup).
+        filters: domain / skill / difficulty / within, as for QuestionIndex.sample.
+    """
+    excluded = set(exclude_ids or ())
+    selected = []
+    used_clusters = set()
+    while len(selected) < n:
+        candidates = question_index.sample(2 * (n - len(selected)), exclude_ids=excluded, rng=rng, **filters)
+        if not candidates:
+            break
+        for question in candidates:
+            excluded.add(question['id'])
+            cluster = cluster_of.get(question['id'])
+            if cluster is not None:
+                if cluster in used_clusters:
+                    continue
+                used_clusters.add(cluster)
+            selected.append(question)
+            if len(selected) == n:
+                break
+    return selected
+
+# --- Benchmark ---
+
+def make_synthetic_corpus(size, vocabulary, duplicate_fraction=0.1, edit_fraction=0.02, seed=0):
+    """
+    Random passages drawn from `vocabulary`; `duplicate_fraction` of them are copies
+    of an earlier passage with `edit_fraction` of their words replaced.
+
+    Returns:
+        tuple: (list of (item_id, text), list of planted (original_id, copy_id) pairs).
+    """
+    rng = random.Random(seed)
+    items = []
+    planted_pairs = []
+    for i in range(size):
+        item_id = f"{i:08x}"
+        if items and rng.random() < duplicate_fraction:
+            original_id, original_text = items[rng.randrange(len(items))]
+            words = original_text.split()
+            for position in rng.sample(range(len(words)), max(1, int(len(words) * edit_fraction))):
+                words[position] = rng.choice(vocabulary)
+            items.append((item_id, ' '.join(words)))
+            planted_pairs.append((original_id, item_id))
+        else:
+            items.append((item_id, ' '.join(rng.choices(vocabulary, k=rng.randint(80, 200)))))
+    return items, planted_pairs
+
+def run_benchmark(sizes):
+    from src.main import ensure_questions_parsed
+    vocabulary = sorted({word for question in ensure_questions_parsed()
+                         for word in WORD_PATTERN.findall(question['question_text'].lower())})
+    print(f"Vocabulary: {len(vocabulary)} words from the question bank.")
+    for size in sizes:
+        items, planted_pairs = make_synthetic_corpus(size, vocabulary)
+        detector = NearDuplicateDetector()
+        start_time = time.perf_counter()
+        for item_id, text in items:
+            detector.add(item_id, text)
+        clusters = detector.clusters()
+        elapsed = time.perf_counter() - start_time
+
+        cluster_of = cluster_lookup(clusters)
+        found = sum(1 for a, b in planted_pairs if a in cluster_of and cluster_of.get(a) == cluster_of.get(b))
+        print(f"\n{size} items: {elapsed:.2f} seconds ({elapsed / size * 1e6:.1f} us/item), "
+              f"{detector.comparisons} candidate comparisons, {len(clusters)} clusters.")
+        print(f"  Planted near-duplicate pairs recovered: {found}/{len(planted_pairs)}")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Find near-duplicate question passages with MinHash/LSH.")
+    arg_parser.add_argument('--benchmark', type=int, nargs='+', metavar='SIZE',
+                            help="Time clustering of synthetic corpora of these sizes instead.")
+    args = arg_parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+    else:
+        from src.main import ensure_questions_parsed
+        all_questions = ensure_questions_parsed()
+        clusters = refresh_near_duplicates(all_questions)
+        for cluster in sorted(clusters, key=len, reverse=True)[:20]:
+            print(f"  {len(cluster)} questions: {', '.join(cluster)}")
@@ -0,0 +1,96 @@
+# satELA/src/page_cache.py
+
+import hashlib
+import json
+import os
+import zlib
+
+# Bump when the stored page format or the page fingerprint changes
+PAGE_CACHE_FORMAT_VERSION = 1
+
+def get_page_cache_dir():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '..', 'data', 'cache', 'pages'))
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class PageCache:
+    """
+    Persistent cache of extracted PDF page text.
+
+    Each page's text is stored zlib-compressed under a key derived from the
+    extraction settings (pdfminer version and LAParams) and a fingerprint of the
+    page's own content, so a PDF that changed in a few places only has to re-extract
+    the pages that differ. A manifest per PDF file hash lists the page keys in
+    order, which lets an unchanged PDF be served without opening it in pdfminer.
+
+    Args:
+        settings (str): Description of everything besides the page content that
+            affects the extracted text.
+        path (str, optional): Cache directory; defaults to data/cache/pages.
+    """
+
+    def __init__(self, settings, path=None):
+        self.path = path or get_page_cache_dir()
+        self.settings_key = hashlib.sha256(f"{PAGE_CACHE_FORMAT_VERSION}\0{settings}".encode('utf-8')).hexdigest()[:16]
+
+    def page_key(self, page_fingerprint):
+        return hashlib.sha256(f"{self.settings_key}\0{page_fingerprint}".encode('utf-8')).hexdigest()
+
+    def _page_path(self, key):
+        # Two-character fan-out keeps directories small
+        return os.path.join(self.path, key[:2], key[2:] + '.txt.z')
+
+    def _manifest_path(self, pdf_file_hash):
+        return os.path.join(self.path, 'manifests', f"{pdf_file_hash}-{self.settings_key}.json")
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, key):
+        """Returns the cached text of a page, or None if it is missing or unreadable."""
+        page_path = self._page_path(key)
+        try:
+            with open(page_path, 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8')
+        except FileNotFoundError:
+            return None
+        except (IOError, zlib.error, UnicodeDecodeError) as e:
+            print(f"Warning: Ignoring unreadable page cache entry {page_path}: {e}")
+            return None
+
+    def put(self, key, text):
+        try:
+            self._write_atomic(self._page_path(key), zlib.compress(text.encode('utf-8'), 6))
+        except IOError as e:
+            print(f"Error saving page cache entry {key}: {e}")
+
+    def load_manifest(self, pdf_file_hash):
+        """Returns the page keys recorded for a PDF file, in page order, or None."""
+        manifest_path = self._manifest_path(pdf_file_hash)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                page_keys = json.load(f)["pages"]
+            return page_keys if isinstance(page_keys, list) else None
+        except (json.JSONDecodeError, IOError, KeyError, TypeError) as e:
+            print(f"Warning: Could not load page cache manifest {manifest_path}: {e}")
+            return None
+
+    def save_manifest(self, pdf_file_hash, page_keys):
+        try:
+            self._write_atomic(self._manifest_path(pdf_file_hash),
+                               json.dumps({"pages": list(page_keys)}).encode('utf-8'))
+        except IOError as e:
+            print(f"Error saving page cache manifest for {pdf_file_hash}: {e}")
@@ -0,0 +1,87 @@
+# satELA/src/parse_cache.py
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# Enough for several versions of the ~930-question bank to coexist.
+DEFAULT_MAX_ENTRIES = 5000
+
+def get_parse_cache_file_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(current_dir, '..', 'data', 'cache', 'parsed_blocks.json')
+    return os.path.abspath(file_path)
+
+class ParseCache:
+    """
+    Content-addressed cache of parsed question blocks.
+
+    Each entry is keyed by a hash of the parser version, the question ID and the raw
+    block text, so re-parsing a refreshed PDF only has to parse the blocks whose text
+    changed, and bumping the parser version invalidates every entry at once. Entries
+    are kept in least-recently-used order and the oldest are evicted once the cache
+    holds more than `max_entries`.
+    """
+
+    def __init__(self, parser_version, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.parser_version = str(parser_version)
+        self.path = path or get_parse_cache_file_path()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Stored oldest first, so the OrderedDict keeps LRU order
+            self.entries = OrderedDict(data.get("entries", []))
+        except (json.JSONDecodeError, IOError, AttributeError, TypeError, ValueError) as e:
+            print(f"Warning: Could not load parse cache from {self.path}: {e}. Starting with an empty cache.")
+            self.entries = OrderedDict()
+
+    def block_key(self, question_id, raw_block_content):
+        digest = hashlib.sha256()
+        for part in (self.parser_version, question_id, raw_block_content):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key):
+        question = self.entries.get(key)
+        if question is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return question
+
+    def put(self, key, question):
+        self.entries[key] = question
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"entries": list(self.entries.items())}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except IOError as e:
+            print(f"Error saving parse cache to {self.path}: {e}")
+
+    def print_summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = (100.0 * self.hits / lookups) if lookups else 0.0
+        print(f"\n--- Parse Cache Summary ---")
+        print(f"Hits: {self.hits}, Misses: {self.misses} ({hit_rate:.1f}% hit rate), Evictions: {self.evictions}")
+        print(f"Cache entries: {len(self.entries)}/{self.max_entries} ({self.path})")
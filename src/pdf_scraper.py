@@ -1,8 +1,21 @@
 # satELA/src/pdf_scraper.py
 
+import argparse
 import sys
 import os
+import hashlib
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+import pdfminer
 from pdfminer.high_level import extract_text as extract_text_pdfminer # Import pdfminer.six
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSKeyword, PSLiteral
 
 # Add the parent directory (satELA) to the Python path
 current_script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,12 +23,18 @@ project_root_dir = os.path.dirname(current_script_dir) # This is 'satELA'
 if project_root_dir not in sys.path:
     sys.path.insert(0, project_root_dir)
 
-def extract_text_from_pdf(pdf_path):
+from src.page_cache import PageCache, file_digest
+
+def extract_text_from_pdf(pdf_path, workers=None, use_cache=True):
     """
     Extracts text from a PDF file using pdfminer.six.
 
     Args:
         pdf_path (str): The full path to the PDF file.
+        workers (int, optional): If greater than 1, extract page shards
+            concurrently with extract_text_from_pdf_parallel.
+        use_cache (bool): Reuse page text from the page cache (data/cache/pages)
+            and store newly extracted pages in it.
 
     Returns:
         str: The extracted text from the PDF, or an empty string if an error occurs.
@@ -24,6 +43,14 @@ def extract_text_from_pdf(pdf_path):
     if not os.path.exists(pdf_path):
         print(f"Error: PDF file not found at {pdf_path}")
         return ""
+    if use_cache:
+        try:
+            return "".join(_iter_cached_page_texts(pdf_path, workers))
+        except Exception as e:
+            print(f"An error occurred while extracting text from {pdf_path} using pdfminer.six: {e}")
+            return ""
+    if workers and workers > 1:
+        return extract_text_from_pdf_parallel(pdf_path, workers=workers)
     try:
         # pdfminer.high_level.extract_text is a convenient function
         # It handles opening, parsing, and closing the PDF
@@ -33,13 +60,299 @@ def extract_text_from_pdf(pdf_path):
         print(f"An error occurred while extracting text from {pdf_path} using pdfminer.six: {e}")
         return ""
 
+def count_pdf_pages(pdf_path):
+    """
+    Counts the pages of a PDF without running layout analysis on them.
+
+    Args:
+        pdf_path (str): The full path to the PDF file.
+
+    Returns:
+        int: The number of pages in the document.
+    """
+    with open(pdf_path, 'rb') as fp:
+        return sum(1 for _ in PDFPage.get_pages(fp))
+
+def split_page_shards(num_pages, workers, pages_per_shard=None):
+    """
+    Splits the page range [0, num_pages) into contiguous (start, end) shards.
+
+    By default each worker gets about four shards, so a slow run of dense
+    pages does not leave the other processes idle at the end.
+    """
+    if num_pages <= 0:
+        return []
+    if not pages_per_shard:
+        pages_per_shard = max(1, math.ceil(num_pages / (max(1, workers) * 4)))
+    return [(start, min(start + pages_per_shard, num_pages))
+            for start in range(0, num_pages, pages_per_shard)]
+
+def _extract_page_shard(shard_args):
+    # Runs in a worker process; must stay a top-level function so it can be pickled.
+    pdf_path, first_page, end_page = shard_args
+    shard_start_time = time.time()
+    text = extract_text_pdfminer(pdf_path, page_numbers=range(first_page, end_page))
+    return first_page, end_page, text, time.time() - shard_start_time
+
+def _iter_parallel_shard_texts(pdf_path, workers, pages_per_shard=None):
+    # Yields the text of each page shard, in page order, as soon as it is available.
+    start_time = time.time()
+    num_pages = count_pdf_pages(pdf_path)
+    shards = split_page_shards(num_pages, workers, pages_per_shard)
+    print(f"Extracting {num_pages} pages in {len(shards)} shards with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shard_args = [(pdf_path, first_page, end_page) for first_page, end_page in shards]
+        # executor.map yields results in submission order, i.e. page order
+        for first_page, end_page, text, elapsed in executor.map(_extract_page_shard, shard_args):
+            print(f"  Pages {first_page + 1}-{end_page}: {elapsed:.2f} seconds.")
+            yield text
+
+    print(f"Parallel extraction complete in {time.time() - start_time:.2f} seconds.")
+
+def extract_text_from_pdf_parallel(pdf_path, workers=None, pages_per_shard=None):
+    """
+    Extracts text from a PDF by running pdfminer.six over page shards in a process pool.
+
+    pdfminer terminates every page with a form feed, so joining the shards in page
+    order gives exactly the same string as a single extract_text() call.
+
+    Args:
+        pdf_path (str): The full path to the PDF file.
+        workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+        pages_per_shard (int, optional): Pages handed to a worker at a time.
+
+    Returns:
+        str: The extracted text from the PDF, or an empty string if an error occurs.
+    """
+    if not os.path.exists(pdf_path):
+        print(f"Error: PDF file not found at {pdf_path}")
+        return ""
+    workers = workers or os.cpu_count() or 1
+    try:
+        return "".join(_iter_parallel_shard_texts(pdf_path, workers, pages_per_shard))
+    except Exception as e:
+        print(f"An error occurred while extracting text from {pdf_path} using pdfminer.six: {e}")
+        return ""
+
+def _iter_page_texts(pdf_path, page_numbers=None, laparams=None):
+    # Same pipeline as pdfminer.high_level.extract_text, but hands back each page's
+    # text (including its trailing form feed) as soon as the page is processed.
+    with open(pdf_path, 'rb') as fp, StringIO() as output_string:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TextConverter(rsrcmgr, output_string, codec='utf-8', laparams=laparams or LAParams())
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for page in PDFPage.get_pages(fp, pagenos=page_numbers, caching=True):
+            interpreter.process_page(page)
+            yield output_string.getvalue()
+            output_string.seek(0)
+            output_string.truncate(0)
+
+# --- Page cache ---
+
+def extraction_settings(laparams=None):
+    """Everything besides the page itself that affects a page's extracted text."""
+    laparams = laparams or LAParams()
+    return f"pdfminer.six {pdfminer.__version__}; LAParams {sorted(vars(laparams).items())}"
+
+def _feed_pdf_object(digest, obj, object_digests):
+    # Feeds a canonical serialization of a PDF object into `digest`. Object numbers
+    # are left out (they change whenever a PDF is regenerated); referenced objects
+    # contribute their own digest instead, computed once per document.
+    if isinstance(obj, PDFObjRef):
+        object_digest = object_digests.get(obj.objid)
+        if object_digest is None:
+            object_digests[obj.objid] = b'cycle' # Placeholder while this object is being digested
+            object_hash = hashlib.sha256()
+            _feed_pdf_object(object_hash, obj.resolve(), object_digests)
+            object_digest = object_digests[obj.objid] = object_hash.digest()
+        digest.update(b'R' + object_digest)
+    elif isinstance(obj, PDFStream):
+        data = obj.get_data() # Decoded data, so re-compressing a PDF does not change the fingerprint
+        digest.update(b'S')
+        _feed_pdf_object(digest, {key: value for key, value in obj.attrs.items()
+                                  if key not in ('Length', 'Filter', 'DecodeParms')}, object_digests)
+        digest.update(b'%d:' % len(data))
+        digest.update(data)
+    elif isinstance(obj, dict):
+        digest.update(b'<<')
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode('utf-8') + b' ')
+            _feed_pdf_object(digest, obj[key], object_digests)
+        digest.update(b'>>')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _feed_pdf_object(digest, item, object_digests)
+        digest.update(b']')
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        digest.update(b'/' + str(obj.name).encode('utf-8') + b' ')
+    else:
+        digest.update(repr(obj).encode('utf-8') + b' ')
+
+def page_fingerprint(page, object_digests=None):
+    """
+    Fingerprint of everything on a page that text extraction reads: its content
+    streams, the resources they use (fonts, XObjects) and its geometry.
+
+    Args:
+        page (PDFPage): The page.
+        object_digests (dict, optional): Shared between the pages of one document so
+            that fonts and other shared objects are only hashed once.
+
+    Returns:
+        str: A hex digest.
+    """
+    object_digests = {} if object_digests is None else object_digests
+    digest = hashlib.sha256()
+    for part in (page.contents, page.resources, page.mediabox, page.cropbox, page.rotate):
+        _feed_pdf_object(digest, part, object_digests)
+    return digest.hexdigest()
+
+def _page_fingerprints(pdf_path):
+    object_digests = {}
+    with open(pdf_path, 'rb') as fp:
+        return [page_fingerprint(page, object_digests) for page in PDFPage.get_pages(fp, caching=True)]
+
+def _extract_page_texts(shard_args):
+    # Runs in a worker process; returns the text of each requested page separately.
+    pdf_path, page_numbers, laparams = shard_args
+    shard_start_time = time.time()
+    texts = list(_iter_page_texts(pdf_path, page_numbers, laparams))
+    return page_numbers, texts, time.time() - shard_start_time
+
+def _iter_cached_serial_page_texts(pdf_path, page_cache, laparams):
+    # One pass over the document: each page is fingerprinted, then either read from
+    # the cache or processed. Returns the page keys once every page has been yielded.
+    page_keys = []
+    extracted_count = 0
+    with open(pdf_path, 'rb') as fp, StringIO() as output_string:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TextConverter(rsrcmgr, output_string, codec='utf-8', laparams=laparams)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        object_digests = {}
+        for page in PDFPage.get_pages(fp, caching=True):
+            key = page_cache.page_key(page_fingerprint(page, object_digests))
+            page_keys.append(key)
+            text = page_cache.get(key)
+            if text is None:
+                interpreter.process_page(page)
+                text = output_string.getvalue()
+                output_string.seek(0)
+                output_string.truncate(0)
+                page_cache.put(key, text)
+                extracted_count += 1
+            yield text
+    print(f"Page cache: reused {len(page_keys) - extracted_count} of {len(page_keys)} pages, extracted {extracted_count}.")
+    return page_keys
+
+def _iter_cached_parallel_page_texts(pdf_path, page_cache, laparams, workers, pages_per_shard=None):
+    # Fingerprints every page up front, then extracts only the uncached pages in
+    # shards on a process pool, yielding all pages in page order.
+    start_time = time.time()
+    page_keys = [page_cache.page_key(fingerprint) for fingerprint in _page_fingerprints(pdf_path)]
+    texts = {}
+    missing_pages = []
+    for page_number, key in enumerate(page_keys):
+        text = page_cache.get(key)
+        if text is None:
+            missing_pages.append(page_number)
+        else:
+            texts[page_number] = text
+    shards = [missing_pages[start:end] for start, end in split_page_shards(len(missing_pages), workers, pages_per_shard)]
+    print(f"Page cache: reused {len(texts)} of {len(page_keys)} pages; "
+          f"extracting {len(missing_pages)} in {len(shards)} shards with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # executor.map yields results in submission order, i.e. page order
+        shard_results = executor.map(_extract_page_texts, [(pdf_path, shard, laparams) for shard in shards])
+        for page_number in range(len(page_keys)):
+            while page_number not in texts:
+                shard_pages, shard_texts, elapsed = next(shard_results)
+                print(f"  Pages {shard_pages[0] + 1}-{shard_pages[-1] + 1}: {elapsed:.2f} seconds.")
+                for shard_page_number, text in zip(shard_pages, shard_texts):
+                    page_cache.put(page_keys[shard_page_number], text)
+                    texts[shard_page_number] = text
+            yield texts.pop(page_number)
+
+    if shards:
+        print(f"Parallel extraction complete in {time.time() - start_time:.2f} seconds.")
+    return page_keys
+
+def _iter_cached_page_texts(pdf_path, workers=None, laparams=None):
+    # Page texts through the page cache. An unchanged file is served from its
+    # manifest without being parsed at all.
+    laparams = laparams or LAParams()
+    page_cache = PageCache(extraction_settings(laparams))
+    pdf_file_hash = file_digest(pdf_path)
+    page_keys = page_cache.load_manifest(pdf_file_hash)
+    if page_keys is not None:
+        texts = []
+        for key in page_keys:
+            text = page_cache.get(key)
+            if text is None:
+                break
+            texts.append(text)
+        else:
+            print(f"Page cache: all {len(texts)} pages of {os.path.basename(pdf_path)} reused.")
+            yield from texts
+            return
+
+    if workers and workers > 1:
+        page_keys = yield from _iter_cached_parallel_page_texts(pdf_path, page_cache, laparams, workers)
+    else:
+        page_keys = yield from _iter_cached_serial_page_texts(pdf_path, page_cache, laparams)
+    page_cache.save_manifest(pdf_file_hash, page_keys)
+
+def iter_text_from_pdf(pdf_path, workers=None, use_cache=True):
+    """
+    Extracts text from a PDF incrementally.
+
+    The concatenation of the yielded chunks equals extract_text_from_pdf(pdf_path).
+
+    Args:
+        pdf_path (str): The full path to the PDF file.
+        workers (int, optional): If greater than 1, pages are extracted in a
+            process pool; otherwise they are extracted one by one.
+        use_cache (bool): Reuse page text from the page cache (data/cache/pages);
+            without it, parallel chunks are whole page shards.
+
+    Yields:
+        str: Extracted text, in page order.
+
+    Raises:
+        Exception: Whatever stopped extraction partway through. It is re-raised
+            rather than ending the stream early, so callers never mistake a
+            truncated text for the whole document.
+    """
+    if not os.path.exists(pdf_path):
+        print(f"Error: PDF file not found at {pdf_path}")
+        return
+    try:
+        if use_cache:
+            yield from _iter_cached_page_texts(pdf_path, workers)
+        elif workers and workers > 1:
+            yield from _iter_parallel_shard_texts(pdf_path, workers)
+        else:
+            yield from _iter_page_texts(pdf_path)
+    except Exception as e:
+        print(f"An error occurred while extracting text from {pdf_path} using pdfminer.six: {e}")
+        raise
+
 if __name__ == "__main__":
     current_dir = os.path.dirname(__file__)
     pdf_file_path = os.path.join(current_dir, '..', 'data', 'raw_pdfs', 'SAT Suite Question Bank ELA - Results.pdf')
     pdf_file_path = os.path.abspath(pdf_file_path)
 
+    arg_parser = argparse.ArgumentParser(description="Extract the question bank PDF's text for debugging.")
+    arg_parser.add_argument('workers', type=int, nargs='?', default=None,
+                            help="Worker processes for parallel extraction.")
+    arg_parser.add_argument('--no-page-cache', action='store_true',
+                            help="Extract every page instead of reusing text from the page cache.")
+    args = arg_parser.parse_args()
+
     print(f"Attempting to extract text from: {pdf_file_path} using pdfminer.six")
-    extracted_content = extract_text_from_pdf(pdf_file_path)
+    extracted_content = extract_text_from_pdf(pdf_file_path, workers=args.workers, use_cache=not args.no_page_cache)
 
     if extracted_content:
         print("\n--- First 2000 Characters of Extracted Text (pdfminer.six) ---")
@@ -0,0 +1,257 @@
+# satELA/src/progress_db.py
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    question_id TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL,
+    elapsed REAL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_user ON attempts (user_id, answered_at);
+CREATE TABLE IF NOT EXISTS completed (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    question_id TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+"""
+
+# Statements are module constants so every connection's statement cache
+# (sqlite3 keeps compiled statements keyed by SQL text) reuses the prepared form.
+SELECT_USER_SQL = "SELECT id FROM users WHERE name = ?"
+INSERT_USER_SQL = "INSERT OR IGNORE INTO users (name, created_at) VALUES (?, ?)"
+SELECT_QUESTION_IDS_SQL = "SELECT id FROM questions"
+INSERT_QUESTION_SQL = "INSERT OR IGNORE INTO questions (id) VALUES (?)"
+DELETE_QUESTION_SQL = "DELETE FROM questions WHERE id = ?"
+INSERT_ATTEMPT_SQL = ("INSERT INTO attempts (user_id, question_id, answer, correct, answered_at, elapsed) "
+                      "VALUES (?, ?, ?, ?, ?, ?)")
+INSERT_COMPLETED_SQL = "INSERT OR IGNORE INTO completed (user_id, question_id, completed_at) VALUES (?, ?, ?)"
+DELETE_COMPLETED_SQL = "DELETE FROM completed WHERE user_id = ?"
+SELECT_COMPLETED_SQL = "SELECT question_id FROM completed WHERE user_id = ? ORDER BY question_id"
+# Anti-join against the (user_id, question_id) primary key: one index probe per question
+SELECT_UNCOMPLETED_SQL = ("SELECT q.id FROM questions AS q WHERE NOT EXISTS "
+                          "(SELECT 1 FROM completed AS c WHERE c.user_id = ? AND c.question_id = q.id) "
+                          "ORDER BY q.id")
+SELECT_ATTEMPTS_SQL = ("SELECT u.name, a.question_id, a.answer, a.correct, a.answered_at, a.elapsed "
+                       "FROM attempts AS a JOIN users AS u ON u.id = a.user_id ORDER BY a.id")
+SELECT_USER_ATTEMPTS_SQL = ("SELECT u.name, a.question_id, a.answer, a.correct, a.answered_at, a.elapsed "
+                            "FROM attempts AS a JOIN users AS u ON u.id = a.user_id "
+                            "WHERE a.user_id = ? ORDER BY a.answered_at, a.id")
+# Bulk reads for analytics: user IDs instead of names, no answer text. Read in pages
+# (keyset pagination on the sort key, which comes last) so no connection is held
+# between pages.
+SELECT_ATTEMPT_ROWS_SQL = ("SELECT user_id, question_id, correct, answered_at, elapsed, id FROM attempts "
+                           "WHERE id > ? ORDER BY id LIMIT ?")
+SELECT_USER_ATTEMPT_ROWS_SQL = ("SELECT user_id, question_id, correct, answered_at, elapsed, id FROM attempts "
+                                "WHERE user_id = ? AND (answered_at, id) > (?, ?) ORDER BY answered_at, id LIMIT ?")
+SELECT_USER_NAMES_SQL = "SELECT id, name FROM users"
+
+def get_progress_db_file_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(current_dir, '..', 'user_data', 'progress.db')
+    return os.path.abspath(file_path)
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections that can be shared between threads."""
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                     isolation_level=None, cached_statements=64)
+        # WAL lets readers run while a writer commits; NORMAL sync is durable in WAL mode
+        # except for the last transactions before a power loss.
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+class ProgressDatabase:
+    """
+    Multi-user progress storage on SQLite: users, every attempt, and each user's
+    completed question set.
+    """
+
+    def __init__(self, db_path=None, pool_size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path or get_progress_db_file_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.pool = ConnectionPool(self.db_path, pool_size)
+        with self.pool.connection() as connection:
+            connection.executescript(SCHEMA)
+        self._user_ids = {}
+        self._user_ids_lock = threading.Lock()
+
+    def get_user_id(self, user_name):
+        """Returns the ID of the named user, creating the user on first use."""
+        with self._user_ids_lock:
+            user_id = self._user_ids.get(user_name)
+        if user_id is not None:
+            return user_id
+        with self.pool.transaction() as connection:
+            connection.execute(INSERT_USER_SQL, (user_name, time.time()))
+            user_id = connection.execute(SELECT_USER_SQL, (user_name,)).fetchone()[0]
+        with self._user_ids_lock:
+            self._user_ids[user_name] = user_id
+        return user_id
+
+    def find_user_id(self, user_name):
+        """Returns the ID of the named user, or None if there is no such user (read-only)."""
+        with self._user_ids_lock:
+            user_id = self._user_ids.get(user_name)
+        if user_id is not None:
+            return user_id
+        with self.pool.connection() as connection:
+            row = connection.execute(SELECT_USER_SQL, (user_name,)).fetchone()
+        if row is None:
+            return None
+        with self._user_ids_lock:
+            self._user_ids[user_name] = row[0]
+        return row[0]
+
+    def sync_question_ids(self, question_ids):
+        """
+        Makes the registered questions (the ones uncompleted_ids draws from) exactly
+        the IDs of the current question bank: new IDs are added and IDs a re-parse
+        dropped are removed, in one transaction.
+        """
+        question_ids = set(question_ids)
+        with self.pool.transaction() as connection:
+            registered_ids = {row[0] for row in connection.execute(SELECT_QUESTION_IDS_SQL)}
+            connection.executemany(DELETE_QUESTION_SQL, ((question_id,) for question_id in registered_ids - question_ids))
+            connection.executemany(INSERT_QUESTION_SQL, ((question_id,) for question_id in question_ids - registered_ids))
+
+    def record_attempt(self, user_name, question_id, answer, correct, elapsed_seconds=None, answered_at=None):
+        user_id = self.get_user_id(user_name)
+        answered_at = answered_at if answered_at is not None else time.time()
+        with self.pool.transaction() as connection:
+            connection.execute(INSERT_ATTEMPT_SQL,
+                               (user_id, question_id, answer, int(bool(correct)), answered_at, elapsed_seconds))
+            connection.execute(INSERT_COMPLETED_SQL, (user_id, question_id, answered_at))
+
+    def mark_completed(self, user_name, question_ids):
+        user_id = self.get_user_id(user_name)
+        now = time.time()
+        with self.pool.transaction() as connection:
+            connection.executemany(INSERT_COMPLETED_SQL,
+                                   ((user_id, question_id, now) for question_id in question_ids))
+
+    def set_completed(self, user_name, question_ids):
+        """Replaces the user's completed set with exactly `question_ids`."""
+        user_id = self.get_user_id(user_name)
+        now = time.time()
+        with self.pool.transaction() as connection:
+            connection.execute(DELETE_COMPLETED_SQL, (user_id,))
+            connection.executemany(INSERT_COMPLETED_SQL,
+                                   ((user_id, question_id, now) for question_id in set(question_ids)))
+
+    def completed_ids(self, user_name):
+        user_id = self.find_user_id(user_name)
+        if user_id is None:
+            return []
+        with self.pool.connection() as connection:
+            return [row[0] for row in connection.execute(SELECT_COMPLETED_SQL, (user_id,))]
+
+    def uncompleted_ids(self, user_name):
+        """IDs of registered questions the user has not completed yet."""
+        user_id = self.find_user_id(user_name) # None (an unknown user) matches no completed rows
+        with self.pool.connection() as connection:
+            return [row[0] for row in connection.execute(SELECT_UNCOMPLETED_SQL, (user_id,))]
+
+    def iter_attempts(self, user_name=None):
+        """Yields attempts as dicts in the progress journal's record format, plus "user"."""
+        user_id = None if user_name is None else self.find_user_id(user_name)
+        if user_name is not None and user_id is None:
+            return
+        with self.pool.connection() as connection:
+            if user_id is None:
+                rows = connection.execute(SELECT_ATTEMPTS_SQL).fetchall()
+            else:
+                rows = connection.execute(SELECT_USER_ATTEMPTS_SQL, (user_id,)).fetchall()
+        for name, question_id, answer, correct, answered_at, elapsed in rows:
+            yield {"user": name, "id": question_id, "answer": answer, "correct": bool(correct),
+                   "ts": answered_at, "elapsed": elapsed}
+
+    def iter_attempt_rows(self, user_name=None, batch_size=100000):
+        """
+        Yields attempts in batches of (user_id, question_id, correct, answered_at,
+        elapsed) tuples, for bulk loading (see user_names for the user IDs).
+
+        Each batch is a separate query and the pooled connection is returned before
+        the batch is yielded, so a slow consumer never keeps a connection from the
+        writers. Attempts recorded while iterating may or may not be included.
+        """
+        user_id = None if user_name is None else self.find_user_id(user_name)
+        if user_name is not None and user_id is None:
+            return
+        last_answered_at, last_id = float('-inf'), 0
+        while True:
+            with self.pool.connection() as connection:
+                if user_id is None:
+                    rows = connection.execute(SELECT_ATTEMPT_ROWS_SQL, (last_id, batch_size)).fetchall()
+                else:
+                    rows = connection.execute(SELECT_USER_ATTEMPT_ROWS_SQL,
+                                              (user_id, last_answered_at, last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_answered_at, last_id = rows[-1][3], rows[-1][5]
+            yield [row[:5] for row in rows]
+            if len(rows) < batch_size:
+                break
+
+    def user_names(self):
+        """Returns {user_id: name} for every user."""
+        with self.pool.connection() as connection:
+            return dict(connection.execute(SELECT_USER_NAMES_SQL))
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,194 @@
+# satELA/src/progress_journal.py
+
+import json
+import os
+import time
+
+# Attempts are flushed to the OS on every write (so they survive a crash of the
+# program) and fsync'ed to disk in batches (so a power loss costs at most a batch).
+DEFAULT_FSYNC_EVERY = 8
+DEFAULT_FSYNC_INTERVAL = 5.0 # seconds
+# Rewrite the snapshot once this many journal records have accumulated after it.
+DEFAULT_COMPACT_THRESHOLD = 200
+
+def _fsync_directory(path):
+    # Makes a rename inside `path` durable; not supported on every platform
+    try:
+        dir_fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+class ProgressJournal:
+    """
+    Append-only log of answered questions plus a snapshot of the completed set.
+
+    Every attempt is appended to the journal as one JSON line:
+        {"id": ..., "answer": "B", "correct": true, "ts": 1700000000.0, "elapsed": 42.1}
+    The snapshot (completed_questions.json) holds the completed question IDs together
+    with the journal byte offset it covers, so loading only has to read the journal
+    records written after the last compaction. The journal itself is never truncated:
+    it is the full attempt history.
+    """
+
+    def __init__(self, journal_path, snapshot_path, fsync_every=DEFAULT_FSYNC_EVERY,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        self._file = None
+        self._unsynced = 0
+        self._last_fsync = time.time()
+        self._records_since_snapshot = 0
+
+    # --- Writing ---
+
+    def _open_for_append(self):
+        if self._file is not None:
+            return self._file
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        self._file = open(self.journal_path, 'ab')
+        self._repair_torn_tail()
+        return self._file
+
+    def _repair_torn_tail(self):
+        # A crash in the middle of a write can leave a partial last line; drop it so
+        # the next record starts on a fresh line.
+        size = self._file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        with open(self.journal_path, 'rb') as f:
+            f.seek(max(0, size - 4096))
+            tail = f.read()
+        if tail.endswith(b'\n'):
+            return
+        last_newline = tail.rfind(b'\n')
+        if last_newline < 0 and size > len(tail):
+            return # Partial line longer than the window; leave it for the reader to skip
+        keep = size - len(tail) + last_newline + 1
+        print(f"Warning: Discarding a partially written record at the end of {self.journal_path}.")
+        self._file.truncate(keep)
+        self._file.seek(keep)
+
+    def record_attempt(self, question_id, answer, correct, elapsed_seconds=None, timestamp=None):
+        """Appends one answered question to the journal."""
+        record = {
+            "id": str(question_id),
+            "answer": answer,
+            "correct": bool(correct),
+            "ts": timestamp if timestamp is not None else time.time(),
+            "elapsed": round(elapsed_seconds, 3) if elapsed_seconds is not None else None,
+        }
+        f = self._open_for_append()
+        f.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+        f.flush()
+        self._unsynced += 1
+        self._records_since_snapshot += 1
+        if self._unsynced >= self.fsync_every or time.time() - self._last_fsync >= self.fsync_interval:
+            self.sync()
+        if self._records_since_snapshot >= self.compact_threshold:
+            self.compact()
+
+    def sync(self):
+        """Forces appended records to disk."""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_fsync = time.time()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    # --- Reading ---
+
+    def _read_snapshot(self):
+        # Returns (completed ids, journal offset covered by the snapshot)
+        if not os.path.exists(self.snapshot_path):
+            return set(), 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading progress snapshot from {self.snapshot_path}: {e}. Rebuilding from the journal.")
+            return set(), 0
+        if isinstance(data, list):
+            # Snapshot written before the journal existed: a plain list of IDs
+            return {str(item) for item in data}, 0
+        if isinstance(data, dict) and isinstance(data.get("completed"), list):
+            return {str(item) for item in data["completed"]}, int(data.get("journal_offset", 0))
+        print(f"Warning: Data in {self.snapshot_path} is not a progress snapshot. Rebuilding from the journal.")
+        return set(), 0
+
+    def iter_attempts(self, start_offset=0):
+        """Yields the attempt records in the journal from `start_offset` on, skipping damaged lines."""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb') as f:
+            if start_offset > os.fstat(f.fileno()).st_size:
+                start_offset = 0 # The journal was replaced since the snapshot was taken
+            f.seek(start_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break # Torn write at the end of the journal
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "id" in record:
+                    yield record
+
+    def load_completed(self):
+        """Returns the set of completed question IDs: snapshot plus journal tail."""
+        completed_ids, journal_offset = self._read_snapshot()
+        tail_records = 0
+        for record in self.iter_attempts(journal_offset):
+            completed_ids.add(str(record["id"]))
+            tail_records += 1
+        self._records_since_snapshot = tail_records
+        if tail_records >= self.compact_threshold:
+            self.compact(completed_ids)
+        return completed_ids
+
+    def journal_size(self):
+        # Opening for append first drops any torn last line, so the size is always
+        # the end of the last complete record.
+        f = self._open_for_append()
+        f.flush()
+        return os.path.getsize(self.journal_path)
+
+    def compact(self, completed_ids=None):
+        """
+        Writes a new snapshot covering the whole journal.
+
+        Args:
+            completed_ids (iterable, optional): The completed set to store; defaults
+                to the current snapshot plus journal tail.
+        """
+        self.sync()
+        journal_offset = self.journal_size()
+        if completed_ids is None:
+            completed_ids, snapshot_offset = self._read_snapshot()
+            completed_ids.update(str(record["id"]) for record in self.iter_attempts(snapshot_offset))
+        snapshot = {"completed": sorted(set(completed_ids)), "journal_offset": journal_offset}
+
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        _fsync_directory(os.path.dirname(self.snapshot_path))
+        self._records_since_snapshot = 0
+        return len(snapshot["completed"])
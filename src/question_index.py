@@ -0,0 +1,117 @@
+# satELA/src/question_index.py
+
+import random
+
+# Fields questions can be filtered on
+INDEXED_FIELDS = ("domain", "skill", "difficulty")
+
+# Number of set bits in each byte value, for walking bitmaps a byte at a time
+_BYTE_POPCOUNT = [bin(byte).count('1') for byte in range(256)]
+
+def _bitmap_from_positions(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+def _select_positions(bitmap, sorted_ranks):
+    # Maps the k-th set bit of `bitmap` (for each k in sorted_ranks) to its position,
+    # skipping whole bytes until the byte holding the next wanted bit.
+    positions = []
+    if not sorted_ranks:
+        return positions
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    rank_index = 0
+    seen = 0
+    for byte_index, byte in enumerate(data):
+        if not byte:
+            continue
+        byte_count = _BYTE_POPCOUNT[byte]
+        while rank_index < len(sorted_ranks) and sorted_ranks[rank_index] < seen + byte_count:
+            bit_rank = sorted_ranks[rank_index] - seen
+            for bit in range(8):
+                if byte & (1 << bit):
+                    if bit_rank == 0:
+                        positions.append(byte_index * 8 + bit)
+                        break
+                    bit_rank -= 1
+            rank_index += 1
+        if rank_index == len(sorted_ranks):
+            break
+        seen += byte_count
+    return positions
+
+class QuestionIndex:
+    """
+    Bitmap index over a loaded question bank.
+
+    Built once per load. Each (field, value) pair for the INDEXED_FIELDS maps to a
+    bitmap (a Python int, bit i = i-th question), so a filtered query is a few
+    bitwise ANDs and sampling picks random ranks among the set bits without copying
+    or shuffling the bank.
+    """
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.size = len(questions)
+        self.all_bits = (1 << self.size) - 1
+        self.positions_by_id = {}
+        value_positions = {field: {} for field in INDEXED_FIELDS}
+        for position, question in enumerate(questions):
+            self.positions_by_id[question['id']] = position
+            for field in INDEXED_FIELDS:
+                value_positions[field].setdefault(question[field], []).append(position)
+        self.bitmaps = {
+            field: {value: _bitmap_from_positions(positions, self.size)
+                    for value, positions in values.items()}
+            for field, values in value_positions.items()
+        }
+
+    def values(self, field):
+        """Returns {value: question count} for an indexed field."""
+        return {value: bitmap.bit_count() for value, bitmap in sorted(self.bitmaps[field].items())}
+
+    def resolve_value(self, field, value):
+        """Case-insensitive lookup of a field value; returns the stored spelling or None."""
+        if value in self.bitmaps[field]:
+            return value
+        wanted = value.strip().lower()
+        for known_value in self.bitmaps[field]:
+            if known_value.lower() == wanted:
+                return known_value
+        return None
+
+    def bitmap_for_ids(self, question_ids):
+        return _bitmap_from_positions(
+            (self.positions_by_id[question_id] for question_id in question_ids if question_id in self.positions_by_id),
+            self.size)
+
+    def query(self, domain=None, skill=None, difficulty=None, exclude_ids=None, within=None):
+        """
+        Returns the bitmap of questions matching every given filter (None = any value)
+        and not in exclude_ids. `within`, if given, is a bitmap (e.g. from
+        bitmap_for_ids) the result is restricted to.
+        """
+        result = self.all_bits if within is None else within
+        for field, value in zip(INDEXED_FIELDS, (domain, skill, difficulty)):
+            if value is not None:
+                result &= self.bitmaps[field].get(value, 0)
+        if exclude_ids:
+            result &= ~self.bitmap_for_ids(exclude_ids)
+        return result
+
+    def count(self, domain=None, skill=None, difficulty=None, exclude_ids=None, within=None):
+        return self.query(domain, skill, difficulty, exclude_ids, within).bit_count()
+
+    def sample(self, n, domain=None, skill=None, difficulty=None, exclude_ids=None, within=None, rng=random):
+        """
+        Draws up to n matching questions at random, without replacement.
+
+        Returns:
+            list: The sampled questions, in random order.
+        """
+        matches = self.query(domain, skill, difficulty, exclude_ids, within)
+        ranks = rng.sample(range(matches.bit_count()), min(n, matches.bit_count()))
+        sorted_ranks = sorted(ranks)
+        position_by_rank = dict(zip(sorted_ranks, _select_positions(matches, sorted_ranks)))
+        return [self.questions[position_by_rank[rank]] for rank in ranks]
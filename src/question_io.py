@@ -0,0 +1,213 @@
+# satELA/src/question_io.py
+#
+# Reading and writing processed question files. The format follows the extension:
+#
+#   .json                    one JSON array (the original ela_questions.json format)
+#   .ndjson / .jsonl         newline-delimited JSON, one question per line
+#   .ndjson.gz / .jsonl.gz   the same, gzip-compressed
+#   .ndjson.zst / .jsonl.zst the same, zstd-compressed (needs Python 3.14's
+#                            compression.zstd or the zstandard package)
+#
+# Writers stream questions to a temporary file next to the target and rename it
+# into place only once every question has been written, so a crash mid-write never
+# leaves a truncated file behind. iter_questions() yields questions while the file
+# is still being read.
+
+import io
+import json
+import os
+
+JSON_EXTENSIONS = ('.json',)
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+READ_CHUNK_SIZE = 1 << 16
+NUMBER_CONTINUATION_CHARACTERS = frozenset('0123456789.eE+-')
+
+def question_file_format(path):
+    """
+    Returns (format, compression) for a question file path, e.g. ("ndjson", "gzip")
+    for ela_questions.ndjson.gz. Raises ValueError for unknown extensions.
+    """
+    base, extension = os.path.splitext(path.lower())
+    compression = COMPRESSION_EXTENSIONS.get(extension)
+    if compression:
+        base, extension = os.path.splitext(base)
+    if extension in NDJSON_EXTENSIONS:
+        return "ndjson", compression
+    if extension in JSON_EXTENSIONS and compression is None:
+        return "json", None
+    raise ValueError(f"Unsupported question file extension: {os.path.basename(path)} "
+                     f"(expected .json, .ndjson or .jsonl, optionally with .gz or .zst)")
+
+def _zstd_module():
+    try:
+        from compression import zstd # Python 3.14+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ValueError("Reading or writing .zst question files needs Python 3.14 or the zstandard package.") from None
+
+def _open_text(path, mode, compression):
+    # Text-mode file object for `path`, (de)compressing on the fly
+    if compression == "gzip":
+        import gzip # Only needed for compressed files
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='\n')
+    if compression == "zstd":
+        zstd = _zstd_module()
+        if hasattr(zstd, 'open'):
+            return zstd.open(path, mode + 't', encoding='utf-8', newline='\n')
+        raw_file = open(path, mode + 'b')
+        if mode == 'w':
+            stream = zstd.ZstdCompressor().stream_writer(raw_file, closefd=True)
+        else:
+            stream = zstd.ZstdDecompressor().stream_reader(raw_file, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='\n')
+    return open(path, mode, encoding='utf-8', newline='\n')
+
+# --- Writing ---
+
+def write_questions_json(questions, fp):
+    """
+    Writes questions to an open text file as they arrive, producing exactly the
+    same output as json.dump(list(questions), fp, indent=2, ensure_ascii=False).
+
+    Returns:
+        int: The number of questions written.
+    """
+    count = 0
+    for question in questions:
+        fp.write('[' if count == 0 else ',')
+        # json.dumps escapes newlines inside strings, so every line break is structural
+        fp.write('\n  ' + json.dumps(question, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+        count += 1
+    fp.write('\n]' if count else '[]')
+    return count
+
+def write_questions_ndjson(questions, fp):
+    """
+    Writes questions to an open text file as newline-delimited JSON, one compact
+    question per line.
+
+    Returns:
+        int: The number of questions written.
+    """
+    count = 0
+    for question in questions:
+        fp.write(json.dumps(question, ensure_ascii=False, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+def write_questions(questions, path):
+    """
+    Streams questions to `path` in the format its extension names. The data goes
+    to `path`.tmp first and only replaces `path` once all questions are written;
+    if there were no questions the existing file is left untouched.
+
+    Returns:
+        int: The number of questions written.
+    """
+    file_format, compression = question_file_format(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + '.tmp'
+    try:
+        with _open_text(temp_path, 'w', compression) as f:
+            if file_format == "ndjson":
+                written = write_questions_ndjson(questions, f)
+            else:
+                written = write_questions_json(questions, f)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if not written:
+        os.remove(temp_path)
+        return 0
+    os.replace(temp_path, path)
+    return written
+
+# --- Reading ---
+
+def iter_questions_ndjson(fp):
+    """Yields the questions in an open newline-delimited JSON file, one per line."""
+    for line_number, line in enumerate(fp, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid question on line {line_number}: {e}") from None
+
+def iter_questions_json(fp):
+    """
+    Yields the questions in an open JSON array file, decoding each one as soon as
+    enough of the file has been read to hold it.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    at_eof = False
+    expect = '['
+
+    def fill():
+        nonlocal buffer, position, at_eof
+        chunk = fp.read(READ_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        at_eof = not chunk
+
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position == len(buffer):
+            if at_eof:
+                raise ValueError("Unexpected end of question file")
+            fill()
+            continue
+        character = buffer[position]
+        if expect == '[':
+            if character != '[':
+                raise ValueError("Question file does not contain a JSON array")
+            position += 1
+            expect = 'item or ]'
+        elif character == ']' and expect != 'item':
+            return
+        elif expect == ', or ]':
+            if character != ',':
+                raise ValueError(f"Expected ',' or ']' in question file, found {character!r}")
+            position += 1
+            expect = 'item'
+        else:
+            try:
+                question, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+                fill() # The element continues past the end of the buffer
+                continue
+            if not at_eof and (end == len(buffer) or buffer[end] in NUMBER_CONTINUATION_CHARACTERS):
+                fill() # A number cut off by the end of the buffer may continue in the next chunk
+                continue
+            position = end
+            expect = ', or ]'
+            yield question
+
+def iter_questions(path):
+    """Yields the questions in a question file one by one, reading it incrementally."""
+    file_format, compression = question_file_format(path)
+    with _open_text(path, 'r', compression) as f:
+        if file_format == "ndjson":
+            yield from iter_questions_ndjson(f)
+        else:
+            yield from iter_questions_json(f)
+
+def load_questions(path):
+    """Reads a whole question file into a list of question dicts."""
+    file_format, compression = question_file_format(path)
+    if file_format == "json":
+        with _open_text(path, 'r', compression) as f:
+            return json.load(f)
+    return list(iter_questions(path))
@@ -3,6 +3,9 @@ import json
 import os
 import sys
 import time # For timing
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Add the parent directory (satELA) to the Python path
 current_script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,9 +13,15 @@ project_root_dir = os.path.dirname(current_script_dir) # This is 'satELA'
 if project_root_dir not in sys.path:
     sys.path.insert(0, project_root_dir)
 
-from src.pdf_scraper import extract_text_from_pdf
+from src.fast_parser import ELA_PROMPTS_RAW, parse_question_block_fast
+from src import instrumentation
+from src.instrumentation import count, span
+from src.parse_cache import ParseCache
+from src.question_io import question_file_format, write_questions
 
-def clean_text(text):
+def _clean_fragment(text):
+    # Everything clean_text() does except the final strip, so it can also be applied
+    # piecewise to a stream (see iter_cleaned_text).
     # Normalize Windows newlines to Unix
     text = re.sub(r'\r\n', '\n', text)
     # Remove form feed characters (page breaks) - typically represented as \f
@@ -28,59 +37,58 @@ def clean_text(text):
     text = re.sub(r'\n{3,}', '\n\n', text)
     # Replace multiple spaces/tabs with a single space
     text = re.sub(r'[ \t]+', ' ', text)
-    text = text.strip() # Remove leading/trailing whitespace
     return text
 
-def parse_ela_questions(full_pdf_text):
-    start_parse_time = time.time()
-    questions_data = []
-    
-    print("Cleaning text...")
-    cleaned_text = clean_text(full_pdf_text)
-    print(f"Text cleaning complete. Length: {len(cleaned_text)} characters.")
-    
+def clean_text(text):
+    return _clean_fragment(text).strip() # Remove leading/trailing whitespace
+
+QUESTION_ID_PATTERN = re.compile(r'(Question ID ([0-9a-fA-F]{8,}))', re.MULTILINE)
+
+def split_question_blocks(cleaned_text):
+    """Splits the cleaned document into (question_id, block_content) pairs."""
     # New strategy: Split into blocks by looking for "Question ID"
     # This regex is meant to reliably split the document into distinct question segments.
     # It accounts for "Question ID" appearing at the start of a line, potentially with leading whitespace.
     # Use re.split to get blocks directly based on the "Question ID" pattern
     # The ( ) around the pattern make sure the delimiter (including the ID) is included in the result list
-    question_blocks_raw_split = re.split(r'(Question ID ([0-9a-fA-F]{8,}))', cleaned_text, flags=re.MULTILINE)
-    
-    # The split result will be: ['', 'Question ID <id1>', '<content1>', 'Question ID <id2>', '<content2>', ...]
+    question_blocks_raw_split = QUESTION_ID_PATTERN.split(cleaned_text)
+
+    # The split result will be: ['<preamble>', 'Question ID <id1>', '<id1>', '<content1>', 'Question ID <id2>', ...]
     # We need to pair the ID with its content.
-    
+
     raw_question_blocks = []
-    # Skip the first empty string if it exists
-    start_index = 1 if not question_blocks_raw_split[0] else 0 
+    # Always skip the first element: it is the (usually empty) text before the first "Question ID"
+    start_index = 1
 
     for i in range(start_index, len(question_blocks_raw_split) - 1, 3): # Iterate by 3s: ID_match_group, ID, content
         if i + 2 < len(question_blocks_raw_split):
-            full_match_str = question_blocks_raw_split[i] # e.g., "Question ID 12345678"
             question_id = question_blocks_raw_split[i+1] # e.g., "12345678"
             content = question_blocks_raw_split[i+2]
             raw_question_blocks.append((question_id, content.strip()))
+    return raw_question_blocks
 
-    print(f"Found {len(raw_question_blocks)} potential question blocks after initial split.")
+def parse_question_block(question_id, raw_block_content):
+    """
+    Parses the content that follows one "Question ID <id>" marker.
 
-    successfully_parsed_count = 0
+    Returns the question dict even when essential fields are missing; use
+    is_complete_question() to decide whether to keep it.
+    """
+    # Initialize defaults for each question at the start of the loop
+    assessment = "N/A"
+    test = "N/A"
+    domain = "N/A"
+    skill = "N/A"
+    difficulty = "N/A"
+
+    question_text = ""
+    choices = {"A": "", "B": "", "C": "", "D": ""}
+    correct_answer_choice = "N/A"
+    explanation = ""
 
-    for i, (question_id, raw_block_content) in enumerate(raw_question_blocks):
-        block_start_time = time.time()
-        
-        # Initialize defaults for each question at the start of the loop
-        assessment = "N/A"
-        test = "N/A"
-        domain = "N/A"
-        skill = "N/A"
-        difficulty = "N/A"
-        
-        question_text = ""
-        choices = {"A": "", "B": "", "C": "", "D": ""}
-        correct_answer_choice = "N/A"
-        explanation = ""
-        
-        content_for_parsing = raw_block_content # The content that regexes will search
+    content_for_parsing = raw_block_content # The content that regexes will search
 
+    with span("block.metadata"):
         # --- Parse Metadata (Assessment, Test, Domain, Skill, Difficulty) ---
         # Adjusted metadata pattern: removed ID from pattern itself and fixed difficulty
         metadata_pattern = re.compile(
@@ -91,16 +99,16 @@ def parse_ela_questions(full_pdf_text):
             r'Difficulty\s*\n([^\n]+)\s*\n+',   # Difficulty (Group 5) - Fixed "Difficulty"
             re.DOTALL
         )
-        
+
         meta_match = metadata_pattern.match(content_for_parsing)
-        
+
         if meta_match:
             assessment = (meta_match.group(1) or '').strip()
             test = (meta_match.group(2) or '').strip()
             domain = (meta_match.group(3) or '').replace('\n', ' ').strip()
             skill = (meta_match.group(4) or '').strip()
             difficulty = (meta_match.group(5) or '').strip() 
-            
+
             # Remove the matched metadata from the content for further parsing
             content_for_parsing = content_for_parsing[meta_match.end():].strip()
         # else: pass (defaults remain 'N/A')
@@ -108,12 +116,12 @@ def parse_ela_questions(full_pdf_text):
         # Clean potential "ID: <ID> Answer" line if it's still present at the beginning of content_for_parsing
         content_for_parsing = re.sub(r'^ID:\s*[0-9a-fA-F]{8,}\s*Answer\s*\n*', '', content_for_parsing, 1, re.MULTILINE).strip()
 
-
+    with span("block.choices"):
         # --- Determine Question Text and the Section Containing Choices/Answer ---
         # Find the very first marker (A., B., C., D., or Correct Answer:)
         first_marker_in_content_pattern = re.compile(r'(A\.\s*|B\.\s*|C\.\s*|D\.\s*|Correct Answer:)', re.DOTALL)
         first_marker_match = first_marker_in_content_pattern.search(content_for_parsing)
-        
+
         choices_and_answer_section_raw = ""
         if first_marker_match:
             question_text_raw = content_for_parsing[:first_marker_match.start()].strip()
@@ -123,46 +131,6 @@ def parse_ela_questions(full_pdf_text):
             question_text_raw = content_for_parsing.strip()
             choices_and_answer_section_raw = ""
 
-        # --- Refine Question Text: Remove common prompts if they are at the end ---
-        ela_prompts_raw = [
-            r'Which choice most logically completes the text\??',
-            r'Which quotation from .*? most effectively illustrates the claim\??',
-            r'Which choice best states the main idea of the text\??',
-            r'Which choice best describes data from the graph that support .*? conclusion\??',
-            r'Which choice most effectively uses data from the graph to complete the .*?\??',
-            r'Which finding, if true, would most directly support .*? claim\??',
-            r'Which statement, if true, would most strongly support the claim in the underlined sentence\??',
-            r'According to the text, .*?\??',
-            r'Based on the text, .*?\??',
-            r'Which choice best describes the function of the underlined (portion|sentence) in the text as a whole\??',
-            r'Which choice best describes a difference in how the authors of Text 1 and Text 2 view .*?\??',
-            r'Which choice best describes a similarity in how the authors of Text 1 and Text 2 view .*?\??',
-            r'Based on the texts, how would the author of Text 2 most likely respond to the (underlined claim|assertion|assessment) .*?\??',
-            r'Which question does the text most directly attempt to answer\??',
-            r'What does the text most strongly suggest about .*?\??',
-            r'Which choice best describes the overall structure of the text\??',
-            r'Which choice completes the text with the most logical and precise word or phrase\??',
-            r'As used in the text, what does the word ‚Äú.*?‚Äù most nearly mean\??',
-            r'Which choice completes the text so that it conforms to the conventions of Standard English\??',
-            r'Which choice best describes data from the graph that (support|illustrate) .*? conclusion\??',
-            r'Which choice most effectively uses relevant information from the notes to accomplish this goal\??',
-            r'Which choice most effectively uses relevant information from the notes to (introduce|emphasize) .*?\??',
-            r'Which choice completes the text with the most logical transition\??',
-            r'Which choice best describes data from the table that support .*? conclusion\??', 
-            r'Which choice best states the main idea of the passage\??', 
-            r'Which choice provides the best evidence for the answer to the previous question\??', 
-            r'Which choice offers an accurate interpretation of the data in the graph\??',
-            r'Which choice best describes the primary purpose of the text\??',
-            r'Which choice most strongly supports the claim that .*?\??',
-            r'Which choice provides the best evidence for the answer to the previous question\??', # Appears frequently
-            r'Which choice most effectively uses information from the notes to accomplish this goal\??',
-            r'The primary purpose of the text is to', # Common phrase ending a question
-            r'Which choice completes the text with the most logical and precise word or phrase\?',
-        ]
-        
-        prompt_remover_pattern = re.compile(r'(\n+\s*(?:' + '|'.join(ela_prompts_raw) + r'))\s*$', re.DOTALL | re.IGNORECASE)
-        question_text = re.sub(prompt_remover_pattern, '', question_text_raw).strip()
-        
         # --- Parse Choices (A, B, C, D) using explicit markers and slicing ---
         # Find the very first actual choice marker (A., B., C., or D.)
         first_actual_choice_marker_pattern = re.compile(r'(A\.\s*|B\.\s*|C\.\s*|D\.\s*)', re.DOTALL)
@@ -180,10 +148,10 @@ def parse_ela_questions(full_pdf_text):
         # Split the choices_only_section by choice markers and "Correct Answer:"
         # Use re.split with a pattern that captures the delimiters
         choice_split_parts = re.split(r'(A\.\s*|B\.\s*|C\.\s*|D\.\s*|Correct Answer:)', choices_only_section, flags=re.MULTILINE)
-        
+
         current_choice_key = None
         remainder_for_answer_rationale = ""
-        
+
         for part in choice_split_parts:
             part = part.strip()
             if not part:
@@ -206,7 +174,15 @@ def parse_ela_questions(full_pdf_text):
                 # This is the content for the current_choice_key
                 if current_choice_key and current_choice_key in ['A', 'B', 'C', 'D']:
                     choices[current_choice_key] += (" " if choices[current_choice_key] else "") + part.strip()
-        
+
+    # Prompt stripping only needs question_text_raw, so it is timed after the choices
+    with span("block.prompt_strip"):
+        # --- Refine Question Text: Remove common prompts if they are at the end ---
+        # ELA_PROMPTS_RAW is shared with the fast engine (src/fast_parser.py)
+        prompt_remover_pattern = re.compile(r'(\n+\s*(?:' + '|'.join(ELA_PROMPTS_RAW) + r'))\s*$', re.DOTALL | re.IGNORECASE)
+        question_text = re.sub(prompt_remover_pattern, '', question_text_raw).strip()
+
+    with span("block.rationale"):
         # --- Extract Correct Answer and Rationale ---
         # Adjusted for the "Rationale" to be optional and to correctly capture the end of the rationale.
         answer_rationale_pattern = re.compile(
@@ -215,78 +191,476 @@ def parse_ela_questions(full_pdf_text):
             r'(?:\s*Question Difficulty:\s*(Hard|Medium|Easy))?', # Optional Group 3: Final Difficulty 
             re.DOTALL
         )
-        
+
         ar_match = answer_rationale_pattern.search(remainder_for_answer_rationale)
-        
+
         if ar_match:
             correct_answer_choice = (ar_match.group(1) or 'N/A').strip()
             explanation = (ar_match.group(2) or '').strip()
 
             if ar_match.group(3): # If difficulty found at end of rationale
                 difficulty = ar_match.group(3).strip()
-        
-        # Filter out questions that don't have essential data after parsing
-        # Check if question text is not empty and correct_answer is found
-        # We allow choices to be potentially empty if they weren't properly parsed, but still attempt to include them.
-        if (question_id and question_text and correct_answer_choice in ['A', 'B', 'C', 'D']):
+
+    return {
+        "id": question_id,
+        "assessment": assessment,
+        "test": test,
+        "domain": domain,
+        "skill": skill,
+        "difficulty": difficulty,
+        "question_text": question_text,
+        "choices": choices,
+        "correct_answer": correct_answer_choice,
+        "explanation": explanation
+    }
+
+def is_complete_question(question):
+    # Filter out questions that don't have essential data after parsing
+    # Check if question text is not empty and correct_answer is found
+    # We allow choices to be potentially empty if they weren't properly parsed, but still attempt to include them.
+    return bool(question["id"] and question["question_text"] and question["correct_answer"] in ['A', 'B', 'C', 'D'])
+
+# Block parser implementations selectable with the `engine` argument:
+# "regex" is the original multi-pass parser above, "fast" the single-pass one
+# from src/fast_parser.py. Both return identical questions.
+PARSER_ENGINES = {
+    "regex": parse_question_block,
+    "fast": parse_question_block_fast,
+}
+DEFAULT_PARSER_ENGINE = "regex"
+
+# Bump whenever a change to clean_text or the block parsers changes their output;
+# it is part of every ParseCache key, so stale cached blocks are never reused.
+PARSER_VERSION = 1
+
+def get_block_parser(engine=None):
+    engine = engine or DEFAULT_PARSER_ENGINE
+    if engine not in PARSER_ENGINES:
+        raise ValueError(f"Unknown parser engine '{engine}'. Choose from: {', '.join(PARSER_ENGINES)}")
+    return PARSER_ENGINES[engine]
+
+# Blocks sent to a worker process at a time in parallel mode. Large enough that
+# pickling and scheduling overhead stays small next to the parsing itself.
+DEFAULT_PARSE_BATCH_SIZE = 64
+
+def _parse_block_batch(engine, batch, instrument=False):
+    # Runs in a worker process; must stay a top-level function so it can be pickled.
+    # With `instrument`, the worker's measurements for this batch are returned as well
+    # so the parent process can merge them.
+    if instrument:
+        instrumentation.enable()
+        instrumentation.reset()
+    parse_block = get_block_parser(engine)
+    batch_start_time = time.time()
+    parsed = []
+    for question_id, raw_block_content in batch:
+        with span("block"):
+            parsed.append(parse_block(question_id, raw_block_content))
+    return parsed, time.time() - batch_start_time, instrumentation.snapshot() if instrument else None
+
+def _iter_block_batches(raw_question_blocks, batch_size):
+    batch = []
+    for block in raw_question_blocks:
+        batch.append(block)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_parsed_batches(raw_question_blocks, engine=None, workers=None, batch_size=DEFAULT_PARSE_BATCH_SIZE):
+    """
+    Parses (question_id, block_content) pairs in batches, optionally in a process pool.
+
+    Batches come back in input order whatever order the workers finish in. At most
+    two batches per worker are in flight, so `raw_question_blocks` may be a lazy
+    iterator (e.g. iter_question_blocks) without being read ahead in full.
+
+    Args:
+        raw_question_blocks (iterable): (question_id, block_content) pairs.
+        engine (str, optional): Block parser to use, see PARSER_ENGINES.
+        workers (int, optional): Worker processes; None or 1 parses in this process.
+        batch_size (int): Blocks per batch.
+
+    Yields:
+        tuple: (parsed question dicts for the batch, seconds spent parsing it).
+    """
+    get_block_parser(engine) # Fail on an unknown engine before starting any workers
+    batches = _iter_block_batches(raw_question_blocks, batch_size)
+    if not workers or workers <= 1:
+        for batch in batches:
+            parsed, batch_time, _ = _parse_block_batch(engine, batch)
+            yield parsed, batch_time
+        return
+
+    def collect(future):
+        parsed, batch_time, worker_measurements = future.result()
+        instrumentation.merge(worker_measurements)
+        instrumentation.record_duration("batch", int(batch_time * 1e9))
+        return parsed, batch_time
+
+    instrument = instrumentation.is_enabled()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(executor.submit(_parse_block_batch, engine, batch, instrument))
+            if len(in_flight) >= workers * 2:
+                yield collect(in_flight.popleft())
+        while in_flight:
+            yield collect(in_flight.popleft())
+
+def _print_skipped_question(question, block_label):
+    count("questions.skipped")
+    print(f"SKIPPING INCOMPLETE QUESTION: ID={question['id'] if question['id'] else 'UNKNOWN'} (Block {block_label})")
+    print(f"  Q Text: {bool(question['question_text'])}, Correct Answer: {question['correct_answer']}")
+
+def parse_ela_questions(full_pdf_text, engine=None, workers=None):
+    parse_block = get_block_parser(engine)
+    start_parse_time = time.time()
+    questions_data = []
+    
+    print("Cleaning text...")
+    with span("clean"):
+        cleaned_text = clean_text(full_pdf_text)
+    print(f"Text cleaning complete. Length: {len(cleaned_text)} characters.")
+    
+    with span("split"):
+        raw_question_blocks = split_question_blocks(cleaned_text)
+    count("blocks", len(raw_question_blocks))
+
+    print(f"Found {len(raw_question_blocks)} potential question blocks after initial split.")
+
+    successfully_parsed_count = 0
+
+    # Per-block and per-batch timings go to the instrumentation (see src/instrumentation.py);
+    # only unusually slow blocks are reported here.
+    if workers and workers > 1:
+        # Parallel mode: workers only return the parsed dicts; the skip diagnostics
+        # are printed here, in block order.
+        print(f"Parsing blocks with {workers} worker processes...")
+        block_number = 0
+        for parsed_batch, batch_time in iter_parsed_batches(raw_question_blocks, engine, workers):
+            for question in parsed_batch:
+                block_number += 1
+                if is_complete_question(question):
+                    questions_data.append(question)
+                    successfully_parsed_count += 1
+                else:
+                    _print_skipped_question(question, f"{block_number}/{len(raw_question_blocks)}")
+    else:
+        for i, (question_id, raw_block_content) in enumerate(raw_question_blocks):
+            block_start_time = time.time()
             
-            questions_data.append({
-                "id": question_id,
-                "assessment": assessment,
-                "test": test,
-                "domain": domain,
-                "skill": skill,
-                "difficulty": difficulty,
-                "question_text": question_text,
-                "choices": choices,
-                "correct_answer": correct_answer_choice,
-                "explanation": explanation
-            })
-            successfully_parsed_count += 1
-        else:
-            print(f"SKIPPING INCOMPLETE QUESTION: ID={question_id if question_id else 'UNKNOWN'} (Block {i+1}/{len(raw_question_blocks)})")
-            print(f"  Q Text: {bool(question_text)}, Correct Answer: {correct_answer_choice}")
-            # print(f"  Raw block content start:\n{raw_block_content[:500]}...") # Uncomment for very deep debug
+            with span("block"):
+                question = parse_block(question_id, raw_block_content)
+            
+            if is_complete_question(question):
+                questions_data.append(question)
+                successfully_parsed_count += 1
+            else:
+                _print_skipped_question(question, f"{i+1}/{len(raw_question_blocks)}")
+                # print(f"  Raw block content start:\n{raw_block_content[:500]}...") # Uncomment for very deep debug
 
-        # Print time for every 10 blocks or if it takes too long
-        if (i + 1) % 10 == 0 or (time.time() - block_start_time > 0.5): # Print every 10 blocks or if a single block takes > 0.5 sec
-             print(f"Processed block {i+1}/{len(raw_question_blocks)} (ID: {question_id}). Time: {time.time() - block_start_time:.4f} seconds.")
+            if time.time() - block_start_time > 0.5:
+                 print(f"Slow block {i+1}/{len(raw_question_blocks)} (ID: {question_id}): {time.time() - block_start_time:.4f} seconds.")
 
 
     total_parse_time = time.time() - start_parse_time
     print(f"\n--- Parsing Summary ---")
     print(f"Total parsing (regex matching) time: {total_parse_time:.2f} seconds.")
     print(f"Successfully parsed {successfully_parsed_count} out of {len(raw_question_blocks)} potential blocks.")
+    count("questions.parsed", successfully_parsed_count)
     return questions_data
 
+def compare_parser_engines(full_pdf_text, engines=("regex", "fast")):
+    """
+    Parses the text with each engine and checks that they agree.
+
+    Every block is compared, including the ones that end up skipped, and the
+    JSON serialization of the final question lists must be identical.
+
+    Returns:
+        list: IDs of the blocks whose parsed results differ (empty if the engines agree).
+    """
+    raw_question_blocks = split_question_blocks(clean_text(full_pdf_text))
+    parsers = [get_block_parser(engine) for engine in engines]
+    mismatched_ids = []
+    outputs = {engine: [] for engine in engines}
+    for question_id, raw_block_content in raw_question_blocks:
+        results = [parse_block(question_id, raw_block_content) for parse_block in parsers]
+        if any(result != results[0] for result in results[1:]):
+            mismatched_ids.append(question_id)
+        for engine, result in zip(engines, results):
+            if is_complete_question(result):
+                outputs[engine].append(result)
+
+    serialized = {json.dumps(questions, indent=2, ensure_ascii=False) for questions in outputs.values()}
+    if len(serialized) > 1 and not mismatched_ids:
+        mismatched_ids.append("UNKNOWN")
+    return mismatched_ids
+
+# --- Streaming API ---
+# The functions below produce the same questions as parse_ela_questions, but work on
+# an iterable of text chunks (e.g. one per PDF page) and yield each question as soon
+# as the next "Question ID" marker shows that its block is complete.
+
+# A "Question ID <hex>" match that is cut off by the end of a chunk is at most this long
+# ("Question ID " plus seven hex digits); anything longer would already have matched.
+_MAX_PARTIAL_QUESTION_ID_LENGTH = len("Question ID ") + 7
+
+def _last_safe_cut(text):
+    # Returns an index at which clean_text's substitutions cannot straddle the cut:
+    # just after a newline that is followed by a character none of them touch.
+    # Returns 0 if there is no such position yet.
+    index = len(text) - 1
+    while True:
+        index = text.rfind('\n', 0, index)
+        if index < 0:
+            return 0
+        next_char = text[index + 1]
+        if not next_char.isspace() and next_char != '-':
+            return index + 1
+
+def iter_cleaned_text(text_chunks):
+    """
+    Incremental clean_text(): the concatenation of the yielded fragments equals
+    clean_text(''.join(text_chunks)).
+    """
+    pending = ""
+    at_start = True
+    for chunk in text_chunks:
+        pending += chunk
+        cut = _last_safe_cut(pending)
+        if not cut:
+            continue
+        with span("clean"):
+            fragment = _clean_fragment(pending[:cut])
+        pending = pending[cut:]
+        if at_start:
+            fragment = fragment.lstrip()
+            if not fragment:
+                continue
+            at_start = False
+        yield fragment
+
+    with span("clean"):
+        fragment = _clean_fragment(pending)
+    if at_start:
+        fragment = fragment.lstrip()
+    fragment = fragment.rstrip()
+    if fragment:
+        yield fragment
+
+def iter_question_blocks(cleaned_chunks):
+    """
+    Streaming split_question_blocks(): yields (question_id, block_content) pairs
+    from an iterable of cleaned text, handling markers split across chunk edges.
+    """
+    buffer = ""
+    scan_from = 0
+    current_id = None
+    for chunk in cleaned_chunks:
+        # Blocks completed by this chunk are collected first so the "split" span
+        # does not include the time the consumer spends on them.
+        completed_blocks = []
+        with span("split"):
+            buffer += chunk
+            content_start = 0
+            while True:
+                match = QUESTION_ID_PATTERN.search(buffer, scan_from)
+                if match is None:
+                    # A marker may still be completed by the next chunk
+                    scan_from = max(content_start, len(buffer) - _MAX_PARTIAL_QUESTION_ID_LENGTH)
+                    break
+                if match.end() == len(buffer):
+                    # The hex ID may continue in the next chunk
+                    scan_from = match.start()
+                    break
+                if current_id is not None:
+                    completed_blocks.append((current_id, buffer[content_start:match.start()].strip()))
+                current_id = match.group(2)
+                content_start = scan_from = match.end()
+            # Drop everything that belongs to already yielded blocks
+            buffer = buffer[content_start:]
+            scan_from -= content_start
+        yield from completed_blocks
+
+    completed_blocks = []
+    with span("split"):
+        content_start = 0
+        for match in QUESTION_ID_PATTERN.finditer(buffer, scan_from):
+            if current_id is not None:
+                completed_blocks.append((current_id, buffer[content_start:match.start()].strip()))
+            current_id = match.group(2)
+            content_start = match.end()
+        if current_id is not None:
+            completed_blocks.append((current_id, buffer[content_start:].strip()))
+    yield from completed_blocks
+
+def _iter_cached_block_results(raw_question_blocks, engine, workers, cache):
+    # Looks every block up in the cache and only parses the misses (in the pool if
+    # workers > 1). `pending` holds one (key, cached question or None) entry per
+    # block in document order; misses are filled in as their parses come back.
+    pending = deque()
+
+    def uncached_blocks():
+        for question_id, raw_block_content in raw_question_blocks:
+            key = cache.block_key(question_id, raw_block_content)
+            pending.append((key, cache.get(key)))
+            if pending[-1][1] is None:
+                yield question_id, raw_block_content
+
+    for parsed_batch, _ in iter_parsed_batches(uncached_blocks(), engine, workers):
+        for question in parsed_batch:
+            while pending[0][1] is not None:
+                yield pending.popleft()[1]
+            key, _ = pending.popleft()
+            cache.put(key, question)
+            yield question
+    while pending:
+        yield pending.popleft()[1]
+
+def iter_ela_questions(text_chunks, engine=None, workers=None, cache=None):
+    """
+    Generator version of parse_ela_questions.
+
+    Args:
+        text_chunks (iterable of str): Extracted PDF text in document order, e.g.
+            from src.pdf_scraper.iter_text_from_pdf.
+        engine (str, optional): Block parser to use, see PARSER_ENGINES.
+        workers (int, optional): If greater than 1, blocks are parsed in batches in
+            a process pool (see iter_parsed_batches); questions are still yielded
+            in document order.
+        cache (ParseCache, optional): If given, blocks whose text is already in the
+            cache are not parsed again; the cache is saved and a hit/miss summary
+            printed when the stream is exhausted.
+
+    Yields:
+        dict: Each complete question, in document order.
+    """
+    start_parse_time = time.time()
+    block_count = 0
+    successfully_parsed_count = 0
+    raw_question_blocks = iter_question_blocks(iter_cleaned_text(text_chunks))
+    if cache is not None:
+        parsed_questions = _iter_cached_block_results(raw_question_blocks, engine, workers, cache)
+    elif workers and workers > 1:
+        parsed_questions = (question
+                            for parsed_batch, _ in iter_parsed_batches(raw_question_blocks, engine, workers)
+                            for question in parsed_batch)
+    else:
+        parse_block = get_block_parser(engine)
+
+        def parse_blocks():
+            for question_id, raw_block_content in raw_question_blocks:
+                with span("block"):
+                    question = parse_block(question_id, raw_block_content)
+                yield question
+        parsed_questions = parse_blocks()
+
+    for question in parsed_questions:
+        block_count += 1
+        if is_complete_question(question):
+            successfully_parsed_count += 1
+            yield question
+        else:
+            _print_skipped_question(question, block_count)
+
+    print(f"\n--- Parsing Summary ---")
+    print(f"Total streaming parse time: {time.time() - start_parse_time:.2f} seconds.")
+    print(f"Successfully parsed {successfully_parsed_count} out of {block_count} potential blocks.")
+    count("blocks", block_count)
+    count("questions.parsed", successfully_parsed_count)
+    if cache is not None:
+        cache.save()
+        cache.print_summary()
+
 if __name__ == "__main__":
     current_dir = os.path.dirname(__file__)
+
+    arg_parser = argparse.ArgumentParser(description="Parse the SAT ELA question bank PDF into JSON.")
+    arg_parser.add_argument('--engine', choices=sorted(PARSER_ENGINES), default=DEFAULT_PARSER_ENGINE,
+                            help="Block parser implementation to use.")
+    arg_parser.add_argument('--compare-engines', nargs='?', metavar='TEXT_FILE',
+                            const=os.path.join(current_dir, '..', 'extracted_full_text_for_debugging.txt'),
+                            help="Check that all parser engines produce the same JSON for an extracted text "
+                                 "file (default: extracted_full_text_for_debugging.txt) and exit.")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="Parse every block instead of reusing results from the parse cache.")
+    arg_parser.add_argument('--output', metavar='PATH',
+                            help="Where to write the questions (default: data/processed_questions/ela_questions.json). "
+                                 "The extension picks the format: .json, .ndjson/.jsonl, or .ndjson.gz/.ndjson.zst.")
+    arg_parser.add_argument('--no-page-cache', action='store_true',
+                            help="Extract every PDF page instead of reusing text from the page cache.")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Worker processes for PDF extraction and block parsing (1 = serial).")
+    arg_parser.add_argument('--profile', metavar='PATH',
+                            help="Record per-stage timings and write them to PATH (JSON, or collapsed "
+                                 "stacks for flamegraph tools if PATH ends in .folded).")
+    arg_parser.add_argument('--cprofile', metavar='PATH', help="Run the parse under cProfile and dump the stats to PATH.")
+    args = arg_parser.parse_args()
+    if args.output:
+        try:
+            question_file_format(args.output)
+        except ValueError as e:
+            arg_parser.error(str(e))
+    if args.profile:
+        instrumentation.enable()
+
+    if args.compare_engines:
+        with open(args.compare_engines, 'r', encoding='utf-8') as f:
+            debug_text = f.read()
+        engines = sorted(PARSER_ENGINES)
+        debug_blocks = split_question_blocks(clean_text(debug_text))
+        for engine in engines:
+            parse_block = get_block_parser(engine)
+            engine_start_time = time.time()
+            for question_id, raw_block_content in debug_blocks:
+                parse_block(question_id, raw_block_content)
+            print(f"Engine '{engine}': {time.time() - engine_start_time:.3f} seconds.")
+        mismatched_ids = compare_parser_engines(debug_text, engines)
+        if mismatched_ids:
+            print(f"Engines disagree on {len(mismatched_ids)} blocks: {', '.join(mismatched_ids[:20])}")
+            sys.exit(1)
+        print(f"Engines {', '.join(engines)} produce identical output.")
+        sys.exit(0)
+
     pdf_file_path = os.path.join(current_dir, '..', 'data', 'raw_pdfs', 'SAT Suite Question Bank ELA - Results.pdf')
     pdf_file_path = os.path.abspath(pdf_file_path)
     
-    output_json_path = os.path.join(current_dir, '..', 'data', 'processed_questions', 'ela_questions.json')
-    os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
+    output_path = args.output or os.path.join(current_dir, '..', 'data', 'processed_questions', 'ela_questions.json')
+
+    from src.pdf_scraper import iter_text_from_pdf # Imported here so parsing alone never loads pdfminer
 
     print(f"Loading PDF text from: {pdf_file_path} using pdfminer.six")
-    full_text = extract_text_from_pdf(pdf_file_path) # Uses the new pdfminer.six scraper
-
-    if full_text:
-        print("Starting parsing...")
-        parsed_questions = parse_ela_questions(full_text)
-        print(f"\nParsing complete. Found {len(parsed_questions)} questions.")
-
-        if parsed_questions:
-            print("\n--- First Parsed Question (JSON Output) ---")
-            print(json.dumps(parsed_questions[0], indent=2))
-            print("\n--- End of First Parsed Question ---")
-
-            try:
-                with open(output_json_path, 'w', encoding='utf-8') as f:
-                    json.dump(parsed_questions, f, indent=2, ensure_ascii=False)
-                print(f"\nParsed questions saved to: {output_json_path}")
-            except Exception as e:
-                print(f"Error saving parsed questions to JSON: {e}")
-        else:
-            print("No questions were parsed. This might indicate an issue with the regex patterns or PDF extraction.")
+    text_chunks = iter_text_from_pdf(pdf_file_path, workers=args.workers, use_cache=not args.no_page_cache) # Uses the new pdfminer.six scraper
+
+    def show_first_question(questions):
+        for i, question in enumerate(questions):
+            if i == 0:
+                print("\n--- First Parsed Question (JSON Output) ---")
+                print(json.dumps(question, indent=2))
+                print("\n--- End of First Parsed Question ---")
+            yield question
+
+    parse_cache = None if args.no_cache else ParseCache(PARSER_VERSION)
+
+    print("Starting parsing...")
+    # Questions are written as they are parsed; the file only replaces the old one once complete
+    parsed_count = 0
+    try:
+        with instrumentation.cprofiled(args.cprofile):
+            parsed_count = write_questions(show_first_question(iter_ela_questions(text_chunks, args.engine, args.workers, parse_cache)), output_path)
+    except Exception as e:
+        print(f"Error parsing questions into {output_path}: {e}")
+        if os.path.exists(output_path):
+            print(f"The existing {os.path.basename(output_path)} was left unchanged.")
+    print(f"\nParsing complete. Found {parsed_count} questions.")
+    if args.profile:
+        instrumentation.print_summary()
+        instrumentation.write_profile(args.profile)
+
+    if parsed_count:
+        print(f"\nParsed questions saved to: {output_path}")
     else:
-        print("Could not load PDF text, cannot parse questions.")
\ No newline at end of file
+        print("No questions were parsed. This might indicate an issue with the regex patterns or PDF extraction.")
@@ -0,0 +1,255 @@
+# satELA/src/question_store.py
+#
+# Compact binary format for the processed question bank.
+#
+# Layout (all integers little-endian):
+#   header    b'SATQ', format version (u16), question count (u32), category table size (u32),
+#             bank fingerprint (20-byte SHA-1, see bank_fingerprint)
+#   categories JSON object mapping each categorical field to its list of values
+#   index     one fixed-width record per question (see RECORD_STRUCT)
+#   blob      UTF-8 question text, JSON-encoded choices and explanation, addressed
+#             by (offset, length) pairs in the index records
+#
+# Opening a store only decodes the header and the index; the blob is memory-mapped
+# and a question's heavy fields are decoded the first time they are accessed.
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+STORE_MAGIC = b'SATQ'
+STORE_FORMAT_VERSION = 2
+HEADER_STRUCT = struct.Struct('<4sHII20s')
+
+# Fields stored as small integer codes into the category table
+CATEGORY_FIELDS = ("assessment", "test", "domain", "skill", "difficulty")
+# Fields stored in the blob and only decoded on access
+HEAVY_FIELDS = ("question_text", "choices", "explanation")
+QUESTION_FIELDS = ("id",) + CATEGORY_FIELDS + ("question_text", "choices", "correct_answer", "explanation")
+
+MAX_ID_LENGTH = 16
+# id, five category codes, correct answer, (offset, length) for each heavy field
+RECORD_STRUCT = struct.Struct('<16s5H1s' + 'II' * len(HEAVY_FIELDS))
+
+def get_question_store_file_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(current_dir, '..', 'data', 'processed_questions', 'ela_questions.qstore')
+    return os.path.abspath(file_path)
+
+def _update_fingerprint(digest, question_id, question_text):
+    digest.update(question_id.encode('utf-8'))
+    digest.update(question_text.encode('utf-8'))
+
+def bank_fingerprint(questions):
+    """
+    Hex digest over every question's ID and question_text, in order; it changes
+    whenever a question is added, removed or has its text edited. A QuestionStore
+    has it precomputed as its `fingerprint`.
+    """
+    fingerprint = getattr(questions, 'fingerprint', None)
+    if fingerprint is not None:
+        return fingerprint
+    digest = hashlib.sha1()
+    for question in questions:
+        _update_fingerprint(digest, question['id'], question['question_text'])
+    return digest.hexdigest()
+
+def _encode_heavy_field(field, value):
+    if field == "choices":
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return value.encode('utf-8')
+
+def _decode_heavy_field(field, data):
+    text = data.decode('utf-8')
+    if field == "choices":
+        return json.loads(text)
+    return text
+
+def write_question_store(questions, store_path):
+    """
+    Writes questions (dicts in the ela_questions.json format) to a binary store.
+
+    The file is written to a temporary path and renamed into place, so readers never
+    see a partially written store.
+
+    Returns:
+        int: The number of questions written.
+    """
+    categories = {field: [] for field in CATEGORY_FIELDS}
+    category_codes = {field: {} for field in CATEGORY_FIELDS}
+    records = []
+    blob = bytearray()
+    digest = hashlib.sha1()
+
+    for question in questions:
+        question_id = question["id"].encode('ascii')
+        if len(question_id) > MAX_ID_LENGTH:
+            raise ValueError(f"Question ID {question['id']} is longer than {MAX_ID_LENGTH} characters.")
+        _update_fingerprint(digest, question["id"], question["question_text"])
+
+        codes = []
+        for field in CATEGORY_FIELDS:
+            value = question[field]
+            if value not in category_codes[field]:
+                category_codes[field][value] = len(categories[field])
+                categories[field].append(value)
+            codes.append(category_codes[field][value])
+
+        spans = []
+        for field in HEAVY_FIELDS:
+            data = _encode_heavy_field(field, question[field])
+            spans.extend((len(blob), len(data)))
+            blob += data
+
+        correct_answer = question["correct_answer"].encode('ascii')[:1] or b'?'
+        records.append(RECORD_STRUCT.pack(question_id, *codes, correct_answer, *spans))
+
+    category_table = json.dumps(categories, ensure_ascii=False).encode('utf-8')
+    os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+    temp_path = store_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER_STRUCT.pack(STORE_MAGIC, STORE_FORMAT_VERSION, len(records), len(category_table),
+                                   digest.digest()))
+        f.write(category_table)
+        f.writelines(records)
+        f.write(blob)
+    os.replace(temp_path, store_path)
+    return len(records)
+
+def convert_json_to_store(json_path, store_path):
+    """Builds a binary store from an exported question file (.json, .ndjson or .ndjson.gz)."""
+    from src.question_io import load_questions
+    return write_question_store(load_questions(json_path), store_path)
+
+class StoredQuestion(Mapping):
+    """
+    Read-only, dict-like view of one question in a QuestionStore.
+
+    ID, category fields and the correct answer come straight from the index record;
+    question_text, choices and explanation are decoded from the blob on first access.
+    """
+
+    __slots__ = ("_store", "_record", "_heavy")
+
+    def __init__(self, store, record):
+        self._store = store
+        self._record = record
+        self._heavy = {}
+
+    def __getitem__(self, key):
+        record = self._record
+        if key == "id":
+            return record[0].rstrip(b'\0').decode('ascii')
+        if key in CATEGORY_FIELDS:
+            field_index = CATEGORY_FIELDS.index(key)
+            return self._store.categories[key][record[1 + field_index]]
+        if key == "correct_answer":
+            return record[6].decode('ascii')
+        if key in HEAVY_FIELDS:
+            if key not in self._heavy:
+                span_index = 7 + 2 * HEAVY_FIELDS.index(key)
+                offset, length = record[span_index], record[span_index + 1]
+                self._heavy[key] = _decode_heavy_field(key, self._store.read_blob(offset, length))
+            return self._heavy[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(QUESTION_FIELDS)
+
+    def __len__(self):
+        return len(QUESTION_FIELDS)
+
+    def to_dict(self):
+        return {field: self[field] for field in QUESTION_FIELDS}
+
+    def __repr__(self):
+        return f"StoredQuestion(id={self['id']!r})"
+
+class QuestionStore:
+    """
+    Memory-mapped question bank written by write_question_store().
+
+    Behaves like a read-only sequence of StoredQuestion objects. `fingerprint` is
+    the bank_fingerprint of its questions, read from the header.
+    """
+
+    def __init__(self, store_path):
+        self.path = store_path
+        self._file = open(store_path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version = HEADER_STRUCT.unpack_from(self._mmap, 0)[:2]
+            if magic != STORE_MAGIC or version != STORE_FORMAT_VERSION:
+                raise ValueError(f"{store_path} is not a version {STORE_FORMAT_VERSION} question store.")
+            _, _, count, category_table_size, fingerprint = HEADER_STRUCT.unpack_from(self._mmap, 0)
+            self.fingerprint = fingerprint.hex()
+            position = HEADER_STRUCT.size
+            self.categories = json.loads(self._mmap[position:position + category_table_size].decode('utf-8'))
+            position += category_table_size
+            index_end = position + count * RECORD_STRUCT.size
+            if index_end > len(self._mmap):
+                raise ValueError(f"{store_path} is truncated.")
+            self._records = list(RECORD_STRUCT.iter_unpack(self._mmap[position:index_end]))
+            self._blob_start = index_end
+            # Heavy fields are written in order, so the last record's last span ends the blob
+            if self._records and index_end + sum(self._records[-1][-2:]) > len(self._mmap):
+                raise ValueError(f"{store_path} is truncated.")
+        except Exception:
+            self.close()
+            raise
+        self._id_positions = None
+
+    def read_blob(self, offset, length):
+        start = self._blob_start + offset
+        return self._mmap[start:start + length]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [StoredQuestion(self, record) for record in self._records[index]]
+        return StoredQuestion(self, self._records[index])
+
+    def __iter__(self):
+        for record in self._records:
+            yield StoredQuestion(self, record)
+
+    def get(self, question_id):
+        if self._id_positions is None:
+            self._id_positions = {record[0].rstrip(b'\0').decode('ascii'): i
+                                  for i, record in enumerate(self._records)}
+        position = self._id_positions.get(question_id)
+        return None if position is None else self[position]
+
+    def close(self):
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+if __name__ == "__main__":
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    json_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(current_dir, '..', 'data', 'processed_questions', 'ela_questions.json')
+    store_path = sys.argv[2] if len(sys.argv) > 2 else get_question_store_file_path()
+
+    print(f"Converting {os.path.abspath(json_path)} to {store_path}...")
+    written = convert_json_to_store(json_path, store_path)
+    print(f"Wrote {written} questions ({os.path.getsize(store_path)} bytes).")
@@ -0,0 +1,255 @@
+# satELA/src/review_scheduler.py
+#
+# Spaced-repetition scheduling for practice questions.
+#
+# Every answered question gets SM-2 style review state (ease factor, interval,
+# repetition count): questions answered correctly come back after growing
+# intervals, questions answered wrong come back in the next session. Each skill
+# also has an Elo rating, updated on every answer against the question's
+# difficulty, which decides which skill new questions are drawn from.
+#
+# Due questions are kept in a min-heap keyed by due time. Rescheduling pushes a new
+# entry and leaves the old one in place; stale entries are recognised by their
+# version number and dropped when they reach the top (lazy deletion), so both
+# pushing a reschedule and taking the next due question are O(log n). The due
+# times are also kept in a sorted list, so counting the due questions is a binary
+# search; keeping it sorted costs an O(n) memmove per answer, which for banks of
+# thousands of questions is a few microseconds.
+#
+# The saved state records the timestamp of the latest attempt it includes. On
+# load, attempts recorded after it (e.g. answers submitted through the API) are
+# replayed, so the schedule follows the whole attempt history.
+
+import bisect
+import heapq
+import json
+import os
+import random
+import re
+import time
+
+REVIEW_FORMAT_VERSION = 1
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+SECONDS_PER_DAY = 86400
+RELEARN_DELAY = 10 * 60 # Seconds until a wrongly answered question is due again
+SLOW_ANSWER_SECONDS = 90 # Correct answers slower than this count as hesitant
+
+# Elo: a question's rating comes from its difficulty label
+DEFAULT_SKILL_RATING = 1500.0
+DIFFICULTY_RATINGS = {"Easy": 1350.0, "Medium": 1500.0, "Hard": 1650.0}
+ELO_K = 32.0
+
+def get_review_dir():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '..', 'user_data', 'review'))
+
+def get_review_file_path(user=None):
+    # One file per user; the single-user mode (no name) uses "default"
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', user) if user else "default"
+    return os.path.join(get_review_dir(), f"{safe_name}.json")
+
+def expected_score(skill_rating, question_rating):
+    """Elo probability that a student with `skill_rating` answers the question correctly."""
+    return 1.0 / (1.0 + 10 ** ((question_rating - skill_rating) / 400.0))
+
+class ReviewState:
+    __slots__ = ("ease", "interval_days", "repetitions", "due", "lapses", "attempts", "correct", "version")
+
+    def __init__(self, ease=DEFAULT_EASE, interval_days=0.0, repetitions=0, due=0.0, lapses=0, attempts=0, correct=0):
+        self.ease = ease
+        self.interval_days = interval_days
+        self.repetitions = repetitions
+        self.due = due
+        self.lapses = lapses
+        self.attempts = attempts
+        self.correct = correct
+        self.version = 0
+
+    def to_list(self):
+        return [round(self.ease, 4), round(self.interval_days, 4), self.repetitions, self.due,
+                self.lapses, self.attempts, self.correct]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+class ReviewScheduler:
+    """
+    Per-user review state and skill ratings.
+
+    Args:
+        user (str, optional): Student name; None is the single-user mode.
+        path (str, optional): State file; defaults to user_data/review/<user>.json.
+    """
+
+    def __init__(self, user=None, path=None):
+        self.user = user
+        self.path = path or get_review_file_path(user)
+        self.states = {}        # question_id -> ReviewState
+        self.skill_ratings = {} # skill -> [rating, answers]
+        self._heap = []         # (due, question_id, version)
+        self._due_times = []    # Every question's due time, sorted
+        self.history_ts = None  # Timestamp of the latest attempt applied
+
+    # --- Persistence ---
+
+    @classmethod
+    def load(cls, user=None, path=None, history=None):
+        """
+        Loads the user's saved state and brings it up to date by replaying the
+        attempts in `history` recorded after the state was saved; without saved
+        state the whole history is replayed. `history` holds attempt records as in
+        src.user_progress.iter_attempts, oldest first, together with the questions
+        they refer to, as (attempt, question) pairs.
+        """
+        scheduler = cls(user, path)
+        if os.path.exists(scheduler.path):
+            try:
+                with open(scheduler.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == REVIEW_FORMAT_VERSION:
+                    scheduler.states = {question_id: ReviewState.from_list(values)
+                                        for question_id, values in data["questions"].items()}
+                    scheduler.skill_ratings = {skill: list(values) for skill, values in data["skills"].items()}
+                    # State saved before the watermark existed covers everything up to its last save
+                    scheduler.history_ts = data.get("history_ts", os.path.getmtime(scheduler.path))
+                    scheduler._rebuild_heap()
+            except (json.JSONDecodeError, IOError, KeyError, TypeError) as e:
+                print(f"Error loading review state from {scheduler.path}: {e}. Rebuilding it from the attempt history.")
+                scheduler = cls(user, path)
+        watermark = scheduler.history_ts
+        for attempt, question in history or ():
+            timestamp = attempt.get("ts")
+            if watermark is None or (timestamp is not None and timestamp > watermark):
+                scheduler.record_answer(question, attempt["correct"], attempt.get("elapsed"), now=timestamp)
+        return scheduler
+
+    def save(self):
+        data = {
+            "version": REVIEW_FORMAT_VERSION,
+            "questions": {question_id: state.to_list() for question_id, state in self.states.items()},
+            "skills": {skill: [round(rating, 2), answers] for skill, (rating, answers) in self.skill_ratings.items()},
+            "history_ts": self.history_ts,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+        except IOError as e:
+            print(f"Error saving review state to {self.path}: {e}")
+
+    def _rebuild_heap(self):
+        self._heap = [(state.due, question_id, state.version) for question_id, state in self.states.items()]
+        heapq.heapify(self._heap)
+        self._due_times = sorted(state.due for state in self.states.values())
+
+    # --- Updating ---
+
+    def skill_rating(self, skill):
+        return self.skill_ratings.get(skill, [DEFAULT_SKILL_RATING, 0])[0]
+
+    def record_answer(self, question, correct, elapsed_seconds=None, now=None):
+        """
+        Updates the question's review schedule and its skill's rating after one
+        answer. Pass the timestamp the attempt was recorded with as `now`, so a
+        later load does not replay it again.
+        """
+        now = now if now is not None else time.time()
+        if self.history_ts is None or now > self.history_ts:
+            self.history_ts = now
+        question_id = question['id']
+        state = self.states.get(question_id)
+        if state is None:
+            state = self.states[question_id] = ReviewState()
+        else:
+            del self._due_times[bisect.bisect_left(self._due_times, state.due)]
+
+        # SM-2 with three answer grades: wrong (1), correct but slow (3), correct (4)
+        if not correct:
+            grade = 1
+        elif elapsed_seconds is not None and elapsed_seconds > SLOW_ANSWER_SECONDS:
+            grade = 3
+        else:
+            grade = 4
+        state.attempts += 1
+        if grade < 3:
+            state.repetitions = 0
+            state.interval_days = 0.0
+            state.lapses += 1
+            state.due = now + RELEARN_DELAY
+        else:
+            state.correct += 1
+            state.repetitions += 1
+            if state.repetitions == 1:
+                state.interval_days = 1.0
+            elif state.repetitions == 2:
+                state.interval_days = 6.0
+            else:
+                state.interval_days *= state.ease
+            state.due = now + state.interval_days * SECONDS_PER_DAY
+        state.ease = max(MIN_EASE, state.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+
+        # Lazy deletion: the previous heap entry becomes stale once the version changes
+        state.version += 1
+        heapq.heappush(self._heap, (state.due, question_id, state.version))
+        bisect.insort(self._due_times, state.due)
+        if len(self._heap) > 2 * len(self.states) + 64:
+            self._rebuild_heap() # Drop the stale entries once they outnumber the live ones
+
+        skill = question['skill']
+        rating, answers = self.skill_ratings.get(skill, [DEFAULT_SKILL_RATING, 0])
+        question_rating = DIFFICULTY_RATINGS.get(question['difficulty'], DEFAULT_SKILL_RATING)
+        rating += ELO_K * ((1.0 if correct else 0.0) - expected_score(rating, question_rating))
+        self.skill_ratings[skill] = [rating, answers + 1]
+
+    # --- Selecting ---
+
+    def due_count(self, now=None):
+        now = now if now is not None else time.time()
+        return bisect.bisect_right(self._due_times, now)
+
+    def next_due(self, limit, now=None):
+        """
+        Returns up to `limit` question IDs that are due, most overdue first. They stay
+        scheduled until they are answered.
+        """
+        now = now if now is not None else time.time()
+        heap = self._heap
+        taken = []
+        while heap and len(taken) < limit and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            due, question_id, version = entry
+            state = self.states.get(question_id)
+            if state is None or state.version != version:
+                continue # Stale entry left behind by a reschedule
+            taken.append(entry)
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [question_id for _, question_id, _ in taken]
+
+    def weakest_skills(self, skills):
+        """`skills` ordered from the lowest to the highest rating (unrated skills count as average)."""
+        return sorted(skills, key=lambda skill: (self.skill_rating(skill), skill))
+
+    def select_session(self, question_index, n, exclude_ids=(), now=None, rng=random):
+        """
+        Picks a review session: due questions first, then new questions from the
+        skills with the lowest ratings.
+
+        Returns:
+            list: (question, "review" or "new") pairs.
+        """
+        session = [(question_index.questions[question_index.positions_by_id[question_id]], "review")
+                   for question_id in self.next_due(n, now) if question_id in question_index.positions_by_id]
+        if len(session) < n:
+            seen_ids = set(self.states) | set(exclude_ids)
+            for skill in self.weakest_skills(question_index.values("skill")):
+                new_questions = question_index.sample(n - len(session), skill=skill, exclude_ids=seen_ids, rng=rng)
+                session.extend((question, "new") for question in new_questions)
+                if len(session) >= n:
+                    break
+        return session
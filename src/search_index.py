@@ -0,0 +1,185 @@
+# satELA/src/search_index.py
+#
+# Inverted full-text index over question text and rationales, ranked with BM25.
+#
+# The index maps each term to a posting list {question_id: term frequency} and keeps
+# the length and a content hash of every indexed question. update() re-tokenizes
+# only questions whose text changed, so re-parsing the bank keeps the index current
+# without rebuilding it. The index is saved as JSON next to the question bank.
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+
+SEARCH_INDEX_FORMAT_VERSION = 1
+# Fields that are searched
+INDEXED_TEXT_FIELDS = ("question_text", "explanation")
+
+# Standard BM25 parameters: term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the their this to was were which
+with what who how does do not text""".split())
+
+def get_search_index_file_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(current_dir, '..', 'data', 'processed_questions', 'search_index.json')
+    return os.path.abspath(file_path)
+
+def tokenize(text):
+    """Lowercased word tokens of `text`, without stop words."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+def _document_text(question):
+    return '\n'.join(question[field] for field in INDEXED_TEXT_FIELDS)
+
+def _document_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class SearchIndex:
+    """
+    BM25-ranked inverted index over a question bank.
+
+    Args:
+        path (str, optional): Where save() writes the index; defaults to
+            data/processed_questions/search_index.json.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_search_index_file_path()
+        self.postings = {}      # term -> {question_id: term frequency}
+        self.documents = {}     # question_id -> [content hash, length in tokens]
+        self.total_length = 0
+        self._length_norms = None
+
+    @classmethod
+    def load(cls, path=None):
+        """Loads a saved index; returns an empty one if the file is missing or unusable."""
+        index = cls(path)
+        if not os.path.exists(index.path):
+            return index
+        try:
+            with open(index.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading search index from {index.path}: {e}. Rebuilding it.")
+            return index
+        if not isinstance(data, dict) or data.get("version") != SEARCH_INDEX_FORMAT_VERSION:
+            return index
+        index.documents = data["documents"]
+        index.postings = data["postings"]
+        index.total_length = sum(length for _, length in index.documents.values())
+        return index
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": SEARCH_INDEX_FORMAT_VERSION, "documents": self.documents,
+                       "postings": self.postings}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def __len__(self):
+        return len(self.documents)
+
+    # --- Building ---
+
+    def _remove_documents(self, question_ids):
+        # One pass over the vocabulary removes every stale posting
+        question_ids = set(question_ids)
+        for question_id in question_ids:
+            self.total_length -= self.documents.pop(question_id)[1]
+        for term in list(self.postings):
+            posting_list = self.postings[term]
+            for question_id in question_ids.intersection(posting_list):
+                del posting_list[question_id]
+            if not posting_list:
+                del self.postings[term]
+
+    def _add_document(self, question_id, text, content_hash):
+        tokens = tokenize(text)
+        term_frequencies = {}
+        for token in tokens:
+            term_frequencies[token] = term_frequencies.get(token, 0) + 1
+        for term, frequency in term_frequencies.items():
+            self.postings.setdefault(term, {})[question_id] = frequency
+        self.documents[question_id] = [content_hash, len(tokens)]
+        self.total_length += len(tokens)
+
+    def update(self, questions):
+        """
+        Brings the index in line with `questions`: new and changed questions are
+        (re-)indexed, questions that are no longer in the bank are dropped.
+
+        Returns:
+            tuple: (number of questions indexed, number removed).
+        """
+        current = {}
+        for question in questions:
+            text = _document_text(question)
+            current[question['id']] = (text, _document_hash(text))
+
+        stale_ids = [question_id for question_id, (content_hash, _) in self.documents.items()
+                     if question_id not in current or current[question_id][1] != content_hash]
+        removed_count = sum(1 for question_id in stale_ids if question_id not in current)
+        if stale_ids:
+            self._remove_documents(stale_ids)
+
+        indexed_count = 0
+        for question_id, (text, content_hash) in current.items():
+            if question_id not in self.documents:
+                self._add_document(question_id, text, content_hash)
+                indexed_count += 1
+        if indexed_count or stale_ids:
+            self._length_norms = None
+        return indexed_count, removed_count
+
+    # --- Querying ---
+
+    def _get_length_norms(self):
+        # BM25's per-document denominator term k1 * (1 - b + b * length / average length)
+        if self._length_norms is None:
+            average_length = self.total_length / len(self.documents) if self.documents else 1.0
+            self._length_norms = {
+                question_id: BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0))
+                for question_id, (_, length) in self.documents.items()
+            }
+        return self._length_norms
+
+    def search(self, query, limit=10):
+        """
+        Ranks questions against a free-text query with BM25.
+
+        Returns:
+            list: Up to `limit` (question_id, score) pairs, best match first.
+        """
+        length_norms = self._get_length_norms()
+        document_count = len(self.documents)
+        scores = {}
+        for term in set(tokenize(query)):
+            posting_list = self.postings.get(term)
+            if not posting_list:
+                continue
+            idf = math.log(1 + (document_count - len(posting_list) + 0.5) / (len(posting_list) + 0.5))
+            for question_id, frequency in posting_list.items():
+                scores[question_id] = scores.get(question_id, 0.0) + \
+                    idf * frequency * (BM25_K1 + 1) / (frequency + length_norms[question_id])
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+def refresh_search_index(questions, path=None):
+    """Loads the saved index, updates it for `questions` and saves it if anything changed."""
+    search_index = SearchIndex.load(path)
+    indexed_count, removed_count = search_index.update(questions)
+    if indexed_count or removed_count:
+        try:
+            search_index.save()
+        except IOError as e:
+            print(f"Warning: Could not save the search index to {search_index.path}: {e}")
+        print(f"Search index updated: {indexed_count} questions indexed, {removed_count} removed.")
+    return search_index
@@ -0,0 +1,307 @@
+# satELA/src/session_bundles.py
+#
+# Pre-built practice sessions ("bundles") for the API server.
+#
+# A bundle is a balanced draw from a user's uncompleted questions (spread as evenly
+# as possible over domains, then skills, then difficulties, with at most one
+# question per near-duplicate cluster), already rendered into the bytes of the
+# POST /sessions response. The correct answers are kept next to the rendered body,
+# never inside it.
+#
+# SessionBundlePool keeps a few ready bundles for every (user, count, filters)
+# combination that has been asked for. Starting a session takes one from a deque,
+# and a background thread pool builds the replacement. Bundles that contain a
+# question the user has since answered are dropped and rebuilt.
+#
+# A user's completed questions are read from the progress database (as the
+# uncompleted IDs of the bank) the first time the user is seen, then kept current
+# from the answers reported to mark_answered, so refills do not query the database.
+
+import json
+import random
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.near_duplicates import sample_distinct_questions
+from src.question_index import INDEXED_FIELDS
+
+DEFAULT_BUNDLES_PER_KEY = 2
+DEFAULT_MAX_KEYS = 10000
+DEFAULT_BUILD_WORKERS = 4
+
+def spread_evenly(n, capacities, rng=random):
+    """
+    Splits n slots over groups as evenly as their capacities allow.
+
+    Args:
+        capacities (dict): Group -> maximum number of slots it can take.
+
+    Returns:
+        dict: Group -> number of slots; groups that get the odd slots are chosen at random.
+    """
+    allocation = dict.fromkeys(capacities, 0)
+    open_groups = [group for group, capacity in capacities.items() if capacity > 0]
+    rng.shuffle(open_groups)
+    remaining = n
+    while remaining and open_groups:
+        share, extra = divmod(remaining, len(open_groups))
+        still_open = []
+        for i, group in enumerate(open_groups):
+            taken = min(share + (i < extra), capacities[group] - allocation[group])
+            allocation[group] += taken
+            remaining -= taken
+            if allocation[group] < capacities[group]:
+                still_open.append(group)
+        open_groups = still_open
+    return allocation
+
+def _allocate_slots(question_index, available, n, fields, filters, rng):
+    # Spreads n slots over the values of fields[0], then recursively over the
+    # remaining fields within each value. Returns [(filters, slots)] leaves.
+    if not fields:
+        return [(filters, n)]
+    field = fields[0]
+    groups = {value: available & bitmap for value, bitmap in question_index.bitmaps[field].items()}
+    allocation = spread_evenly(n, {value: bits.bit_count() for value, bits in groups.items()}, rng)
+    leaves = []
+    for value, slots in allocation.items():
+        if slots:
+            leaves.extend(_allocate_slots(question_index, groups[value], slots, fields[1:],
+                                          dict(filters, **{field: value}), rng))
+    return leaves
+
+def balanced_sample(question_index, n, cluster_of, cluster_members, exclude_ids=None, rng=random, **filters):
+    """
+    Draws up to n questions matching `filters` (as for QuestionIndex.query), spread
+    evenly over domains, skills and difficulties, with no two questions from the
+    same near-duplicate cluster.
+
+    Args:
+        cluster_of (dict): Question ID -> cluster number (see near_duplicates.cluster_lookup).
+        cluster_members (dict): Cluster number -> IDs of its questions.
+
+    Returns:
+        list: The questions, in random order.
+    """
+    excluded = set(exclude_ids or ())
+    filters = {field: value for field, value in filters.items() if value is not None}
+    available = question_index.query(exclude_ids=excluded, **filters)
+    selected = []
+
+    def take(questions):
+        for question in questions:
+            selected.append(question)
+            excluded.add(question['id'])
+            cluster = cluster_of.get(question['id'])
+            if cluster is not None:
+                excluded.update(cluster_members[cluster])
+
+    for leaf_filters, slots in _allocate_slots(question_index, available, n, INDEXED_FIELDS, {}, rng):
+        take(sample_distinct_questions(question_index, slots, cluster_of, exclude_ids=excluded, rng=rng,
+                                       **dict(filters, **leaf_filters)))
+    if len(selected) < n:
+        # Leaves that ran short because of near-duplicates are topped up from anywhere
+        take(sample_distinct_questions(question_index, n - len(selected), cluster_of, exclude_ids=excluded,
+                                       rng=rng, **filters))
+    rng.shuffle(selected)
+    return selected
+
+class SessionBundle:
+    """One ready-to-serve session: the rendered response body plus the answer key."""
+
+    __slots__ = ("question_ids", "answers", "body")
+
+    def __init__(self, question_ids, answers, body):
+        self.question_ids = question_ids
+        self.answers = answers # question_id -> correct answer; never sent with the body
+        self.body = body       # Response body after the session ID: b'"question_ids":[...],"questions":[...]}'
+
+    def response_body(self, session_id):
+        return b'{"session_id":"' + session_id.encode('ascii') + b'",' + self.body
+
+class SessionBundlePool:
+    """
+    Ready session bundles per (user, count, filters), refilled in the background.
+
+    Args:
+        question_index (QuestionIndex): The question bank.
+        cluster_of (dict): Question ID -> near-duplicate cluster number.
+        render_question (callable): Question ID -> public JSON body (bytes) of that question.
+        load_uncompleted (callable): User -> IDs of the questions the user has not
+            completed yet, or None if they could not be read.
+        bundles_per_key (int): Bundles kept ready for each combination.
+        max_keys (int): Combinations tracked; the least recently used are dropped.
+        workers (int): Threads building bundles.
+    """
+
+    def __init__(self, question_index, cluster_of, render_question, load_uncompleted,
+                 bundles_per_key=DEFAULT_BUNDLES_PER_KEY, max_keys=DEFAULT_MAX_KEYS, workers=DEFAULT_BUILD_WORKERS):
+        self.question_index = question_index
+        self.cluster_of = cluster_of
+        self.cluster_members = {}
+        for question_id, cluster in cluster_of.items():
+            self.cluster_members.setdefault(cluster, []).append(question_id)
+        self.render_question = render_question
+        self.load_uncompleted = load_uncompleted
+        self.bundles_per_key = bundles_per_key
+        self.max_keys = max_keys
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session-bundles")
+        self.lock = threading.Lock()
+        self.ready = OrderedDict()         # key -> deque of SessionBundle, least recently used first
+        self.keys_by_user = {}             # user -> keys in self.ready
+        self.building = set()              # keys with a build in progress (one at a time per key)
+        self.last_served = {}              # key -> IDs of the bundle served last
+        self.answered_during_build = {}    # user -> [builds in progress, IDs answered meanwhile]
+        self.completed_bits = {}           # user -> bitmap of questions completed when the user was first seen
+        self.answered_bits = {}            # user -> bitmap of questions answered since then
+        self.hits = 0
+        self.misses = 0
+        self.built = 0
+        self.discarded = 0
+
+    @staticmethod
+    def make_key(user, count, filters):
+        return (user, count) + tuple(filters.get(field) for field in INDEXED_FIELDS)
+
+    # --- Building ---
+
+    def _completed_bits(self, user):
+        # The answers are kept apart from the loaded set so that one reported while
+        # the database is being read is not lost.
+        with self.lock:
+            completed_bits = self.completed_bits.get(user)
+        if completed_bits is None:
+            uncompleted_ids = self.load_uncompleted(user)
+            completed_bits = 0
+            if uncompleted_ids is not None:
+                completed_bits = self.question_index.all_bits & ~self.question_index.bitmap_for_ids(uncompleted_ids)
+                with self.lock:
+                    if user in self.keys_by_user:
+                        self.completed_bits[user] = completed_bits
+        with self.lock:
+            return completed_bits | self.answered_bits.get(user, 0)
+
+    def build(self, user, count, filters, exclude_ids=(), rng=None):
+        """
+        Builds one bundle right away (blocking: reads the user's uncompleted
+        questions the first time the user is seen).
+        """
+        within = self.question_index.all_bits & ~self._completed_bits(user)
+        questions = balanced_sample(self.question_index, count, self.cluster_of, self.cluster_members,
+                                    exclude_ids=exclude_ids, rng=rng or random.Random(), within=within, **filters)
+        question_ids = [question['id'] for question in questions]
+        body = b''.join((
+            b'"question_ids":', json.dumps(question_ids).encode('utf-8'),
+            b',"questions":[', b','.join(self.render_question(question_id) for question_id in question_ids), b']}',
+        ))
+        return SessionBundle(question_ids, {question['id']: question['correct_answer'] for question in questions}, body)
+
+    def _schedule_refill(self, key):
+        # Called with the lock held. Builds for one key run one after another, so
+        # each can exclude the questions of the bundles already waiting.
+        bundles = self.ready.get(key)
+        if key in self.building or bundles is None or len(bundles) >= self.bundles_per_key:
+            return
+        self.building.add(key)
+        self.answered_during_build.setdefault(key[0], [0, set()])[0] += 1
+        exclude_ids = set(self.last_served.get(key, ()))
+        for bundle in bundles:
+            exclude_ids.update(bundle.question_ids)
+        self.executor.submit(self._build_in_background, key, exclude_ids)
+
+    def _build_in_background(self, key, exclude_ids):
+        user, count = key[0], key[1]
+        filters = dict(zip(INDEXED_FIELDS, key[2:]))
+        bundle = None
+        try:
+            bundle = self.build(user, count, filters, exclude_ids)
+        except Exception as e:
+            print(f"Error building a session bundle for {user}: {e}")
+        with self.lock:
+            self.building.discard(key)
+            build_state = self.answered_during_build[user]
+            usable = bool(bundle and bundle.question_ids) and build_state[1].isdisjoint(bundle.question_ids)
+            build_state[0] -= 1
+            if not build_state[0]:
+                del self.answered_during_build[user]
+            bundles = self.ready.get(key)
+            if bundles is None:
+                return # The key was evicted meanwhile
+            if usable:
+                bundles.append(bundle)
+                self.built += 1
+                self._schedule_refill(key)
+            elif bundle is not None and bundle.question_ids:
+                self.discarded += 1
+                self._schedule_refill(key) # Rebuild without the questions answered meanwhile
+
+    # --- Serving ---
+
+    def take(self, user, count, filters):
+        """
+        Returns a ready bundle for the combination (and starts building its
+        replacement), or None if there is none yet; either way the combination is
+        kept stocked from now on.
+        """
+        key = self.make_key(user, count, filters)
+        with self.lock:
+            bundles = self.ready.get(key)
+            if bundles is None:
+                bundles = self.ready[key] = deque()
+                self.keys_by_user.setdefault(user, set()).add(key)
+                while len(self.ready) > self.max_keys:
+                    evicted_key, _ = self.ready.popitem(last=False)
+                    self.last_served.pop(evicted_key, None)
+                    user_keys = self.keys_by_user[evicted_key[0]]
+                    user_keys.discard(evicted_key)
+                    if not user_keys:
+                        # Reloaded from the database if the user comes back
+                        del self.keys_by_user[evicted_key[0]]
+                        self.completed_bits.pop(evicted_key[0], None)
+                        self.answered_bits.pop(evicted_key[0], None)
+            else:
+                self.ready.move_to_end(key)
+            bundle = bundles.popleft() if bundles else None
+            if bundle is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.last_served[key] = bundle.question_ids
+            self._schedule_refill(key)
+        return bundle
+
+    def served(self, user, count, filters, bundle):
+        """Records a bundle built on demand after a miss, so refills do not repeat its questions."""
+        with self.lock:
+            key = self.make_key(user, count, filters)
+            if key in self.ready:
+                self.last_served[key] = bundle.question_ids
+
+    def mark_answered(self, user, question_id):
+        """
+        Drops the user's ready bundles that contain a question they have just
+        answered, and keeps the question out of the user's later bundles.
+        """
+        with self.lock:
+            position = self.question_index.positions_by_id.get(question_id)
+            if position is not None and user in self.keys_by_user:
+                self.answered_bits[user] = self.answered_bits.get(user, 0) | (1 << position)
+            if user in self.answered_during_build:
+                self.answered_during_build[user][1].add(question_id)
+            for key in self.keys_by_user.get(user, ()):
+                bundles = self.ready[key]
+                fresh_bundles = [bundle for bundle in bundles if question_id not in bundle.answers]
+                if len(fresh_bundles) < len(bundles):
+                    self.discarded += len(bundles) - len(fresh_bundles)
+                    bundles.clear()
+                    bundles.extend(fresh_bundles)
+                    self._schedule_refill(key)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "built": self.built, "discarded": self.discarded,
+                    "ready": sum(len(bundles) for bundles in self.ready.values()), "keys": len(self.ready)}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
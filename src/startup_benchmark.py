@@ -0,0 +1,111 @@
+# satELA/src/startup_benchmark.py
+#
+# Warm-start benchmark for src/main.py. Imports the CLI in fresh interpreters with
+# `python -X importtime`, reports the slowest imports and fails (exit code 1) when
+# the median import time exceeds the budget or a cold-parse-only module (pdfminer,
+# the PDF scraper, the block parser) is imported on the warm path.
+#
+#   python src/startup_benchmark.py                  # default budget
+#   python src/startup_benchmark.py --budget-ms 80 --runs 10
+#   python src/startup_benchmark.py --load           # also time loading the question bank
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+
+DEFAULT_BUDGET_MS = 60.0
+DEFAULT_RUNS = 7
+# Modules that only a cold parse needs; importing any of them on a warm start is a regression
+COLD_ONLY_MODULES = ("pdfminer", "src.pdf_scraper", "src.question_parser", "src.fast_parser", "src.parse_cache",
+                     "src.page_cache", "numpy", "src.analytics")
+
+IMPORT_STATEMENT = "import src.main"
+LOAD_STATEMENT = ("import time; start = time.perf_counter(); import src.main; "
+                  "src.main.ensure_questions_parsed(); "
+                  "print(f'warm-start-seconds {time.perf_counter() - start:.6f}')")
+
+def parse_importtime(stderr_text):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        list: (module, self microseconds, cumulative microseconds, depth) per import.
+    """
+    imports = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+def run_once(statement):
+    # A fresh interpreter per run, started from the project root like `python src/main.py`
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=project_root_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed:\n{result.stderr[-2000:]}")
+    return result
+
+def measure(runs, statement):
+    import_totals = []
+    warm_start_times = []
+    last_imports = []
+    for _ in range(runs):
+        result = run_once(statement)
+        imports = parse_importtime(result.stderr)
+        # Only the modules imported by the statement itself; the interpreter's own
+        # startup imports are the same for every program.
+        main_imports = [entry for entry in imports if entry[0] == "src.main"]
+        import_totals.append(main_imports[-1][2] / 1000 if main_imports else 0.0)
+        for line in result.stdout.splitlines():
+            if line.startswith("warm-start-seconds "):
+                warm_start_times.append(float(line.split()[1]) * 1000)
+        last_imports = imports
+    return import_totals, warm_start_times, last_imports
+
+def print_report(import_totals, warm_start_times, imports, top):
+    print(f"src.main import time over {len(import_totals)} runs: "
+          f"median {statistics.median(import_totals):.1f} ms, min {min(import_totals):.1f} ms, "
+          f"max {max(import_totals):.1f} ms")
+    if warm_start_times:
+        print(f"Warm start (import + load question bank): median {statistics.median(warm_start_times):.1f} ms")
+    print(f"\nSlowest imports (self time, last run):")
+    for name, self_us, cumulative_us, _ in sorted(imports, key=lambda entry: entry[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:7.2f} ms self  {cumulative_us / 1000:7.2f} ms cumulative  {name}")
+
+def find_cold_only_imports(imports):
+    return sorted({name for name, _, _, _ in imports
+                   if any(name == module or name.startswith(module + '.') for module in COLD_ONLY_MODULES)})
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Check that src/main.py starts within its import-time budget.")
+    arg_parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                            help=f"Maximum median import time of src.main (default: {DEFAULT_BUDGET_MS:g} ms).")
+    arg_parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="Fresh interpreter runs to take the median over.")
+    arg_parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to list.")
+    arg_parser.add_argument('--load', action='store_true',
+                            help="Also load the pre-parsed question bank and time the whole warm start.")
+    args = arg_parser.parse_args()
+
+    import_totals, warm_start_times, imports = measure(args.runs, LOAD_STATEMENT if args.load else IMPORT_STATEMENT)
+    print_report(import_totals, warm_start_times, imports, args.top)
+
+    failures = []
+    median_ms = statistics.median(import_totals)
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds the {args.budget_ms:g} ms budget")
+    cold_only_imports = find_cold_only_imports(imports)
+    if cold_only_imports:
+        failures.append(f"cold-parse modules imported on the warm path: {', '.join(cold_only_imports[:10])}")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print(f"\nOK: warm start is within the {args.budget_ms:g} ms budget.")
@@ -1,40 +1,132 @@
-import json
+import atexit
 import os
+import sqlite3
+import sys
+import time
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.progress_db import ProgressDatabase
+from src.progress_journal import ProgressJournal
 
 def get_user_progress_file_path():
     current_dir = os.path.dirname(__file__)
     file_path = os.path.join(current_dir, '..', 'user_data', 'completed_questions.json')
     return os.path.abspath(file_path)
 
-def load_completed_questions():
-    filename = get_user_progress_file_path()
-    if not os.path.exists(filename):
-        return []
+def get_progress_journal_file_path():
+    current_dir = os.path.dirname(__file__)
+    file_path = os.path.join(current_dir, '..', 'user_data', 'progress_journal.ndjson')
+    return os.path.abspath(file_path)
+
+_progress_journal = None
+
+def get_progress_journal():
+    # One journal per process so fsync batching spans the whole session
+    global _progress_journal
+    if _progress_journal is None:
+        _progress_journal = ProgressJournal(get_progress_journal_file_path(), get_user_progress_file_path())
+        # Attempts still waiting for their batch fsync reach the disk when the program exits
+        atexit.register(close_progress_journal)
+    return _progress_journal
+
+def close_progress_journal():
+    """Syncs and closes the single-user journal, if it was opened."""
+    global _progress_journal
+    if _progress_journal is not None:
+        try:
+            _progress_journal.close()
+        except (IOError, OSError) as e:
+            print(f"Error syncing the progress journal: {e}")
+        _progress_journal = None
+
+_progress_db = None
+
+def get_progress_db():
+    # Shared by every named user; the database keeps its own connection pool
+    global _progress_db
+    if _progress_db is None:
+        _progress_db = ProgressDatabase()
+    return _progress_db
+
+def use_progress_db(db_path):
+    """Points the per-user backend at another database file (e.g. for load tests)."""
+    global _progress_db
+    if _progress_db is not None:
+        _progress_db.close()
+    _progress_db = ProgressDatabase(db_path)
+    return _progress_db
+
+# Without a user name, progress goes to the single-user journal in user_data/;
+# with one, it goes to the multi-user SQLite database (user_data/progress.db).
+
+def record_attempt(question_id, answer, correct, elapsed_seconds=None, user=None):
+    """Stores one answered question as soon as it is answered; returns the timestamp it was recorded with."""
+    answered_at = time.time()
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return [str(item) for item in data]
-            else:
-                print(f"Warning: Data in {filename} is not a list. Returning empty list.")
-                return []
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from {filename}: {e}. Returning empty list.")
-        return []
-    except IOError as e:
-        print(f"Error loading completed questions from file {filename}: {e}. Returning empty list.")
+        if user is None:
+            get_progress_journal().record_attempt(question_id, answer, correct, elapsed_seconds, answered_at)
+        else:
+            get_progress_db().record_attempt(user, str(question_id), answer, correct, elapsed_seconds, answered_at)
+    except (IOError, OSError, sqlite3.Error) as e:
+        print(f"Error recording attempt for question {question_id}: {e}")
+    return answered_at
+
+def load_completed_questions(user=None):
+    try:
+        if user is None:
+            return sorted(get_progress_journal().load_completed())
+        return get_progress_db().completed_ids(user)
+    except (IOError, OSError, sqlite3.Error) as e:
+        print(f"Error loading completed questions: {e}. Returning empty list.")
         return []
 
-def save_completed_questions(question_ids):
-    filename = get_user_progress_file_path()
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+def save_completed_questions(question_ids, user=None):
+    # For the journal this is a compaction: it writes a snapshot of the completed set
+    # covering every attempt recorded so far.
+    question_ids = [str(question_id) for question_id in question_ids]
+    filename = get_user_progress_file_path() if user is None else get_progress_db().db_path
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(list(set(question_ids)), f, indent=2, ensure_ascii=False)
-        print(f"Successfully saved {len(set(question_ids))} completed question IDs to {filename}")
-    except IOError as e:
+        if user is None:
+            saved_count = get_progress_journal().compact(question_ids)
+        else:
+            get_progress_db().set_completed(user, question_ids)
+            saved_count = len(set(question_ids))
+        print(f"Successfully saved {saved_count} completed question IDs to {filename}")
+    except (IOError, OSError, sqlite3.Error) as e:
         print(f"Error saving completed questions to file {filename}: {e}")
 
+def iter_attempts(user=None):
+    """Yields the user's recorded attempts ({"id", "answer", "correct", "ts", "elapsed"}) oldest first."""
+    try:
+        if user is None:
+            yield from get_progress_journal().iter_attempts()
+        else:
+            yield from get_progress_db().iter_attempts(user)
+    except (IOError, OSError, sqlite3.Error) as e:
+        print(f"Error reading attempt history: {e}")
+
+def register_question_ids(all_question_ids):
+    """Tells the per-user database which question IDs make up the current bank."""
+    try:
+        get_progress_db().sync_question_ids(all_question_ids)
+    except sqlite3.Error as e:
+        print(f"Error registering question IDs in {get_progress_db().db_path}: {e}")
+
+def load_uncompleted_question_ids(user):
+    """
+    Returns the IDs of the registered questions (see register_question_ids) that the
+    named user has not completed, or None if the database could not be read.
+    """
+    try:
+        return get_progress_db().uncompleted_ids(user)
+    except sqlite3.Error as e:
+        print(f"Error loading uncompleted questions: {e}")
+        return None
+
 if __name__ == "__main__":
     print("Testing user_progress.py...")
     test_q_ids = ["q1", "q2", "q3", "q1"]
@@ -45,4 +137,13 @@ if __name__ == "__main__":
 
     loaded_ids.append("q4")
     save_completed_questions(loaded_ids)
-    print("Reloaded IDs after adding q4:", load_completed_questions())
\ No newline at end of file
+    print("Reloaded IDs after adding q4:", load_completed_questions())
+
+    record_attempt("q5", "B", True, 12.5)
+    print("Reloaded IDs after answering q5:", load_completed_questions())
+
+    save_completed_questions(["q1", "q2"], user="test_user")
+    record_attempt("q3", "C", False, 8.0, user="test_user")
+    print("IDs for test_user:", load_completed_questions(user="test_user"))
+    register_question_ids(["q1", "q2", "q3", "q4"])
+    print("Uncompleted for test_user:", load_uncompleted_question_ids("test_user"))
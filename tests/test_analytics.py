@@ -0,0 +1,151 @@
+# satELA/tests/test_analytics.py
+#
+# The vectorized statistics against the same numbers computed with plain loops
+# over the attempt records.
+
+import datetime
+import os
+import random
+import statistics
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+np = pytest.importorskip("numpy")
+
+from src import analytics
+from src.analytics import AttemptTable, QuestionTable, breakdown, daily_progress, summarize
+from src.progress_db import ProgressDatabase
+
+DOMAINS = {"Craft and Structure": ("Words in Context", "Text Structure and Purpose"),
+           "Information and Ideas": ("Inferences", "Central Ideas and Details"),
+           "Standard English Conventions": ("Boundaries", "Form, Structure, and Sense")}
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+USERS = ("ann", "bob", "cid")
+
+@pytest.fixture(scope="module")
+def questions():
+    rng = random.Random(0)
+    questions = []
+    for i in range(120):
+        domain = rng.choice(sorted(DOMAINS))
+        questions.append({"id": f"{i:08x}", "domain": domain, "skill": rng.choice(DOMAINS[domain]),
+                          "difficulty": rng.choice(DIFFICULTIES)})
+    return questions
+
+@pytest.fixture(scope="module")
+def records(questions):
+    # Attempts over two weeks, some untimed, some on questions no longer in the bank
+    rng = random.Random(1)
+    start = 1.7e9
+    records = []
+    for _ in range(1500):
+        question_id = rng.choice(questions)["id"] if rng.random() < 0.95 else f"gone{rng.randrange(5)}"
+        records.append({"user": rng.choice(USERS), "id": question_id, "correct": rng.random() < 0.6,
+                        "ts": start + rng.random() * 14 * 86400,
+                        "elapsed": round(rng.uniform(5, 200), 1) if rng.random() < 0.9 else None})
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+def loop_breakdown(questions, records, field):
+    # Plain-Python version of breakdown()
+    question_of = {question["id"]: question for question in questions}
+    bank_counts = {}
+    for question in questions:
+        if field != "user":
+            bank_counts[question[field]] = bank_counts.get(question[field], 0) + 1
+    groups = {}
+    for record in records:
+        question = question_of.get(record["id"])
+        if question is None:
+            continue
+        label = record["user"] if field == "user" else question[field]
+        groups.setdefault(label, []).append(record)
+    rows = []
+    for label in sorted(groups):
+        group = groups[label]
+        times = [record["elapsed"] for record in group if record["elapsed"] is not None]
+        attempted = len({record["id"] for record in group})
+        correct = sum(record["correct"] for record in group)
+        rows.append({field: label, "attempts": len(group), "correct": correct, "accuracy": correct / len(group),
+                     "mean_seconds": statistics.mean(times) if times else None,
+                     "median_seconds": statistics.median(times) if times else None,
+                     "questions_attempted": attempted,
+                     "coverage": attempted / (len(questions) if field == "user" else bank_counts[label])})
+    return rows
+
+def assert_rows_equal(rows, expected_rows):
+    assert len(rows) == len(expected_rows)
+    for row, expected in zip(rows, expected_rows):
+        assert row.keys() == expected.keys()
+        for name, value in expected.items():
+            assert row[name] == (pytest.approx(value) if isinstance(value, float) else value), name
+
+@pytest.fixture(scope="module")
+def tables(questions, records):
+    question_table = QuestionTable(questions)
+    return AttemptTable.from_records(question_table, records), question_table
+
+@pytest.mark.parametrize("field", ["domain", "skill", "difficulty", "user"])
+def test_breakdown_matches_a_loop(tables, questions, records, field):
+    attempts, question_table = tables
+    assert_rows_equal(breakdown(attempts, question_table, field), loop_breakdown(questions, records, field))
+
+def test_distinct_counts_by_sorting_match_the_presence_table(tables, monkeypatch):
+    attempts, question_table = tables
+    by_presence_table = breakdown(attempts, question_table, "user")
+    monkeypatch.setattr(analytics, 'MAX_PRESENCE_CELLS', 0)
+    assert breakdown(attempts, question_table, "user") == by_presence_table
+
+def test_groups_without_timed_attempts(questions):
+    question_table = QuestionTable(questions)
+    records = [{"id": questions[0]["id"], "correct": True, "ts": 1.7e9, "elapsed": None},
+               {"id": questions[0]["id"], "correct": False, "ts": 1.7e9 + 5, "elapsed": None}]
+    attempts = AttemptTable.from_records(question_table, records)
+    assert_rows_equal(breakdown(attempts, question_table, "skill"), loop_breakdown(
+        questions, [dict(record, user=analytics.SINGLE_USER_NAME) for record in records], "skill"))
+    assert summarize(attempts, question_table)["overall"]["median_seconds"] is None
+
+def test_daily_progress_matches_a_loop(tables, records, questions):
+    attempts, _ = tables
+    bank_ids = {question["id"] for question in questions}
+    days = {}
+    seen = set()
+    for record in records:
+        if record["id"] not in bank_ids:
+            continue
+        day = datetime.datetime.fromtimestamp(record["ts"], datetime.timezone.utc).date().isoformat()
+        counts = days.setdefault(day, [0, 0, 0])
+        counts[0] += 1
+        counts[1] += record["correct"]
+        if (record["user"], record["id"]) not in seen:
+            seen.add((record["user"], record["id"]))
+            counts[2] += 1
+    expected = [{"day": day, "attempts": total, "accuracy": pytest.approx(right / total), "new_questions": new}
+                for day, (total, right, new) in sorted(days.items())]
+    assert daily_progress(attempts) == expected
+
+def test_progress_db_table_matches_the_records(tmp_path, tables, records, questions):
+    progress_db = ProgressDatabase(str(tmp_path / 'progress.db'))
+    try:
+        for record in records:
+            progress_db.record_attempt(record["user"], record["id"], "A", record["correct"], record["elapsed"],
+                                       answered_at=record["ts"])
+        question_table = QuestionTable(questions)
+        from_db = AttemptTable.from_progress_db(question_table, progress_db, batch_size=100)
+        attempts, _ = tables
+        assert len(from_db) == len(attempts)
+        assert_rows_equal(breakdown(from_db, question_table, "skill"), loop_breakdown(questions, records, "skill"))
+        # Users come in database ID order, i.e. in order of their first attempt
+        assert_rows_equal(sorted(breakdown(from_db, question_table, "user"), key=lambda row: row["user"]),
+                          loop_breakdown(questions, records, "user"))
+        one_user = AttemptTable.from_progress_db(question_table, progress_db, user="bob", batch_size=64)
+        assert_rows_equal(breakdown(one_user, question_table, "difficulty"), loop_breakdown(
+            questions, [record for record in records if record["user"] == "bob"], "difficulty"))
+    finally:
+        progress_db.close()
@@ -0,0 +1,138 @@
+# satELA/tests/test_api_server.py
+#
+# Drives QuestionApi.handle directly and the server over a loopback connection,
+# on the real question bank with progress in a throwaway database.
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src import user_progress
+from src.api_server import ApiError, QuestionApi, QuestionCache, start_server, stop_server
+from src.question_io import load_questions
+
+QUESTIONS_PATH = os.path.join(project_root_dir, 'data', 'processed_questions', 'ela_questions.json')
+
+@pytest.fixture(scope="module")
+def question_cache():
+    return QuestionCache(load_questions(QUESTIONS_PATH))
+
+@pytest.fixture(autouse=True)
+def progress_db(tmp_path):
+    progress_db = user_progress.use_progress_db(str(tmp_path / 'progress.db'))
+    yield progress_db
+    progress_db.close()
+    user_progress._progress_db = None
+
+def run_with_api(question_cache, scenario, **api_options):
+    async def run():
+        api = QuestionApi(question_cache, **api_options)
+        try:
+            return await scenario(api)
+        finally:
+            await api.close()
+    return asyncio.run(run())
+
+async def post(api, path, payload):
+    status, body = await api.handle("POST", path, json.dumps(payload).encode('utf-8'))
+    return status, json.loads(body) if isinstance(body, bytes) else body
+
+async def expect_error(status, coroutine):
+    with pytest.raises(ApiError) as error:
+        await coroutine
+    assert error.value.status == status
+    return error.value.message
+
+def test_create_session_and_answer(question_cache, progress_db):
+    async def scenario(api):
+        status, session = await post(api, "/sessions", {"user": "ann", "count": 5})
+        assert status == 201
+        assert len(session["question_ids"]) == 5
+        assert [question["id"] for question in session["questions"]] == session["question_ids"]
+        assert all("correct_answer" not in question for question in session["questions"])
+
+        question_id = session["question_ids"][0]
+        answer = question_cache.get(question_id)["correct_answer"]
+        status, result = await post(api, f"/sessions/{session['session_id']}/answers",
+                                    {"question_id": question_id, "answer": answer})
+        assert (status, result["correct"], result["remaining"]) == (200, True, 4)
+        status, progress = await api.handle("GET", f"/sessions/{session['session_id']}", b'')
+        assert (progress["answered"], progress["correct"]) == (1, 1)
+        return question_id
+
+    question_id = run_with_api(question_cache, scenario)
+    assert progress_db.completed_ids("ann") == [question_id]
+
+def test_repeated_answer_is_rejected(question_cache, progress_db):
+    async def scenario(api):
+        _, session = await post(api, "/sessions", {"user": "ann", "count": 2})
+        path = f"/sessions/{session['session_id']}/answers"
+        answer = {"question_id": session["question_ids"][0], "answer": "A"}
+        assert (await post(api, path, answer))[0] == 200
+        await expect_error(409, post(api, path, dict(answer, answer="B")))
+
+    run_with_api(question_cache, scenario)
+    assert len(list(progress_db.iter_attempts("ann"))) == 1
+
+def test_invalid_requests(question_cache):
+    async def scenario(api):
+        _, session = await post(api, "/sessions", {"user": "ann", "count": 2})
+        await expect_error(400, post(api, f"/sessions/{session['session_id']}/answers",
+                                     {"question_id": "not-in-session", "answer": "A"}))
+        await expect_error(400, api.handle("POST", "/sessions", b'[1, 2]'))
+        await expect_error(400, api.handle("POST", "/sessions", b'{not json'))
+        message = await expect_error(400, post(api, "/sessions", {"user": "ann", "domain": "No Such Domain"}))
+        assert "domain" in message
+        await expect_error(400, post(api, "/sessions", {"user": "ann", "count": 0}))
+        await expect_error(404, api.handle("GET", "/questions/not-a-question", b''))
+        await expect_error(405, api.handle("GET", "/sessions", b''))
+
+    run_with_api(question_cache, scenario)
+
+def test_idle_sessions_expire(question_cache):
+    async def scenario(api):
+        _, session = await post(api, "/sessions", {"user": "ann", "count": 1})
+        _, other_session = await post(api, "/sessions", {"user": "bob", "count": 1})
+        await asyncio.sleep(0.2)
+        await expect_error(404, api.handle("GET", f"/sessions/{session['session_id']}", b''))
+        assert api.expire_sessions() == 1 # The other one, not looked up since
+        assert other_session["session_id"] not in api.sessions
+
+    run_with_api(question_cache, scenario, session_ttl=0.1)
+
+def test_oldest_sessions_are_dropped_beyond_the_limit(question_cache):
+    async def scenario(api):
+        session_ids = [(await post(api, "/sessions", {"user": "ann", "count": 1}))[1]["session_id"]
+                       for _ in range(4)]
+        assert list(api.sessions) == session_ids[1:]
+
+    run_with_api(question_cache, scenario, max_sessions=3)
+
+def test_loopback_client(question_cache):
+    async def scenario():
+        server, api = await start_server('127.0.0.1', 0, questions=question_cache.questions)
+        try:
+            host, port = server.sockets[0].getsockname()[:2]
+            reader, writer = await asyncio.open_connection(host, port)
+            body = json.dumps({"user": "ann", "count": 3}).encode('utf-8')
+            writer.write(b"POST /sessions HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+                         b"Connection: close\r\nContent-Length: " + str(len(body)).encode('ascii') + b"\r\n\r\n" + body)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        finally:
+            await stop_server(server, api)
+        assert api.sweep_task is None
+        head, _, response_body = response.partition(b'\r\n\r\n')
+        assert head.startswith(b"HTTP/1.1 201 Created")
+        assert len(json.loads(response_body)["question_ids"]) == 3
+
+    asyncio.run(scenario())
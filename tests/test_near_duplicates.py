@@ -0,0 +1,101 @@
+# satELA/tests/test_near_duplicates.py
+
+import os
+import random
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src import near_duplicates
+from src.near_duplicates import (NearDuplicateDetector, cluster_lookup, find_near_duplicate_clusters,
+                                 load_near_duplicate_clusters, make_synthetic_corpus, sample_distinct_questions)
+from src.question_index import QuestionIndex
+from src.question_store import QuestionStore, write_question_store
+
+VOCABULARY = [f"word{i}" for i in range(3000)]
+
+@pytest.fixture(scope="module")
+def corpus():
+    return make_synthetic_corpus(400, VOCABULARY, duplicate_fraction=0.15, seed=3)
+
+@pytest.fixture(scope="module")
+def questions(corpus):
+    items, _ = corpus
+    return [{"id": item_id, "assessment": "SAT", "test": "Reading and Writing",
+             "domain": ("Craft and Structure", "Information and Ideas")[i % 2],
+             "skill": ("Words in Context", "Inferences", "Central Ideas")[i % 3],
+             "difficulty": ("Easy", "Medium", "Hard")[i % 3],
+             "question_text": text, "choices": {"A": "a", "B": "b", "C": "c", "D": "d"},
+             "correct_answer": "A", "explanation": ""}
+            for i, (item_id, text) in enumerate(items)]
+
+def test_planted_duplicates_are_clustered(corpus, questions):
+    _, planted_pairs = corpus
+    assert planted_pairs
+    cluster_of = cluster_lookup(find_near_duplicate_clusters(questions))
+    found = sum(1 for a, b in planted_pairs if a in cluster_of and cluster_of[a] == cluster_of.get(b))
+    assert found >= 0.95 * len(planted_pairs)
+    # Unrelated random passages are never merged
+    planted_ids = {question_id for pair in planted_pairs for question_id in pair}
+    assert set(cluster_of) <= planted_ids
+
+def test_every_bucket_member_is_compared(monkeypatch):
+    # Item 2 shares a band with items 0 and 1 but is only similar to item 1, which is
+    # not the first item of the bucket.
+    signatures = {
+        "first": [1, 1, 1, 1, 10, 11, 12, 13],
+        "second": [1, 1, 1, 1, 20, 21, 22, 23],
+        "third": [1, 1, 1, 1, 20, 21, 22, 99],
+    }
+    current = [None]
+    monkeypatch.setattr(near_duplicates, 'minhash_signature', lambda hashes, num_perm: signatures[current[0]])
+    detector = NearDuplicateDetector(num_perm=8, bands=2, threshold=0.8)
+    for name in signatures:
+        current[0] = name
+        detector.add(name, ' '.join(f"{name} filler{i}" for i in range(12)))
+    assert detector.clusters() == [["second", "third"]]
+
+def test_sample_distinct_questions_takes_one_per_cluster(questions):
+    clusters = find_near_duplicate_clusters(questions)
+    cluster_of = cluster_lookup(clusters)
+    question_index = QuestionIndex(questions)
+    rng = random.Random(5)
+    for _ in range(20):
+        selected = sample_distinct_questions(question_index, 50, cluster_of, rng=rng)
+        assert len(selected) == 50
+        assert len({question["id"] for question in selected}) == 50
+        clustered = [cluster_of[question["id"]] for question in selected if question["id"] in cluster_of]
+        assert len(clustered) == len(set(clustered))
+
+    # Asking for everything returns exactly one question per cluster plus every unclustered one
+    everything = sample_distinct_questions(question_index, len(questions), cluster_of, rng=rng)
+    assert len(everything) == len(questions) - len(cluster_of) + len(clusters)
+    skill_only = sample_distinct_questions(question_index, 10, cluster_of, rng=rng, skill="Inferences")
+    assert {question["skill"] for question in skill_only} == {"Inferences"}
+
+def test_stale_report_is_recomputed(questions, tmp_path, monkeypatch):
+    path = str(tmp_path / 'near_duplicates.json')
+    runs = []
+    find_clusters = near_duplicates.find_near_duplicate_clusters
+    monkeypatch.setattr(near_duplicates, 'find_near_duplicate_clusters',
+                        lambda questions: runs.append(1) or find_clusters(questions))
+
+    clusters = load_near_duplicate_clusters(questions, path)
+    assert load_near_duplicate_clusters(questions, path) == clusters
+    store_path = str(tmp_path / 'questions.qstore')
+    write_question_store(questions, store_path)
+    with QuestionStore(store_path) as store: # Same bank, checked through the store header
+        assert load_near_duplicate_clusters(store, path) == clusters
+    assert len(runs) == 1
+
+    edited = [dict(question) for question in questions]
+    edited[0]["question_text"] += " edited"
+    load_near_duplicate_clusters(edited, path)
+    assert len(runs) == 2
+    load_near_duplicate_clusters(edited, path)
+    assert len(runs) == 2
@@ -0,0 +1,113 @@
+# satELA/tests/test_page_cache.py
+#
+# The page cache on its own, and extraction through it from small PDFs written
+# here, so pages can be changed one at a time.
+
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src import page_cache
+from src.page_cache import PageCache
+
+def make_pdf(path, page_texts):
+    # A minimal PDF: one Helvetica text line per page
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_numbers = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        page_numbers.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % number for number in page_numbers), len(page_numbers))
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_keys_depend_on_settings_and_page(tmp_path):
+    cache = PageCache("settings A", str(tmp_path))
+    assert cache.page_key("page 1") == PageCache("settings A", str(tmp_path)).page_key("page 1")
+    assert cache.page_key("page 1") != cache.page_key("page 2")
+    assert cache.page_key("page 1") != PageCache("settings B", str(tmp_path)).page_key("page 1")
+
+def test_entries_and_manifests(tmp_path):
+    cache = PageCache("settings A", str(tmp_path))
+    key = cache.page_key("page 1")
+    assert cache.get(key) is None
+    cache.put(key, "Passage text — with dashes\f")
+    assert PageCache("settings A", str(tmp_path)).get(key) == "Passage text — with dashes\f"
+
+    cache.save_manifest("pdfhash", [key, "other"])
+    assert cache.load_manifest("pdfhash") == [key, "other"]
+    assert cache.load_manifest("otherhash") is None
+    assert PageCache("settings B", str(tmp_path)).load_manifest("pdfhash") is None # Per extraction settings
+
+def test_unreadable_entry_is_a_miss(tmp_path, capsys):
+    cache = PageCache("settings A", str(tmp_path))
+    key = cache.page_key("page 1")
+    cache.put(key, "text")
+    with open(cache._page_path(key), 'wb') as f:
+        f.write(b"not zlib data")
+    assert cache.get(key) is None
+    assert "Ignoring unreadable page cache entry" in capsys.readouterr().out
+
+pdf_scraper = pytest.importorskip("src.pdf_scraper") # Needs pdfminer.six
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'pages')
+    monkeypatch.setattr(page_cache, 'get_page_cache_dir', lambda: cache_dir)
+    return cache_dir
+
+def extract(pdf_path, capsys, workers=None):
+    texts = list(pdf_scraper.iter_text_from_pdf(pdf_path, workers=workers))
+    return texts, capsys.readouterr().out
+
+def test_extraction_settings_change_the_keys():
+    default_settings = pdf_scraper.extraction_settings()
+    assert default_settings == pdf_scraper.extraction_settings(pdf_scraper.LAParams())
+    assert default_settings != pdf_scraper.extraction_settings(pdf_scraper.LAParams(char_margin=5.0))
+    assert PageCache(default_settings).settings_key != \
+        PageCache(pdf_scraper.extraction_settings(pdf_scraper.LAParams(char_margin=5.0))).settings_key
+
+def test_only_changed_pages_are_extracted_again(tmp_path, cache_dir, capsys):
+    pdf_path = str(tmp_path / 'bank.pdf')
+    make_pdf(pdf_path, ["Question ID 0001", "Question ID 0002", "Question ID 0003"])
+    uncached = list(pdf_scraper.iter_text_from_pdf(pdf_path, use_cache=False))
+    capsys.readouterr()
+
+    texts, output = extract(pdf_path, capsys)
+    assert texts == uncached
+    assert "Question ID 0002" in texts[1]
+    assert "reused 0 of 3 pages, extracted 3" in output
+
+    texts, output = extract(pdf_path, capsys)
+    assert texts == uncached
+    assert "all 3 pages of bank.pdf reused" in output # From the manifest
+
+    make_pdf(pdf_path, ["Question ID 0001", "Question ID 0002 (revised)", "Question ID 0003"])
+    texts, output = extract(pdf_path, capsys)
+    assert "reused 2 of 3 pages, extracted 1" in output
+    assert "revised" in texts[1] and texts[0] == uncached[0] and texts[2] == uncached[2]
+
+    make_pdf(pdf_path, ["Question ID 0001", "Question ID 0002 (revised)", "Question ID 0003 (revised)"])
+    texts, output = extract(pdf_path, capsys, workers=2)
+    assert "reused 2 of 3 pages; extracting 1 in 1 shards" in output
+    assert "0003 (revised)" in texts[2] and "0002 (revised)" in texts[1]
@@ -0,0 +1,87 @@
+# satELA/tests/test_parse_cache.py
+
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.parse_cache import ParseCache
+from src.question_parser import PARSER_VERSION, iter_ela_questions, parse_ela_questions
+
+DEBUG_TEXT_PATH = os.path.join(project_root_dir, 'extracted_full_text_for_debugging.txt')
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'parsed_blocks.json')
+
+def test_hit_and_miss(cache_path):
+    cache = ParseCache(1, cache_path)
+    key = cache.block_key("0123abcd", "block text")
+    assert cache.get(key) is None
+    cache.put(key, {"id": "0123abcd"})
+    assert cache.get(key) == {"id": "0123abcd"}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.block_key("0123abcd", "block text!") != key
+    assert cache.block_key("0123abce", "block text") != key
+
+def test_least_recently_used_entries_are_evicted(cache_path):
+    cache = ParseCache(1, cache_path, max_entries=3)
+    keys = [cache.block_key(f"q{i}", "text") for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, {"id": f"q{i}"})
+    cache.get(keys[0]) # q0 is now the most recently used
+    cache.put(keys[3], {"id": "q3"})
+    assert cache.evictions == 1
+    assert cache.get(keys[1]) is None
+    assert [cache.get(key)["id"] for key in (keys[0], keys[2], keys[3])] == ["q0", "q2", "q3"]
+
+def test_saved_entries_keep_their_order(cache_path):
+    cache = ParseCache(1, cache_path, max_entries=2)
+    keys = [cache.block_key(f"q{i}", "text") for i in range(3)]
+    cache.put(keys[0], {"id": "q0"})
+    cache.put(keys[1], {"id": "q1"})
+    cache.get(keys[0])
+    cache.save()
+    reloaded = ParseCache(1, cache_path, max_entries=2)
+    reloaded.put(keys[2], {"id": "q2"}) # Evicts q1, the least recently used before saving
+    assert list(reloaded.entries) == [keys[0], keys[2]]
+
+def test_parser_version_invalidates_every_entry(cache_path):
+    cache = ParseCache(1, cache_path)
+    cache.put(cache.block_key("q1", "text"), {"id": "q1"})
+    cache.save()
+    bumped = ParseCache(2, cache_path)
+    assert bumped.get(bumped.block_key("q1", "text")) is None
+    assert ParseCache(1, cache_path).get(cache.block_key("q1", "text")) == {"id": "q1"}
+
+def test_unreadable_cache_starts_empty(cache_path, capsys):
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        f.write('{"entries": [["key"')
+    assert len(ParseCache(1, cache_path).entries) == 0
+    assert "Could not load parse cache" in capsys.readouterr().out
+
+def test_incremental_reparse(cache_path):
+    with open(DEBUG_TEXT_PATH, 'r', encoding='utf-8') as f:
+        debug_text = f.read()
+    parsed_questions = parse_ela_questions(debug_text)
+
+    cache = ParseCache(PARSER_VERSION, cache_path)
+    assert list(iter_ela_questions([debug_text], cache=cache)) == parsed_questions
+    assert cache.hits == 0 and cache.misses > 0
+    block_count = cache.misses
+
+    cache = ParseCache(PARSER_VERSION, cache_path) # Saved when the stream was exhausted
+    assert list(iter_ela_questions([debug_text], cache=cache)) == parsed_questions
+    assert (cache.hits, cache.misses) == (block_count, 0)
+
+    # One block edited: only it is parsed again
+    edited_id = parsed_questions[3]["id"]
+    edited_text = debug_text.replace(f"ID: {edited_id}", f"ID: {edited_id}\nAn added sentence.", 1)
+    cache = ParseCache(PARSER_VERSION, cache_path)
+    assert list(iter_ela_questions([edited_text], cache=cache, workers=2)) == parse_ela_questions(edited_text)
+    assert (cache.hits, cache.misses) == (block_count - 1, 1)
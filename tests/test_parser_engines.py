@@ -0,0 +1,61 @@
+# satELA/tests/test_parser_engines.py
+#
+# Checks the parser against extracted_full_text_for_debugging.txt: the regex and
+# fast engines must agree, and the streaming parser must produce the same
+# questions as the whole-text parser however the text is split into chunks.
+
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.question_parser import compare_parser_engines, iter_ela_questions, parse_ela_questions, split_question_blocks
+
+DEBUG_TEXT_PATH = os.path.join(project_root_dir, 'extracted_full_text_for_debugging.txt')
+
+@pytest.fixture(scope="module")
+def debug_text():
+    with open(DEBUG_TEXT_PATH, 'r', encoding='utf-8') as f:
+        return f.read()
+
+@pytest.fixture(scope="module")
+def parsed_questions(debug_text):
+    questions = parse_ela_questions(debug_text)
+    assert questions
+    return questions
+
+def split_chunks(text, chunk_size):
+    return [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+
+def test_engines_produce_identical_output(debug_text):
+    assert compare_parser_engines(debug_text) == []
+
+# Small and odd sizes put chunk boundaries inside "Question ID" markers and in the
+# middle of the text clean_text rewrites.
+@pytest.mark.parametrize("chunk_size", [61, 997, 4096])
+def test_streaming_parse_matches_whole_text_parse(debug_text, parsed_questions, chunk_size):
+    assert list(iter_ela_questions(split_chunks(debug_text, chunk_size))) == parsed_questions
+
+def test_streaming_parse_of_pages_matches_whole_text_parse(debug_text, parsed_questions):
+    # Form feeds separate pages in pdfminer output, as in iter_text_from_pdf's chunks
+    pages = [page + '\f' for page in debug_text.split('\f')]
+    pages[-1] = pages[-1][:-1]
+    assert list(iter_ela_questions(pages)) == parsed_questions
+
+def test_text_before_the_first_marker_is_ignored(debug_text, parsed_questions):
+    preamble = "SAT Suite Question Bank\n\nResults\n\nQuestion IDs are listed below.\n\n"
+    assert split_question_blocks(preamble + "Question ID 0123abcd\nBody one\nQuestion ID 89abcdef\nBody two") == \
+        [("0123abcd", "Body one"), ("89abcdef", "Body two")]
+    text = preamble + debug_text
+    assert parse_ela_questions(text) == parsed_questions
+    assert compare_parser_engines(text) == []
+    assert list(iter_ela_questions(split_chunks(text, 997))) == parsed_questions
+
+def test_parallel_parse_matches_serial_parse(debug_text, parsed_questions):
+    assert parse_ela_questions(debug_text, workers=2) == parsed_questions
+    assert list(iter_ela_questions(split_chunks(debug_text, 4096), workers=2)) == parsed_questions
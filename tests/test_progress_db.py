@@ -0,0 +1,81 @@
+# satELA/tests/test_progress_db.py
+
+import os
+import sys
+import threading
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.progress_db import ProgressDatabase
+
+@pytest.fixture
+def progress_db(tmp_path):
+    progress_db = ProgressDatabase(str(tmp_path / 'progress.db'))
+    yield progress_db
+    progress_db.close()
+
+def test_sync_question_ids_replaces_the_set(progress_db):
+    progress_db.sync_question_ids(["q1", "q2", "q3"])
+    assert sorted(progress_db.uncompleted_ids("ann")) == ["q1", "q2", "q3"]
+    progress_db.sync_question_ids(["q2", "q3", "q4"]) # A re-parse dropped q1 and added q4
+    assert sorted(progress_db.uncompleted_ids("ann")) == ["q2", "q3", "q4"]
+    progress_db.sync_question_ids([])
+    assert progress_db.uncompleted_ids("ann") == []
+
+def test_uncompleted_ids_leaves_out_the_users_completed_questions(progress_db):
+    progress_db.sync_question_ids([f"q{i}" for i in range(6)])
+    progress_db.record_attempt("ann", "q1", "A", True, 10.0)
+    progress_db.record_attempt("ann", "q4", "B", False, 10.0)
+    progress_db.mark_completed("bob", ["q2"])
+    assert sorted(progress_db.uncompleted_ids("ann")) == ["q0", "q2", "q3", "q5"]
+    assert sorted(progress_db.uncompleted_ids("bob")) == ["q0", "q1", "q3", "q4", "q5"]
+
+def test_read_paths_do_not_create_users(progress_db):
+    progress_db.sync_question_ids(["q1", "q2"])
+    progress_db.record_attempt("ann", "q1", "A", True)
+    assert progress_db.completed_ids("typo") == []
+    assert sorted(progress_db.uncompleted_ids("typo")) == ["q1", "q2"]
+    assert list(progress_db.iter_attempts("typo")) == []
+    assert list(progress_db.iter_attempt_rows("typo")) == []
+    assert progress_db.find_user_id("typo") is None
+    assert list(progress_db.user_names().values()) == ["ann"]
+    assert progress_db.find_user_id("ann") == progress_db.get_user_id("ann")
+
+def add_attempts(progress_db):
+    # Out-of-order timestamps, with ties, for the per-user ordering
+    for i in range(25):
+        progress_db.record_attempt(("ann", "bob")[i % 2], f"q{i}", "A", i % 3 == 0, float(i),
+                                   answered_at=1000.0 + (i * 7) % 10)
+
+@pytest.mark.parametrize("user_name", [None, "ann"])
+def test_batched_rows_match_a_single_batch(progress_db, user_name):
+    add_attempts(progress_db)
+    everything = [row for batch in progress_db.iter_attempt_rows(user_name, batch_size=1000) for row in batch]
+    batches = list(progress_db.iter_attempt_rows(user_name, batch_size=4))
+    assert all(len(batch) <= 4 for batch in batches)
+    assert [row for batch in batches for row in batch] == everything
+    assert len(everything) == (25 if user_name is None else 13)
+    if user_name is not None:
+        assert [row[3] for row in everything] == sorted(row[3] for row in everything)
+        assert {row[0] for row in everything} == {progress_db.find_user_id(user_name)}
+
+def test_connection_is_released_between_batches(tmp_path):
+    progress_db = ProgressDatabase(str(tmp_path / 'progress.db'), pool_size=1)
+    try:
+        add_attempts(progress_db)
+        rows = progress_db.iter_attempt_rows(batch_size=10)
+        first_batch = next(rows)
+        # With one pooled connection this would block if the iterator still held it
+        writer = threading.Thread(target=progress_db.record_attempt, args=("cid", "late", "A", True))
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+        remaining = [row for batch in rows for row in batch]
+        assert len(first_batch) + len(remaining) == 26
+    finally:
+        progress_db.close()
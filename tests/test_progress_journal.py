@@ -0,0 +1,105 @@
+# satELA/tests/test_progress_journal.py
+
+import json
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src import progress_journal, user_progress
+from src.progress_journal import ProgressJournal
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'progress_journal.ndjson'), str(tmp_path / 'completed_questions.json')
+
+@pytest.fixture
+def fsync_calls(monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+    def counting_fsync(fd):
+        calls.append(fd)
+        real_fsync(fd)
+    monkeypatch.setattr(progress_journal.os, 'fsync', counting_fsync)
+    return calls
+
+def test_torn_tail_is_skipped_and_repaired(paths):
+    journal_path, snapshot_path = paths
+    journal = ProgressJournal(journal_path, snapshot_path)
+    for question_id in ("q1", "q2", "q3"):
+        journal.record_attempt(question_id, "A", True, 10.0)
+    journal.close()
+    with open(journal_path, 'ab') as f:
+        f.write(b'{"id": "q4", "answer": "B", "corr') # Crash in the middle of a write
+
+    reloaded = ProgressJournal(journal_path, snapshot_path)
+    assert reloaded.load_completed() == {"q1", "q2", "q3"}
+    reloaded.record_attempt("q5", "C", False, 5.0)
+    reloaded.close()
+    with open(journal_path, 'rb') as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["q1", "q2", "q3", "q5"]
+
+def test_fsync_is_batched(paths, fsync_calls):
+    journal = ProgressJournal(*paths, fsync_every=8, fsync_interval=3600)
+    for i in range(7):
+        journal.record_attempt(f"q{i}", "A", True)
+    assert not fsync_calls
+    journal.record_attempt("q7", "A", True)
+    assert len(fsync_calls) == 1
+    journal.record_attempt("q8", "A", True)
+    journal.close() # Syncs the record written since the last batch
+    assert len(fsync_calls) == 2
+    assert ProgressJournal(*paths).load_completed() == {f"q{i}" for i in range(9)}
+
+def test_fsync_after_interval(paths, fsync_calls):
+    journal = ProgressJournal(*paths, fsync_every=100, fsync_interval=0)
+    journal.record_attempt("q1", "A", True)
+    assert len(fsync_calls) == 1
+    journal.close()
+
+def test_compaction_then_append_then_reload(paths):
+    journal_path, snapshot_path = paths
+    journal = ProgressJournal(journal_path, snapshot_path)
+    for i in range(200): # The 200th record triggers a compaction
+        journal.record_attempt(f"q{i % 150}", "A", True)
+    with open(snapshot_path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert len(snapshot["completed"]) == 150
+    assert snapshot["journal_offset"] == os.path.getsize(journal_path)
+    journal.record_attempt("new", "B", False)
+    journal.close()
+
+    reloaded = ProgressJournal(journal_path, snapshot_path)
+    assert reloaded.load_completed() == {f"q{i}" for i in range(150)} | {"new"}
+    assert reloaded._records_since_snapshot == 1 # Only the tail after the snapshot was read
+    assert len(list(reloaded.iter_attempts())) == 201 # The journal keeps the full history
+
+def test_legacy_completed_list_is_loaded(paths):
+    journal_path, snapshot_path = paths
+    with open(snapshot_path, 'w', encoding='utf-8') as f:
+        json.dump(["q1", "q2", 3], f)
+    journal = ProgressJournal(journal_path, snapshot_path)
+    assert journal.load_completed() == {"q1", "q2", "3"}
+    journal.record_attempt("q4", "A", True)
+    assert journal.compact() == 4
+    journal.close()
+    with open(snapshot_path, 'r', encoding='utf-8') as f:
+        assert json.load(f)["completed"] == ["3", "q1", "q2", "q4"]
+
+def test_user_progress_syncs_the_journal_on_close(paths, fsync_calls, monkeypatch):
+    journal_path, snapshot_path = paths
+    monkeypatch.setattr(user_progress, 'get_progress_journal_file_path', lambda: journal_path)
+    monkeypatch.setattr(user_progress, 'get_user_progress_file_path', lambda: snapshot_path)
+    monkeypatch.setattr(user_progress, '_progress_journal', None)
+    user_progress.record_attempt("q1", "A", True, 3.0)
+    assert not fsync_calls
+    user_progress.close_progress_journal() # What the atexit hook runs
+    assert len(fsync_calls) == 1
+    assert user_progress.load_completed_questions() == ["q1"]
+    user_progress.close_progress_journal()
@@ -0,0 +1,103 @@
+# satELA/tests/test_question_index.py
+
+import os
+import random
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.question_index import QuestionIndex, _bitmap_from_positions, _select_positions
+
+DOMAINS = {"Craft and Structure": ("Words in Context", "Text Structure and Purpose"),
+           "Information and Ideas": ("Inferences", "Central Ideas and Details", "Command of Evidence"),
+           "Standard English Conventions": ("Boundaries",)}
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+def make_bank(size, seed=0):
+    rng = random.Random(seed)
+    questions = []
+    for i in range(size):
+        domain = rng.choice(sorted(DOMAINS))
+        questions.append({"id": f"{i:08x}", "domain": domain, "skill": rng.choice(DOMAINS[domain]),
+                          "difficulty": rng.choice(DIFFICULTIES)})
+    return questions
+
+@pytest.fixture(scope="module")
+def questions():
+    return make_bank(301)
+
+@pytest.fixture(scope="module")
+def question_index(questions):
+    return QuestionIndex(questions)
+
+def matching_ids(questions, domain=None, skill=None, difficulty=None, exclude_ids=(), within_ids=None):
+    # The same filter as a plain loop
+    return [question["id"] for question in questions
+            if all(value is None or question[field] == value
+                   for field, value in (("domain", domain), ("skill", skill), ("difficulty", difficulty)))
+            and question["id"] not in exclude_ids and (within_ids is None or question["id"] in within_ids)]
+
+def ids_of(question_index, bitmap):
+    return [question["id"] for position, question in enumerate(question_index.questions) if bitmap >> position & 1]
+
+@pytest.mark.parametrize("positions", [[], [0], [7, 8], [3, 64, 65, 200, 1000], list(range(0, 300, 3))])
+def test_select_positions(positions):
+    bitmap = _bitmap_from_positions(positions, 1024)
+    assert _select_positions(bitmap, list(range(len(positions)))) == positions
+    every_other = list(range(0, len(positions), 2))
+    assert _select_positions(bitmap, every_other) == positions[::2]
+
+def test_select_positions_random_bitmaps():
+    rng = random.Random(1)
+    for _ in range(50):
+        positions = sorted(rng.sample(range(2000), rng.randint(1, 300)))
+        ranks = sorted(rng.sample(range(len(positions)), rng.randint(1, len(positions))))
+        assert _select_positions(_bitmap_from_positions(positions, 2000), ranks) == [positions[rank] for rank in ranks]
+
+def test_values(question_index, questions):
+    counts = question_index.values("skill")
+    assert sum(counts.values()) == len(questions)
+    assert counts["Boundaries"] == sum(1 for question in questions if question["skill"] == "Boundaries")
+    assert question_index.resolve_value("difficulty", " hard ") == "Hard"
+    assert question_index.resolve_value("domain", "Algebra") is None
+
+@pytest.mark.parametrize("filters", [
+    {}, {"domain": "Information and Ideas"}, {"skill": "Inferences", "difficulty": "Hard"},
+    {"domain": "Craft and Structure", "skill": "Inferences"}, {"difficulty": "Unknown"},
+])
+def test_query_and_count_match_a_plain_filter(question_index, questions, filters):
+    rng = random.Random(2)
+    exclude_ids = {question["id"] for question in rng.sample(questions, 60)} | {"not-in-bank"}
+    within_ids = {question["id"] for question in rng.sample(questions, 150)}
+    within = question_index.bitmap_for_ids(within_ids)
+    for options, plain_options in (({}, {}),
+                                   ({"exclude_ids": exclude_ids}, {"exclude_ids": exclude_ids}),
+                                   ({"within": within}, {"within_ids": within_ids}),
+                                   ({"exclude_ids": exclude_ids, "within": within},
+                                    {"exclude_ids": exclude_ids, "within_ids": within_ids})):
+        expected = matching_ids(questions, **filters, **plain_options)
+        assert ids_of(question_index, question_index.query(**filters, **options)) == expected
+        assert question_index.count(**filters, **options) == len(expected)
+
+def test_sample_draws_matching_questions_without_replacement(question_index, questions):
+    rng = random.Random(3)
+    exclude_ids = {question["id"] for question in questions[:100]}
+    within_ids = {question["id"] for question in questions[50:250]}
+    within = question_index.bitmap_for_ids(within_ids)
+    expected = set(matching_ids(questions, domain="Information and Ideas", exclude_ids=exclude_ids, within_ids=within_ids))
+    seen = set()
+    for _ in range(30):
+        sample = question_index.sample(10, domain="Information and Ideas", exclude_ids=exclude_ids, within=within, rng=rng)
+        sample_ids = [question["id"] for question in sample]
+        assert len(sample_ids) == len(set(sample_ids)) == 10
+        assert set(sample_ids) <= expected
+        seen.update(sample_ids)
+    assert seen == expected # Every match gets drawn eventually
+    everything = question_index.sample(1000, domain="Information and Ideas", exclude_ids=exclude_ids, within=within, rng=rng)
+    assert sorted(question["id"] for question in everything) == sorted(expected)
+    assert question_index.sample(5, difficulty="Unknown", rng=rng) == []
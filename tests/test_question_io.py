@@ -0,0 +1,102 @@
+# satELA/tests/test_question_io.py
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src import question_io
+from src.question_io import (iter_questions, iter_questions_json, load_questions, question_file_format,
+                             write_questions, write_questions_json)
+
+QUESTIONS = [
+    {"id": f"{i:08x}", "domain": "Information and Ideas", "skill": "Inferences", "difficulty": "Hard",
+     "question_text": f"Line one\nline two — “quoted” {i} [brackets], {{braces}}",
+     "choices": {"A": "1,000", "B": "a ] b", "C": "", "D": "\\"}, "correct_answer": "ABCD"[i % 4],
+     "explanation": "x" * (i * 37 % 300), "score": 12345.678 * i, "count": 10 ** i}
+    for i in range(20)
+]
+
+def zstd_available():
+    try:
+        question_io._zstd_module()
+        return True
+    except ValueError:
+        return False
+
+@pytest.mark.parametrize("file_name", [
+    "questions.json", "questions.ndjson", "questions.jsonl", "questions.ndjson.gz",
+    pytest.param("questions.ndjson.zst", marks=pytest.mark.skipif(not zstd_available(), reason="no zstd module")),
+])
+def test_round_trip(tmp_path, file_name):
+    path = str(tmp_path / file_name)
+    assert write_questions(iter(QUESTIONS), path) == len(QUESTIONS)
+    assert load_questions(path) == QUESTIONS
+    assert list(iter_questions(path)) == QUESTIONS
+    assert not os.path.exists(path + '.tmp')
+
+def test_json_output_matches_json_dump(tmp_path):
+    path = str(tmp_path / "questions.json")
+    write_questions(QUESTIONS, path)
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read() == json.dumps(QUESTIONS, indent=2, ensure_ascii=False)
+    stream = io.StringIO()
+    write_questions_json([], stream)
+    assert stream.getvalue() == json.dumps([], indent=2)
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1000])
+def test_json_reads_across_chunk_boundaries(monkeypatch, chunk_size):
+    # Small chunks end the buffer inside strings, escapes, numbers and between elements
+    monkeypatch.setattr(question_io, 'READ_CHUNK_SIZE', chunk_size)
+    for text in (json.dumps(QUESTIONS, indent=2, ensure_ascii=False), json.dumps(QUESTIONS),
+                 json.dumps(QUESTIONS, separators=(',', ':')), ' [ ] ', '[{"n": 1}, 23456, 7e10, -0.5]'):
+        assert list(iter_questions_json(io.StringIO(text))) == json.loads(text)
+
+@pytest.mark.parametrize("text", ['', '{"id": 1}', '[{"id": 1}', '[{"id": 1} {"id": 2}]', '[{"id": 1},'])
+def test_malformed_json_is_an_error(monkeypatch, text):
+    monkeypatch.setattr(question_io, 'READ_CHUNK_SIZE', 3)
+    with pytest.raises(ValueError):
+        list(iter_questions_json(io.StringIO(text)))
+
+def test_ndjson_blank_lines_and_errors(tmp_path):
+    path = str(tmp_path / "questions.ndjson")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"id": "a"}\n\n{"id": "b"}\n')
+    assert load_questions(path) == [{"id": "a"}, {"id": "b"}]
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"id": "c"\n')
+    with pytest.raises(ValueError, match="line 4"):
+        load_questions(path)
+
+def test_failed_or_empty_write_leaves_the_file_alone(tmp_path):
+    path = str(tmp_path / "questions.ndjson.gz")
+    write_questions(QUESTIONS[:3], path)
+
+    def failing_questions():
+        yield QUESTIONS[0]
+        raise RuntimeError("parser crashed")
+
+    with pytest.raises(RuntimeError):
+        write_questions(failing_questions(), path)
+    assert write_questions([], path) == 0
+    assert load_questions(path) == QUESTIONS[:3]
+    assert not os.path.exists(path + '.tmp')
+
+@pytest.mark.parametrize("path, expected", [
+    ("a/ela_questions.json", ("json", None)), ("x.NDJSON", ("ndjson", None)), ("x.jsonl.gz", ("ndjson", "gzip")),
+    ("x.ndjson.zst", ("ndjson", "zstd")),
+])
+def test_question_file_format(path, expected):
+    assert question_file_format(path) == expected
+
+@pytest.mark.parametrize("path", ["x.json.gz", "x.csv", "x.gz", "questions"])
+def test_unsupported_extensions(path):
+    with pytest.raises(ValueError):
+        question_file_format(path)
@@ -0,0 +1,77 @@
+# satELA/tests/test_question_store.py
+
+import os
+import struct
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src import main
+from src.question_store import HEADER_STRUCT, QuestionStore, bank_fingerprint, write_question_store
+
+QUESTIONS = [
+    {"id": f"{i:08x}", "assessment": "SAT", "test": "Reading and Writing",
+     "domain": ("Craft and Structure", "Information and Ideas")[i % 2],
+     "skill": ("Words in Context", "Inferences", "Central Ideas")[i % 3],
+     "difficulty": ("Easy", "Medium", "Hard")[i % 3],
+     "question_text": f"Question {i}: which choice completes the text? — café",
+     "choices": {"A": f"alpha {i}", "B": "beta", "C": "gamma", "D": "delta é"},
+     "correct_answer": "ABCD"[i % 4],
+     "explanation": f"Choice {'ABCD'[i % 4]} is the best answer." * (i % 3)}
+    for i in range(12)
+]
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / 'questions.qstore')
+    assert write_question_store(QUESTIONS, path) == len(QUESTIONS)
+    return path
+
+def test_round_trip(store_path):
+    with QuestionStore(store_path) as store:
+        assert len(store) == len(QUESTIONS)
+        assert [question.to_dict() for question in store] == QUESTIONS
+        assert [dict(question) for question in store[2:5]] == QUESTIONS[2:5]
+        assert store.fingerprint == bank_fingerprint(QUESTIONS)
+        assert bank_fingerprint(store) == store.fingerprint
+
+def test_heavy_fields_are_decoded_lazily(store_path):
+    with QuestionStore(store_path) as store:
+        question = store[7]
+        assert (question["id"], question["skill"], question["correct_answer"]) == ("00000007", "Inferences", "D")
+        assert question._heavy == {}
+        assert question["choices"] == QUESTIONS[7]["choices"]
+        assert list(question._heavy) == ["choices"]
+        with pytest.raises(KeyError):
+            question["no_such_field"]
+
+def test_get_by_id(store_path):
+    with QuestionStore(store_path) as store:
+        assert store.get("0000000b").to_dict() == QUESTIONS[11]
+        assert store.get("missing") is None
+
+def test_fingerprint_changes_with_the_text(store_path, tmp_path):
+    edited = [dict(question) for question in QUESTIONS]
+    edited[3]["question_text"] += " (edited)"
+    edited_path = str(tmp_path / 'edited.qstore')
+    write_question_store(edited, edited_path)
+    with QuestionStore(store_path) as store, QuestionStore(edited_path) as edited_store:
+        assert store.fingerprint != edited_store.fingerprint
+
+@pytest.mark.parametrize("keep", [0, HEADER_STRUCT.size - 4, HEADER_STRUCT.size + 10, 600, -5])
+def test_truncated_store_is_rejected(store_path, keep):
+    with open(store_path, 'rb') as f:
+        data = f.read()
+    with open(store_path, 'wb') as f:
+        f.write(data[:keep])
+    with pytest.raises((ValueError, struct.error)):
+        QuestionStore(store_path).close()
+    assert main.open_question_store(store_path) is None
+
+def test_missing_store_is_rebuilt(tmp_path):
+    assert main.open_question_store(str(tmp_path / 'missing.qstore')) is None
@@ -0,0 +1,51 @@
+# satELA/tests/test_review_scheduler.py
+
+import os
+import random
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.review_scheduler import RELEARN_DELAY, ReviewScheduler
+
+QUESTIONS = [{"id": f"q{i}", "skill": f"skill{i % 3}", "difficulty": ("Easy", "Medium", "Hard")[i % 3]}
+             for i in range(30)]
+
+def attempt(question, correct, ts):
+    return {"id": question["id"], "correct": correct, "ts": ts, "elapsed": 20.0}
+
+def test_load_replays_only_attempts_after_the_saved_state(tmp_path):
+    path = str(tmp_path / "review.json")
+    history = [(attempt(QUESTIONS[0], True, 1000.0), QUESTIONS[0])]
+    scheduler = ReviewScheduler.load(path=path, history=history)
+    # Answered in the CLI: recorded with the attempt's own timestamp
+    scheduler.record_answer(QUESTIONS[1], True, 10.0, now=2000.0)
+    history.append((attempt(QUESTIONS[1], True, 2000.0), QUESTIONS[1]))
+    scheduler.save()
+
+    # Answered wrong through the API after the state was saved
+    history.append((attempt(QUESTIONS[2], False, 3000.0), QUESTIONS[2]))
+    reloaded = ReviewScheduler.load(path=path, history=history)
+    assert reloaded.states["q0"].attempts == 1
+    assert reloaded.states["q1"].attempts == 1
+    assert reloaded.states["q2"].lapses == 1
+    assert reloaded.next_due(10, now=3000.0 + RELEARN_DELAY) == ["q2"]
+    assert reloaded.history_ts == 3000.0
+
+    # Loading again replays nothing new
+    reloaded.save()
+    assert ReviewScheduler.load(path=path, history=history).states["q2"].attempts == 1
+
+def test_due_count_matches_a_full_scan(tmp_path):
+    rng = random.Random(7)
+    scheduler = ReviewScheduler(path=str(tmp_path / "review.json"))
+    now = 1e9
+    for _ in range(2000):
+        now += rng.random() * 600
+        scheduler.record_answer(rng.choice(QUESTIONS), rng.random() < 0.7, rng.random() * 120, now=now)
+        scheduler.next_due(5, now)
+    for at in (now - 1e6, now, now + 86400, now + 1e8):
+        assert scheduler.due_count(at) == sum(1 for state in scheduler.states.values() if state.due <= at)
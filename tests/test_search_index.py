@@ -0,0 +1,88 @@
+# satELA/tests/test_search_index.py
+
+import math
+import os
+import sys
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.search_index import BM25_B, BM25_K1, SearchIndex, refresh_search_index, tokenize
+
+QUESTIONS = [
+    {"id": "q1", "question_text": "The poet describes the ocean and the ocean's tides.",
+     "explanation": "The ocean imagery supports the claim."},
+    {"id": "q2", "question_text": "Which choice best states the main idea of the text about glaciers?",
+     "explanation": "Glaciers retreat as the climate warms."},
+    {"id": "q3", "question_text": "The researcher studies coral reefs in the ocean.",
+     "explanation": "Coral reefs are sensitive to warming water, which the researcher measured over a decade "
+                    "of careful fieldwork on several reefs."},
+    {"id": "q4", "question_text": "Which finding would most directly weaken the researcher's hypothesis?",
+     "explanation": "A finding that contradicts the hypothesis weakens it."},
+]
+
+def bm25_scores(questions, query):
+    # Textbook BM25 over the same tokens, for comparison
+    documents = {question["id"]: tokenize(question["question_text"] + "\n" + question["explanation"])
+                 for question in questions}
+    average_length = sum(len(tokens) for tokens in documents.values()) / len(documents)
+    scores = {}
+    for term in set(tokenize(query)):
+        containing = [question_id for question_id, tokens in documents.items() if term in tokens]
+        if not containing:
+            continue
+        idf = math.log(1 + (len(documents) - len(containing) + 0.5) / (len(containing) + 0.5))
+        for question_id in containing:
+            tokens = documents[question_id]
+            frequency = tokens.count(term)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / average_length)
+            scores[question_id] = scores.get(question_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+    return scores
+
+@pytest.fixture
+def search_index(tmp_path):
+    search_index = SearchIndex(str(tmp_path / 'search_index.json'))
+    assert search_index.update(QUESTIONS) == (len(QUESTIONS), 0)
+    return search_index
+
+@pytest.mark.parametrize("query", ["ocean", "coral reefs ocean", "researcher hypothesis", "the", "volcano"])
+def test_search_ranks_with_bm25(search_index, query):
+    expected = bm25_scores(QUESTIONS, query)
+    results = search_index.search(query, limit=10)
+    assert {question_id for question_id, _ in results} == set(expected)
+    for question_id, score in results:
+        assert score == pytest.approx(expected[question_id])
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+def test_search_ranking_and_limit(search_index):
+    assert search_index.search("ocean")[0][0] == "q1" # Three mentions in a short question
+    assert len(search_index.search("ocean researcher", limit=1)) == 1
+
+def test_update_reindexes_only_changes(search_index):
+    changed = [dict(question) for question in QUESTIONS[1:]] # q1 removed
+    changed[0]["explanation"] = "Volcanoes erupt; glaciers melt."
+    changed.append({"id": "q5", "question_text": "A volcano erupts.", "explanation": "Volcano ash."})
+    assert search_index.update(changed) == (2, 1) # q2 changed, q5 new, q1 removed
+    assert search_index.update(changed) == (0, 0)
+
+    rebuilt = SearchIndex(search_index.path)
+    rebuilt.update(changed)
+    assert search_index.documents == rebuilt.documents
+    assert search_index.postings == rebuilt.postings
+    assert search_index.total_length == rebuilt.total_length
+    assert "tides" not in search_index.postings
+    assert search_index.search("volcano") == rebuilt.search("volcano")
+    assert {question_id for question_id, _ in search_index.search("volcano glaciers")} == {"q2", "q5"}
+
+def test_refresh_saves_and_reloads(tmp_path):
+    path = str(tmp_path / 'search_index.json')
+    assert len(SearchIndex.load(path)) == 0
+    saved = refresh_search_index(QUESTIONS, path)
+    loaded = SearchIndex.load(path)
+    assert len(loaded) == len(QUESTIONS)
+    assert loaded.search("coral ocean") == saved.search("coral ocean")
+    assert refresh_search_index(QUESTIONS, path).update(QUESTIONS) == (0, 0)
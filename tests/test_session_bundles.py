@@ -0,0 +1,177 @@
+# satELA/tests/test_session_bundles.py
+
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import pytest
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from src.question_index import QuestionIndex
+from src.session_bundles import SessionBundlePool, balanced_sample, spread_evenly
+
+DOMAINS = {"Craft and Structure": ("Words in Context", "Text Structure and Purpose"),
+           "Information and Ideas": ("Inferences", "Central Ideas and Details", "Command of Evidence"),
+           "Standard English Conventions": ("Boundaries",)}
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+@pytest.fixture(scope="module")
+def questions():
+    # Every (domain, skill, difficulty) combination, with uneven counts
+    questions = []
+    for domain, skills in sorted(DOMAINS.items()):
+        for skill in skills:
+            for difficulty_number, difficulty in enumerate(DIFFICULTIES):
+                for _ in range(2 + 3 * difficulty_number + len(skill) % 4):
+                    questions.append({"id": f"{len(questions):08x}", "domain": domain, "skill": skill,
+                                      "difficulty": difficulty, "correct_answer": "ABCD"[len(questions) % 4]})
+    return questions
+
+@pytest.fixture(scope="module")
+def question_index(questions):
+    return QuestionIndex(questions)
+
+@pytest.fixture(scope="module")
+def clusters(questions):
+    # Near-duplicate clusters of three questions each, across categories
+    cluster_of = {question["id"]: position // 3 for position, question in enumerate(questions[::4])}
+    cluster_members = {}
+    for question_id, cluster in cluster_of.items():
+        cluster_members.setdefault(cluster, []).append(question_id)
+    return cluster_of, cluster_members
+
+@pytest.mark.parametrize("n, capacities", [
+    (10, {"a": 5, "b": 5, "c": 5}),
+    (10, {"a": 1, "b": 20, "c": 2, "d": 0}),
+    (7, {"a": 3, "b": 3}),
+    (0, {"a": 3}),
+    (50, {"a": 3, "b": 4}),
+])
+def test_spread_evenly(n, capacities):
+    for seed in range(10):
+        allocation = spread_evenly(n, capacities, random.Random(seed))
+        assert set(allocation) == set(capacities)
+        assert sum(allocation.values()) == min(n, sum(capacities.values()))
+        assert all(0 <= allocation[group] <= capacities[group] for group in capacities)
+        # A group below its capacity is never more than one slot behind any other group
+        for group, slots in allocation.items():
+            if slots < capacities[group]:
+                assert all(slots >= other_slots - 1 for other_slots in allocation.values())
+
+def test_spread_evenly_picks_the_odd_slots_at_random():
+    winners = Counter(group for seed in range(200)
+                      for group, slots in spread_evenly(1, {"a": 5, "b": 5}, random.Random(seed)).items() if slots)
+    assert winners["a"] > 50 and winners["b"] > 50
+
+def test_balanced_sample(question_index, questions, clusters):
+    cluster_of, cluster_members = clusters
+    rng = random.Random(4)
+    exclude_ids = {question["id"] for question in questions[1::7]}
+    for _ in range(20):
+        sample = balanced_sample(question_index, 18, cluster_of, cluster_members, exclude_ids=exclude_ids, rng=rng)
+        sample_ids = [question["id"] for question in sample]
+        assert len(sample_ids) == len(set(sample_ids)) == 18
+        assert not exclude_ids.intersection(sample_ids)
+        sample_clusters = [cluster_of[question_id] for question_id in sample_ids if question_id in cluster_of]
+        assert len(sample_clusters) == len(set(sample_clusters))
+        # Every domain has plenty of questions, so 18 slots split 6/6/6
+        assert Counter(question["domain"] for question in sample) == {domain: 6 for domain in DOMAINS}
+        difficulty_counts = Counter(question["difficulty"] for question in sample)
+        assert max(difficulty_counts.values()) - min(difficulty_counts.values()) <= 3
+
+def test_balanced_sample_with_filters(question_index, questions, clusters):
+    cluster_of, cluster_members = clusters
+    rng = random.Random(5)
+    within_ids = {question["id"] for question in questions[::2]}
+    within = question_index.bitmap_for_ids(within_ids)
+    sample = balanced_sample(question_index, 6, cluster_of, cluster_members, rng=rng,
+                             domain="Information and Ideas", difficulty=None, within=within)
+    assert len(sample) == 6
+    assert {question["domain"] for question in sample} == {"Information and Ideas"}
+    assert {question["id"] for question in sample} <= within_ids
+    assert Counter(question["skill"] for question in sample) == {skill: 2 for skill in DOMAINS["Information and Ideas"]}
+
+    # Asking for more than there is returns one question per cluster plus every unclustered one
+    boundaries = [question for question in questions if question["skill"] == "Boundaries"]
+    expected = {question["id"] for question in boundaries if question["id"] not in cluster_of} | \
+        {cluster_of[question["id"]] for question in boundaries if question["id"] in cluster_of}
+    sample = balanced_sample(question_index, 1000, cluster_of, cluster_members, rng=rng, skill="Boundaries")
+    assert len(sample) == len(expected)
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the session bundles"
+        time.sleep(0.005)
+
+@pytest.fixture
+def make_pool(question_index, questions, clusters):
+    pools = []
+    def make(completed_ids=(), **options):
+        completed_ids = set(completed_ids)
+        loads = []
+        def load_uncompleted(user):
+            loads.append(user)
+            return [question["id"] for question in questions if question["id"] not in completed_ids]
+        pool = SessionBundlePool(question_index, clusters[0],
+                                 lambda question_id: json.dumps({"id": question_id}).encode('utf-8'),
+                                 load_uncompleted, **options)
+        pool.loads = loads
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.close()
+
+def test_pool_serves_ready_bundles(make_pool, questions):
+    completed_ids = {question["id"] for question in questions[:20]} # Most of Craft and Structure
+    pool = make_pool(completed_ids, workers=1)
+    filters = {"domain": "Craft and Structure"}
+    assert pool.take("ann", 5, filters) is None # Nothing ready yet; starts stocking the combination
+    wait_until(lambda: pool.stats()["ready"] == 2)
+
+    bundle = pool.take("ann", 5, filters)
+    assert len(bundle.question_ids) == 5
+    assert not completed_ids.intersection(bundle.question_ids)
+    assert set(bundle.answers) == set(bundle.question_ids)
+    response = json.loads(bundle.response_body("s1"))
+    assert response["session_id"] == "s1"
+    assert response["question_ids"] == bundle.question_ids
+    assert [question["id"] for question in response["questions"]] == bundle.question_ids
+    assert "correct_answer" not in bundle.body.decode('utf-8')
+    wait_until(lambda: pool.stats()["ready"] == 2)
+    assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 1
+    assert pool.loads == ["ann"] # The completed set is read once per user
+
+def test_mark_answered_discards_stale_bundles(make_pool):
+    pool = make_pool(workers=1)
+    pool.take("ann", 4, {})
+    pool.take("bob", 4, {})
+    wait_until(lambda: pool.stats()["ready"] == 4)
+    key = pool.make_key("ann", 4, {})
+    with pool.lock:
+        stale_bundle = pool.ready[key][0]
+        other_ids = {question_id for bundle in pool.ready[pool.make_key("bob", 4, {})] for question_id in bundle.question_ids}
+    answered_id = stale_bundle.question_ids[0]
+
+    pool.mark_answered("ann", answered_id)
+    with pool.lock:
+        assert stale_bundle not in pool.ready[key]
+    assert pool.stats()["discarded"] >= 1
+    wait_until(lambda: pool.stats()["ready"] == 4)
+    with pool.lock:
+        assert all(answered_id not in bundle.answers for bundle in pool.ready[key])
+        # Other users' bundles are untouched
+        assert {question_id for bundle in pool.ready[pool.make_key("bob", 4, {})]
+                for question_id in bundle.question_ids} == other_ids
+    for _ in range(10): # Later bundles never bring the answered question back
+        bundle = pool.take("ann", 4, {})
+        assert bundle is None or answered_id not in bundle.answers
+        wait_until(lambda: pool.stats()["ready"] == 4)